@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Allocation micro-benchmark for the SPI data path.
+
+Compares the reusable-frame data path in CCBase with the list-building
+path it replaced, for the transfers done per received packet. Runs on an
+in-process SPI stand-in, no hardware needed.
+
+    python benchmarks/bench_alloc.py [--packets N] [--length BYTES]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# run from a checkout without installing pyticc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyticc.cc1101 import CC1101
+
+
+class NullSPI(object):
+    """Returns a fresh list per transfer, like spidev does."""
+
+    max_speed_hz = 0
+
+    def open(self, bus, device):
+        pass
+
+    def xfer(self, data):
+        return [0] * len(data)
+
+
+def legacy_packet(cc, length):
+    """Transfers per packet, built the way the old data path did."""
+
+    spi = cc.spi
+    spi.xfer([cc.SRX, 0x00])
+    spi.xfer([cc.READ_SINGLE_BYTE | cc.RXBYTES, 0x00])[1]
+    spi.xfer([cc.READ_SINGLE_BYTE | cc.PKTCTRL0, 0x00])[1]
+    spi.xfer([cc.READ_SINGLE_BYTE | cc.PKTLEN, 0x00])[1]
+    buff = []
+    for x in range(length + 1):
+        buff.append(cc.READ_BURST | cc.RXFIFO)
+    return spi.xfer(buff)[1:]
+
+
+def current_packet(cc, length):
+    """The same transfers through CCBase."""
+
+    cc.strobe(cc.SRX)
+    cc.read_byte(cc.RXBYTES)
+    cc.read_byte(cc.PKTCTRL0)
+    cc.read_byte(cc.PKTLEN)
+    return cc.read_burst(cc.RXFIFO, length)
+
+
+def current_packet_into(cc, length, buffer=bytearray(64)):
+    """The same transfers, reading the FIFO into a reused buffer."""
+
+    cc.strobe(cc.SRX)
+    cc.read_byte(cc.RXBYTES)
+    cc.read_byte(cc.PKTCTRL0)
+    cc.read_byte(cc.PKTLEN)
+    return cc.read_burst_into(cc.RXFIFO, buffer, length)
+
+
+def measure(func, cc, packets, length):
+    func(cc, length)
+
+    start = time.perf_counter()
+    for _ in range(packets):
+        func(cc, length)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    func(cc, length)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "name": func.__name__,
+        "us_per_packet": elapsed / packets * 1e6,
+        "peak_bytes_per_packet": peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('--packets', type=int, default=20000)
+    parser.add_argument('--length', type=int, default=32)
+    args = parser.parse_args()
+
+    cc = CC1101(spi=NullSPI())
+
+    for func in (legacy_packet, current_packet, current_packet_into):
+        result = measure(func, cc, args.packets, args.length)
+        print("%-22s %8.2f us/packet %8d peak bytes/packet" % (
+            result["name"], result["us_per_packet"], result["peak_bytes_per_packet"]))
+
+
+if __name__ == '__main__':
+    main()
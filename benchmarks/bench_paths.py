@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the register, config and packet paths.
+
+Runs CC1101 against the in-process simulator (pyticc.sim), optionally
+with simulated bus latency, and writes JSON results that can be compared
+across commits. Each benchmark is timed best-of-N, and reports SPI
+transfers and bytes per operation next to the time.
+
+    python benchmarks/bench_paths.py [--latency US] [--byte-time US]
+                                     [--repeat N] [--scale X] [-o FILE]
+    python benchmarks/bench_paths.py --compare BASE.json NEW.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# run from a checkout without installing pyticc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyticc.cc1101 import CC1101
+from pyticc.codec import crc16, crc16_batch, fec_decode, fec_decode_batch, fec_encode
+from pyticc.hopping import Hopper
+from pyticc.sim import SimulatedCC1101
+from pyticc.solvers import solve_data_rate
+from pyticc.sweep import RSSISweep
+from pyticc.utils import _numpy, bit_into_byte, byte_bit_value
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, iterations):
+    """Register a benchmark: func(radio, sim, iterations) runs the ops."""
+
+    def register(func):
+        BENCHMARKS.append((name, iterations, func))
+        return func
+
+    return register
+
+
+# registers and fields
+# ---------------------------------
+@benchmark('read_byte', 20000)
+def bench_read_byte(cc, sim, n):
+    for _ in range(n):
+        cc.read_byte(cc.MDMCFG2)
+
+
+@benchmark('write_byte', 20000)
+def bench_write_byte(cc, sim, n):
+    for i in range(n):
+        cc.write_byte(cc.MDMCFG2, i & 0xFF)
+
+
+@benchmark('register_value', 10000)
+def bench_register_value(cc, sim, n):
+    for _ in range(n):
+        cc.register_value('MDMCFG2')
+
+
+@benchmark('register_write', 10000)
+def bench_register_write(cc, sim, n):
+    for i in range(n):
+        cc.register_write('MDMCFG2', 'MOD_FORMAT', i & 0x01)
+
+
+@benchmark('byte_bit_value', 200000)
+def bench_byte_bit_value(cc, sim, n):
+    for i in range(n):
+        byte_bit_value(i & 0xFF, (1, 3))
+
+
+@benchmark('bit_into_byte', 200000)
+def bench_bit_into_byte(cc, sim, n):
+    for i in range(n):
+        bit_into_byte(i & 0xFF, (1, 3), i & 0x07)
+
+
+@benchmark('solve_data_rate', 200000)
+def bench_solve_data_rate(cc, sim, n):
+    for i in range(n):
+        solve_data_rate(1200 + i % 250000, cc.osc_freq)
+
+
+# config
+# ---------------------------------
+@benchmark('apply_config', 500)
+def bench_apply_config(cc, sim, n):
+    names = [r.name for r in cc.fields if r.address < cc.CONFIG_SIZE]
+    configs = (
+        {name: sim.RESET_DEFAULTS[cc.fields[name].address] for name in names},
+        {name: sim.RESET_DEFAULTS[cc.fields[name].address] ^ 0x01 for name in names},
+    )
+    for i in range(n):
+        cc.apply_config(configs[i & 0x01])
+
+
+@benchmark('load_profile', 2000)
+def bench_load_profile(cc, sim, n):
+    image = cc.load_profile('433 OOK 4.8k')
+    for _ in range(n):
+        cc.load_profile(image)
+
+
+# hopping
+# ---------------------------------
+@benchmark('retune_base_frequency', 1000)
+def bench_retune_base_frequency(cc, sim, n):
+    for i in range(n):
+        cc.base_frequency(433.1 + (i & 0x03) * 0.2)
+        cc.enable_rx()
+
+
+@benchmark('hop', 5000)
+def bench_hop(cc, sim, n):
+    hopper = Hopper(cc, [433100000, 433300000, 433500000, 433700000])
+    hopper.calibrate()
+    for _ in range(n):
+        hopper.hop()
+
+
+# RSSI survey, 16 channels
+# ---------------------------------
+@benchmark('rssi_loop', 200)
+def bench_rssi_loop(cc, sim, n):
+    for _ in range(n):
+        for channel in range(16):
+            cc.sidle()
+            cc.channel(channel)
+            cc.enable_rx()
+            cc.rssi()
+
+
+@benchmark('rssi_sweep', 200)
+def bench_rssi_sweep(cc, sim, n):
+    sweep = RSSISweep(cc, range(16), settle=0)
+    out = None
+    for _ in range(n):
+        out = sweep.sweep(out)
+
+
+# packets
+# ---------------------------------
+PAYLOAD = bytes(range(32))
+
+
+@benchmark('recv_data', 2000)
+def bench_recv_data(cc, sim, n):
+    for _ in range(n):
+        sim.inject(PAYLOAD)
+        while cc.recv_data() is None:
+            pass
+
+
+@benchmark('recv_packets', 2000)
+def bench_recv_packets(cc, sim, n):
+    # 4 short packets (with length and status bytes) per FIFO drain
+    cc.write_byte('MCSM1', 0x3C)    # stay in RX
+    cc.enable_rx()
+    received = 0
+    while received < n:
+        for _ in range(min(n - received, 4)):
+            sim.inject(PAYLOAD[:12])
+        received += len(cc.recv_packets())
+
+
+@benchmark('send_data', 2000)
+def bench_send_data(cc, sim, n):
+    cc.write_byte('PKTCTRL1', 0x00)
+    for _ in range(n):
+        cc.send_data(PAYLOAD)
+
+
+# software codecs, one 32 byte frame per op
+# ---------------------------------
+FEC_FRAME = fec_encode(PAYLOAD)
+
+
+@benchmark('crc16', 20000)
+def bench_crc16(cc, sim, n):
+    for _ in range(n):
+        crc16(PAYLOAD)
+
+
+@benchmark('crc16_batch', 20000)
+def bench_crc16_batch(cc, sim, n):
+    np = _numpy()
+    crc16_batch(np.tile(np.frombuffer(PAYLOAD, dtype=np.uint8), (n, 1)))
+
+
+@benchmark('fec_decode', 200)
+def bench_fec_decode(cc, sim, n):
+    for _ in range(n):
+        fec_decode(FEC_FRAME)
+
+
+@benchmark('fec_decode_batch', 2000)
+def bench_fec_decode_batch(cc, sim, n):
+    np = _numpy()
+    fec_decode_batch(np.tile(np.frombuffer(FEC_FRAME, dtype=np.uint8), (n, 1)))
+
+
+# harness
+# ---------------------------------
+def run(name, iterations, func, args):
+    best = None
+    for _ in range(args.repeat):
+        sim = SimulatedCC1101(latency=args.latency * 1e-6,
+                              byte_time=args.byte_time * 1e-6)
+        cc = CC1101(spi=sim)
+        func(cc, sim, max(1, iterations // 100))   # warm up
+
+        transfers = sim.transfers
+        clocked = sim.bytes_clocked
+        start = time.perf_counter()
+        func(cc, sim, iterations)
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best[0]:
+            best = (elapsed, sim.transfers - transfers, sim.bytes_clocked - clocked)
+
+    elapsed, transfers, clocked = best
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / elapsed,
+        "us_per_op": elapsed / iterations * 1e6,
+        "transfers_per_op": transfers / iterations,
+        "bytes_per_op": clocked / iterations,
+    }
+
+
+def metadata(args):
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "latency_us": args.latency,
+        "byte_time_us": args.byte_time,
+        "repeat": args.repeat,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(base_path, new_path):
+    with open(base_path) as fh:
+        base = json.load(fh)["results"]
+    with open(new_path) as fh:
+        new = json.load(fh)["results"]
+
+    print("%-16s %12s %12s %8s %10s" % ("benchmark", "base us/op", "new us/op",
+                                        "change", "xfers/op"))
+    for name, result in new.items():
+        if name not in base:
+            continue
+        old = base[name]["us_per_op"]
+        print("%-16s %12.2f %12.2f %+7.1f%% %4.1f->%-4.1f" % (
+            name, old, result["us_per_op"], (result["us_per_op"] / old - 1) * 100,
+            base[name]["transfers_per_op"], result["transfers_per_op"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="simulated microseconds per SPI transfer")
+    parser.add_argument('--byte-time', type=float, default=0.0,
+                        help="simulated microseconds per byte clocked")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="multiply iteration counts")
+    parser.add_argument('--only', action='append', help="benchmark to run")
+    parser.add_argument('-o', '--output', help="write JSON here (default stdout)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = {}
+    for name, iterations, func in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        results[name] = run(name, max(1, int(iterations * args.scale)), func, args)
+        print("%-16s %10.2f us/op %6.1f transfers/op" % (
+            name, results[name]["us_per_op"], results[name]["transfers_per_op"]),
+            file=sys.stderr)
+
+    data = {"meta": metadata(args), "results": results}
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(data, fh, indent=2)
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
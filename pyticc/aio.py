@@ -0,0 +1,246 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from pyticc.cc1101 import CC1101
+
+# status polls, 10 us apart, for the chip to reach IDLE after a cut short send
+IDLE_POLLS = 100
+
+
+class AsyncCC1101(object):
+    """
+    asyncio front end for a CC1101.
+
+    Every SPI transfer runs on a dedicated single thread executor, so the
+    event loop never blocks on the bus, and transfers for one radio stay
+    in order. Waits on the chip (MARCSTATE, TXBYTES, ...) are asyncio
+    sleeps with deadlines instead of time.sleep spin loops.
+
+        radio = AsyncCC1101(spi_bus=0, spi_device=0)
+        await radio.modulation('OOK')
+        data = await radio.recv(timeout=5)
+
+    args:
+        - [optional] radio: existing CC1101. Default creates one with the
+          remaining keyword-args.
+
+    keyword-args:
+        - executor: concurrent.futures executor for blocking SPI calls.
+          It must run jobs in order on a single thread, the radio lock is
+          held across the jobs of a send or sidle. default=new single
+          thread executor.
+        - poll_interval: seconds between RX FIFO polls. default=0.001
+        - edge: pyticc.gpio.EdgeSource. When given, recv() sleeps on GDO
+          edges instead of polling the FIFO.
+    """
+
+    # Blocking CC1101 methods that are exposed as coroutines as-is
+    PASSTHROUGH = CC1101.SETTINGS + (
+        'sanity_check', 'channel_spacing', 'rssi', 'marcstate', 'read_status',
+        'register_value', 'register_write', 'register_image', 'apply_config',
+        'configure_gdo', 'refresh_shadow', 'read_byte', 'write_byte',
+        'read_burst', 'write_burst', 'strobe', 'reset', 'power_down',
+        'enable_rx', 'enable_tx', 'wor_on', 'sx_off', 'calibrate',
+        'flush_rx_fifo', 'flush_tx_fifo'
+    )
+
+    def __init__(self, radio=None, executor=None, poll_interval=0.001,
+                 edge=None, **kwargs):
+        self.radio = radio if radio is not None else CC1101(**kwargs)
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='pyticc')
+        self.poll_interval = poll_interval
+        self.edge = edge
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the executor, if we created it."""
+
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the radio's executor."""
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
+
+    # state transitions
+    # ---------------------------------
+    async def sidle(self, timeout=1.0):
+        """Clear command strobes and wait for idle."""
+
+        return await self._drive(self.radio._sidle_steps(), timeout)
+
+    async def wait_state(self, states, timeout=1.0):
+        """
+        Wait until MARCSTATE is one of the given states.
+
+        args:
+            - states: int or list of MARCSTATE values.
+            - [optional] timeout in seconds.
+        returns: the MARCSTATE reached.
+        raises: asyncio.TimeoutError
+        """
+
+        if type(states) is int:
+            states = [states]
+
+        deadline = self._deadline(timeout)
+        while True:
+            state = await self.run(self.radio.marcstate)
+            if state in states:
+                return state
+
+            await self._sleep_until(deadline, self.poll_interval)
+
+    # read/write data
+    # ---------------------------------
+    async def recv(self, timeout=None):
+        """
+        Wait for a packet.
+
+        args: [optional] timeout in seconds. None waits forever.
+        returns: same as CC1101.recv_data(), or None on timeout.
+        """
+
+        deadline = self._deadline(timeout)
+        await self.run(self.radio.enable_rx)
+
+        while True:
+            data = await self.run(self.radio._read_packet)
+            if data is not None:
+                return data
+
+            try:
+                if self.edge is not None:
+                    await self._wait_edge(deadline)
+                else:
+                    await self._sleep_until(deadline, self.poll_interval)
+            except asyncio.TimeoutError:
+                return None
+
+    async def send(self, data, timeout=1.0):
+        """
+        Send a packet.
+
+        args:
+            - list of bytes
+            - [optional] timeout in seconds for the whole send.
+        returns: same as CC1101.send_data()
+        raises: asyncio.TimeoutError
+        """
+
+        return await self._drive(self.radio._send_steps(data), timeout)
+
+    # Private methods
+    # ---------------------------------
+    async def _drive(self, steps, timeout):
+        """
+        Async counterpart of CCBase._run_steps, with a deadline.
+
+        The radio lock is taken on the executor thread before the first
+        step and released after the last one, so other threads using the
+        radio cannot interleave with the sequence while it sleeps.
+        """
+
+        deadline = self._deadline(timeout)
+        loop = asyncio.get_running_loop()
+        lock = self.radio.lock
+        acquired = loop.run_in_executor(self.executor, lock.acquire)
+        done = False
+        try:
+            await acquired
+            while True:
+                done, value = await self.run(_step, steps)
+                if done:
+                    return value
+
+                await self._sleep_until(deadline, value / 1000000.0)
+        finally:
+            # queued behind any step still running after a cancel, on the
+            # thread that owns the lock
+            loop.run_in_executor(self.executor, _finish, self.radio, steps, done)
+
+    def _deadline(self, timeout):
+        if timeout is None:
+            return None
+
+        return asyncio.get_running_loop().time() + timeout
+
+    async def _sleep_until(self, deadline, delay):
+        if deadline is not None:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            delay = min(delay, remaining)
+
+        await asyncio.sleep(delay)
+
+    async def _wait_edge(self, deadline):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = self.edge.fileno()
+
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
+        try:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0, deadline - loop.time())
+            await asyncio.wait_for(ready, timeout)
+        finally:
+            loop.remove_reader(fd)
+
+        self.edge.clear()
+
+
+def _step(steps):
+    """Advance a step generator by one step: (done, delay or result)."""
+
+    try:
+        return False, next(steps)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def _finish(radio, steps, done):
+    """
+    Close a step generator and release the radio lock taken for it.
+
+    A sequence cut short (timeout, cancel, error) may have left the chip
+    in TX with a loaded TX FIFO; it is put back in IDLE with an empty TX
+    FIFO before anyone else gets the radio.
+    """
+
+    try:
+        steps.close()
+        if not done:
+            radio.strobe(radio.SIDLE)
+            for _ in range(IDLE_POLLS):
+                if radio.read_status(rx=False).state == 'IDLE':
+                    break
+                radio.cmd_delay(10)
+            radio.flush_tx_fifo()
+    finally:
+        radio.lock.release()
+
+
+def _passthrough(name):
+    async def method(self, *args, **kwargs):
+        return await self.run(getattr(self.radio, name), *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = "Awaitable CC1101.%s()" % name
+    return method
+
+
+for _name in AsyncCC1101.PASSTHROUGH:
+    setattr(AsyncCC1101, _name, _passthrough(_name))
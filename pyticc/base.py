@@ -1,6 +1,28 @@
-import spidev
+import functools
+import threading
 import time
-from pyticc.utils import byte_bit_value, bit_into_byte
+from collections import namedtuple
+from itertools import islice
+from pyticc.lock import TimedLock, bus_lock
+from pyticc.shadow import RegisterShadow
+from pyticc.trace import SPITracer
+from pyticc.transport import open_transport
+
+
+# Decoded chip status byte. fifo_bytes counts RX FIFO bytes after a read
+# header and free TX FIFO bytes after a write header, capped at 15.
+ChipStatus = namedtuple('ChipStatus', ['chip_ready', 'state', 'fifo_bytes'])
+
+def locked(method):
+    """Run a CCBase method as one atomic section, see CCBase.atomic()."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class SPIBase(object):
 
@@ -15,21 +37,32 @@ class SPIBase(object):
             - spi_device:
             - spi_bus:
             - spi_speed
+            - transport: spidev|ioctl|loopback|unix:<socket path>, or a
+              pyticc.transport.Transport. The device is opened on the
+              first transfer. default=spidev
+            - spi: object with the spidev.SpiDev interface to use as is,
+              e.g. pyticc.sim.SimulatedCC1101.
         """
 
         self.spi_device = 0
         self.spi_bus = 0
         self.spi_speed = 50000
+        self.transport = 'spidev'
         self.spi = None
 
-        allowed = ['spi_device', 'spi_bus', 'spi_speed']
+        allowed = ['spi_device', 'spi_bus', 'spi_speed', 'transport', 'spi']
         for k, v in kwargs.items():
             if k in allowed:
                 setattr(self, k, v)
 
-        self.spi = spidev.SpiDev()
-        self.spi.open(self.spi_bus, self.spi_device)
-        self.spi.max_speed_hz = self.spi_speed
+        # chip selects on one bus share a lock, held per transfer
+        self.bus_lock = bus_lock(self.spi_bus)
+
+        if self.spi is None:
+            self.spi = open_transport(self.transport, self.spi_bus,
+                                      self.spi_device, self.spi_speed)
+        else:
+            self.spi.max_speed_hz = self.spi_speed
 
 
 class CCBase(SPIBase):
@@ -39,40 +72,128 @@ class CCBase(SPIBase):
     This class assumes that any sublass will populate it's own
     register attributes. i.e. "self.SPWD", "self.READ_SINGLE_BYTE"
 
+    Subclasses also describe their configuration space with
+    "self.CONFIG_SIZE" (registers 0x00 thru CONFIG_SIZE - 1) and
+    "self.SLEEP_LOST" (config addresses that are lost in SLEEP).
+
     """
 
+    # STATE[2:0] of the chip status byte
+    STATUS_STATES = ('IDLE', 'RX', 'TX', 'FSTXON', 'CALIBRATE', 'SETTLING',
+                     'RXFIFO_OVERFLOW', 'TXFIFO_UNDERFLOW')
+
     def __init__(self, *args, **kwargs):
-        super(CCBase, self).__init__(args, kwargs)
+        """
+        Instantiation
+
+        args:
+            none
+
+        keyword-args:
+            - shadow_registers: (bool) keep a write-through copy of the
+              config registers, so reads of them cost no SPI traffic.
+              default=False
+        """
+
+        self.shadow = None
+
+        # Status byte the chip clocked out during the last transfer
+        self.status_byte = None
+
+        # Optional pyticc.trace.SPITracer, see start_trace()
+        self.tracer = None
+
+        # pyticc.wor.WorPlan while Wake-on-Radio is on, see start_wor()
+        self.wor = None
+
+        # Held across compound operations, see atomic()
+        self.lock = TimedLock('radio')
+
+        # Transfer frames are reused, one list per transfer length and
+        # thread, so the data path does not build new lists for every access.
+        self._frames = threading.local()
+
+        super(CCBase, self).__init__(*args, **kwargs)
+
+        if kwargs.get('shadow_registers'):
+            self.shadow = RegisterShadow(self.CONFIG_SIZE, self.SLEEP_LOST,
+                                         self.CALIBRATION)
 
     def read_byte(self, name):
         """Read byte at named address."""
 
         addr = self._get_address(name)
-        return self.spi.xfer([self.READ_SINGLE_BYTE | addr, 0x00])[1]
+        if self.shadow is not None and addr in self.shadow:
+            byte = self.shadow.get(addr)
+            if byte is None:
+                byte = self._xfer(self._frame(self.READ_SINGLE_BYTE | addr, 2))[1]
+                self.shadow.set(addr, byte)
+            return byte
+
+        return self._xfer(self._frame(self.READ_SINGLE_BYTE | addr, 2))[1]
 
     def write_byte(self, name, byte):
         """write byte to named address."""
 
         addr = self._get_address(name)
-        return self.spi.xfer([self.WRITE_SINGLE_BYTE | addr, byte])
+        frame = self._frame(self.WRITE_SINGLE_BYTE | addr, 2)
+        frame[1] = byte
+        result = self._xfer(frame)
+        if self.shadow is not None and addr in self.shadow:
+            self.shadow.set(addr, byte)
+
+        return result
 
     def read_burst(self, name, length):
-        """Burst read from named address"""
+        """
+        Burst read from named address.
+
+        One header byte goes out, then "length" bytes are clocked in.
+
+        returns: bytes
+        """
+
+        addr = self._get_address(name)
+        out = self._xfer(self._frame(self.READ_BURST | addr, length + 1))
+        data = bytes(islice(out, 1, None))
+        if self.shadow is not None and addr in self.shadow:
+            self.shadow.update(addr, data)
+
+        return data
+
+    def read_burst_into(self, name, buffer, length=None):
+        """
+        Burst read from named address into a caller-supplied buffer.
+
+        args:
+            - register name or address
+            - writable bytearray or memoryview
+            - [optional] number of bytes. default=len(buffer)
+        returns: number of bytes read
+        """
+
+        if length is None:
+            length = len(buffer)
 
-        buff = []
         addr = self._get_address(name)
-        for x in range(length + 1):
-            this_addr = (addr + (x * 8)) | self.READ_BURST
-            buff.append(this_addr)
+        out = self._xfer(self._frame(self.READ_BURST | addr, length + 1))
+        buffer[:length] = bytes(islice(out, 1, None))
+        if self.shadow is not None and addr in self.shadow:
+            self.shadow.update(addr, buffer[:length])
 
-        return self.spi.xfer(buff)[1:]
+        return length
 
-    def write_burst(self, address, data):
+    def write_burst(self, name, data):
         """Burst write to named address."""
 
         addr = self._get_address(name)
-        data.insert(0, (self.WRITE_BURST | addr))
-        return self.spi.xfer(data)
+        frame = self._frame(self.WRITE_BURST | addr, len(data) + 1)
+        frame[1:] = data
+        result = self._xfer(frame)
+        if self.shadow is not None and addr in self.shadow:
+            self.shadow.update(addr, data)
+
+        return result
 
     # strobe and status commands
     # ---------------------------------
@@ -80,7 +201,92 @@ class CCBase(SPIBase):
         """Strobe value to and address."""
 
         addr = self._get_address(addr)
-        return self.spi.xfer([addr, 0x00])
+        result = self._xfer(self._frame(addr, 1))
+        if self.shadow is not None:
+            # strobes may carry the read bit, for RX FIFO status
+            command = addr & 0x3F
+            if command == self.SRES:
+                self.shadow.invalidate()
+            elif command == self.SPWD:
+                self.shadow.sleep()
+            elif command in self.CALIBRATION_STROBES:
+                self.shadow.calibrated()
+
+        return result
+
+    @property
+    def status(self):
+        """
+        Chip status as of the last SPI transfer. No bus traffic.
+
+        returns: ChipStatus(chip_ready, state, fifo_bytes), or None
+                 before the first transfer.
+        """
+
+        if self.status_byte is None:
+            return None
+
+        return self._decode_status(self.status_byte)
+
+    def read_status(self, rx=True):
+        """
+        Fetch a fresh chip status with a one byte SNOP strobe.
+
+        args:
+            - [optional] rx (bool): fifo_bytes counts RX FIFO bytes when
+              True, free TX FIFO bytes when False. default=True
+        returns: ChipStatus
+        """
+
+        addr = self.SNOP | self.READ_SINGLE_BYTE if rx else self.SNOP
+        return self._decode_status(self.strobe(addr)[0])
+
+    def refresh_shadow(self):
+        """
+        Fill the register shadow with one burst read of the config space.
+
+        args: none
+        returns: none
+        """
+
+        if self.shadow is None:
+            raise ValueError("Register shadow is not enabled")
+
+        self.read_burst(0x00, self.shadow.size)
+
+    def atomic(self):
+        """
+        Context manager making a sequence of calls one atomic section.
+
+        Other threads using this radio wait until the section ends. Read-
+        modify-write, strobe-then-wait and FIFO drains already run this
+        way. The lock is re-entrant, and its wait/hold times are in
+        self.lock.stats().
+
+            with cc.atomic():
+                cc.sidle()
+                cc.write_byte('CHANNR', 4)
+                cc.enable_rx()
+        """
+
+        return self.lock
+
+    def start_trace(self, capacity=None):
+        """
+        Record every SPI transfer from now on.
+
+        args: [optional] capacity (int): keep only the last n transfers.
+        returns: pyticc.trace.SPITracer
+        """
+
+        self.tracer = SPITracer(self, capacity)
+        return self.tracer
+
+    def stop_trace(self):
+        """Stop recording. returns: the SPITracer, or None."""
+
+        tracer, self.tracer = self.tracer, None
+        return tracer
 
     def marcstate(self):
         return (self.read_byte(self.MARCSTATE) & 0x1F)
@@ -95,6 +301,7 @@ class CCBase(SPIBase):
 
         self.strobe(self.SFTX)
 
+    @locked
     def power_down(self):
         """Power down CC1101."""
 
@@ -106,15 +313,21 @@ class CCBase(SPIBase):
 
         return self.strobe(self.SRES)
 
+    @locked
     def sidle(self):
         """Clear command strobes and wait for idle."""
 
+        self._run_steps(self._sidle_steps())
+
+    def _sidle_steps(self):
         self.strobe(self.SIDLE)
-        while (self.read_byte(self.MARCSTATE) != 0x01):
-            self.cmd_delay(10)
+        status = self.read_status()
+        while not (status.chip_ready and status.state == 'IDLE'):
+            yield 10
+            status = self.read_status()
 
         self.strobe(self.SFTX)
-        self.cmd_delay(10)
+        yield 10
 
     def enable_tx(self):
         """Switch CC1101 to TX mode."""
@@ -123,13 +336,17 @@ class CCBase(SPIBase):
         self.cmd_delay(2)
 
     def enable_rx(self):
-        """Switch CC1101 to RX mode."""
+        """Switch CC1101 to RX mode, or back to WOR polling if it is on."""
 
-        self.strobe(self.SRX)
+        # read header, so the status byte counts RX FIFO bytes
+        if self.wor is not None:
+            self.strobe(self.SWOR | self.READ_SINGLE_BYTE)
+        else:
+            self.strobe(self.SRX | self.READ_SINGLE_BYTE)
         self.cmd_delay(2)
 
     def wor_on(self):
-        """Start Wake On Radio (WOR) polling."""
+        """Start Wake On Radio (WOR) polling, see CC1101.start_wor()."""
 
         self.strobe(self.SWOR)
         self.cmd_delay(2)
@@ -153,6 +370,62 @@ class CCBase(SPIBase):
 
     # Private methods*
     # ---------------------------------
+    def _xfer(self, frame):
+        """Every SPI transfer goes through here."""
+
+        with self.bus_lock:
+            if self.tracer is None:
+                out = self.spi.xfer(frame)
+            else:
+                header = frame[0]
+                start = time.perf_counter()
+                out = self.spi.xfer(frame)
+                self.tracer.record(header, len(frame), start, time.perf_counter())
+
+        self.status_byte = out[0]
+        return out
+
+    def _frame(self, header, length):
+        """
+        Get the reusable transfer frame for a given length.
+
+        The header byte is filled in, the rest is left to the caller. The
+        chip ignores what is clocked out after a read header, so reads do
+        not need to clear what the last write left behind. Each thread
+        has its own frames; fill and transfer them before asking for
+        another frame of the same length.
+        """
+
+        frames = self._frames.__dict__
+        frame = frames.get(length)
+        if frame is None:
+            frame = frames[length] = [0x00] * length
+
+        frame[0] = header
+        return frame
+
+    def _decode_status(self, byte):
+        return ChipStatus(not byte & 0x80, self.STATUS_STATES[(byte >> 4) & 0x07],
+                          byte & 0x0F)
+
+    def _run_steps(self, steps):
+        """
+        Drive a step generator to completion.
+
+        Multi-step operations that have to wait on the chip (sidle,
+        send_data, ...) are written as generators yielding the delay in
+        microseconds before their next poll. Here we simply sleep; the
+        asyncio front end (pyticc.aio) awaits instead.
+
+        returns: the generator's return value.
+        """
+
+        try:
+            while True:
+                self.cmd_delay(next(steps))
+        except StopIteration as stop:
+            return stop.value
+
     def _get_address(self, name):
         """Get an address value from named attribute."""
 
@@ -162,9 +435,3 @@ class CCBase(SPIBase):
             return getattr(self, name)
         else:
             raise ValueError("Unexpected address type '%s'" % type(name))
-
-    def _extract_val_from_byte(self, byte, schema):
-        return byte_bit_value(byte, schema)
-
-    def _update_val_in_byte(self, byte, schema, value):
-        return bit_into_byte(byte, schema, value)
@@ -1,5 +1,15 @@
 import math
-from pyticc.base import CCBase
+import time
+from pyticc.base import CCBase, locked
+from pyticc.errors import RXOverflow, TXUnderflow
+from pyticc.packet import Packet
+from pyticc.profiles import RegisterImage, get_profile
+from pyticc.receiver import Receiver
+from pyticc.schema import SchemaTable
+from pyticc.solvers import (
+    solve_channel_spacing, solve_data_rate, solve_deviation, solve_frequency,
+    solve_rx_bandwidth, tables)
+from pyticc.wor import plan_wor
 
 class CCAddr(object):
     WRITE_SINGLE_BYTE = 0x00
@@ -96,6 +106,27 @@ class CCAddr(object):
     TEST1 = 0x2D        # Various Test Settings
     TEST0 = 0x2E        # Various Test Settings
 
+    CONFIG_SIZE = 0x2F  # Config registers are 0x00 thru 0x2E
+    FIFO_SIZE = 64      # RX and TX FIFO bytes
+    PATABLE_SIZE = 8
+    SLEEP_LOST = (FSTEST, PTEST, AGCTEST, TEST2, TEST1, TEST0)
+
+    # Written by the chip on calibration: SCAL, or FS_AUTOCAL on
+    # SRX/STX/SFSTXON/SWOR
+    CALIBRATION = (FSCAL3, FSCAL2, FSCAL1)
+    CALIBRATION_STROBES = (SCAL, SRX, STX, SFSTXON, SWOR)
+
+    # Config register values after reset, 0x00 thru 0x2E
+    RESET_DEFAULTS = bytes([
+        0x29, 0x2E, 0x3F, 0x07, 0xD3, 0x91, 0xFF, 0x04,     # IOCFG2 .. PKTCTRL1
+        0x45, 0x00, 0x00, 0x0F, 0x00, 0x1E, 0xC4, 0xEC,     # PKTCTRL0 .. FREQ0
+        0x8C, 0x22, 0x02, 0x22, 0xF8, 0x47, 0x07, 0x30,     # MDMCFG4 .. MCSM1
+        0x04, 0x36, 0x6C, 0x03, 0x40, 0x91, 0x87, 0x6B,     # MCSM0 .. WOREVT0
+        0xF8, 0x56, 0x10, 0xA9, 0x0A, 0x20, 0x0D, 0x41,     # WORCTRL .. RCCTRL1
+        0x00, 0x59, 0x7F, 0x3F, 0x88, 0x31, 0x0B,           # RCCTRL0 .. TEST0
+    ])
+    PATABLE_DEFAULTS = bytes([0xC6, 0, 0, 0, 0, 0, 0, 0])
+
 
 class CC1101(CCAddr, CCBase):
     """
@@ -106,6 +137,301 @@ class CC1101(CCAddr, CCBase):
 
     """
 
+    MODULATIONS = {
+        "2-FSK":    "000",
+        "GFSK":     "001",
+        "ASK":      "011",
+        "OOK":      "011",
+        "4-FSK":    "100",
+        "MSK":      "111"
+    }
+
+    PACKET_LENGTH_MODES = {
+        "PKT_LEN_FIXED": "00",
+        "PKT_LEN_VARIABLE": "01",
+        "PKT_LEN_INFINITE": "10"
+    }
+
+    # GDOx_CFG values used for event driven receive (see datasheet table 41)
+    GDO_SIGNALS = {
+        "RX_FIFO_THR": 0x00,            # RX FIFO at or above threshold
+        "RX_FIFO_THR_OR_END": 0x01,     # ... or end of packet
+        "TX_FIFO_THR": 0x02,            # TX FIFO at or above threshold
+        "TX_FIFO_FULL": 0x03,
+        "RX_OVERFLOW": 0x04,
+        "TX_UNDERFLOW": 0x05,
+        "SYNC_WORD": 0x06,              # sync word seen, until end of packet
+        "PKT_CRC_OK": 0x07,             # packet received with CRC OK
+        "CARRIER_SENSE": 0x0E,
+        "HIGH_IMPEDANCE": 0x2E
+    }
+
+    # High-level settings understood by apply_config()
+    SETTINGS = (
+        'base_frequency', 'modulation', 'packet_length', 'channel',
+        'baud_rate', 'rx_bandwidth', 'channel_spacing', 'deviation',
+        'manchester', 'whitening', 'sync_word'
+    )
+
+    # Register bit fields: (register, ((field, index, bits), ...))
+    #
+    # Indexing here is opposite of spec sheet.
+    # Ti Doc Index 7 => here is 0
+    # Ti Doc Index 0 => here is 7
+    #
+    # Compiled and checked once per class into "fields", see pyticc.schema.
+    REGISTER_SCHEMA = (
+        ("IOCFG2", (
+            ("GDO2_INV", 1, 1),
+            ("GDO2_CFG[5:0]", 2, 6),
+        )),
+        ("IOCFG1", (
+            ("GDO_DS", 0, 1),
+            ("GDO1_INV", 1, 1),
+            ("GDO1_CFG[5:0]", 2, 6),
+        )),
+        ("IOCFG0", (
+            ("TEMP_SENSOR_ENABLE", 0, 1),
+            ("GDO0_INV", 1, 1),
+            ("GDO0_CFG[5:0]", 2, 6),
+        )),
+        ("FIFOTHR", (
+            ("ADC_RETENTION", 1, 1),
+            ("CLOSE_IN_RX[1:0]", 2, 2),
+            ("FIFO_THR[3:0]", 4, 4),
+        )),
+        ("SYNC1", (
+            ("SYNC[15:8]", 0, 8),
+        )),
+        ("SYNC0", (
+            ("SYNC[7:0]", 0, 8),
+        )),
+        ("PKTLEN", (
+            ("PACKET_LENGTH", 0, 8),
+        )),
+        ("PKTCTRL1", (
+            ("PQT[2:0]", 0, 3),
+            ("CRC_AUTOFLUSH", 4, 1),
+            ("APPEND_STATUS", 5, 1),
+            ("ADR_CHK[1:0]", 6, 2),
+        )),
+        ("PKTCTRL0", (
+            ("WHITE_DATA", 1, 1),
+            ("PKT_FORMAT[1:0]", 2, 2),
+            ("CRC_EN", 5, 1),
+            ("LENGTH_CONFIG[1:0]", 6, 2),
+        )),
+        ("ADDR", (
+            ("DEVICE_ADDR[7:0]", 0, 8),
+        )),
+        ("CHANNR", (
+            ("CHAN[7:0]", 0, 8),
+        )),
+        ("FSCTRL1", (
+            ("FREQ_IF[4:0]", 3, 5),
+        )),
+        ("FSCTRL0", (
+            ("FREQOFF[7:0]", 0, 8),
+        )),
+        ("FREQ2", (
+            ("FREQ[23:22]", 0, 2),
+            ("FREQ[21:16]", 2, 6),
+        )),
+        ("FREQ1", (
+            ("FREQ[15:8]", 0, 8),
+        )),
+        ("FREQ0", (
+            ("FREQ[7:0]", 0, 8),
+        )),
+        ("MDMCFG4", (
+            ("CHANBW_E[1:0]", 0, 2),
+            ("CHANBW_M[1:0]", 2, 2),
+            ("DRATE_E[3:0]", 4, 4),
+        )),
+        ("MDMCFG3", (
+            ("DRATE_M[7:0]", 0, 8),
+        )),
+        ("MDMCFG2", (
+            ("DEM_DCFILT_OFF", 0, 1),
+            ("MOD_FORMAT[2:0]", 1, 3),
+            ("MANCHESTER_EN", 4, 1),
+            ("SYNC_MODE[2:0]", 5, 3),
+        )),
+        ("MDMCFG1", (
+            ("FEC_EN", 0, 1),
+            ("NUM_PREAMBLE[2:0]", 1, 3),
+            ("CHANSPC_E[1:0]", 6, 2),
+        )),
+        ("MDMCFG0", (
+            ("CHANSPC_M[7:0]", 0, 8),
+        )),
+        ("DEVIATN", (
+            ("DEVIATION_E[2:0]", 1, 3),
+            ("DEVIATION_M[2:0]", 5, 3),
+        )),
+        ("MCSM2", (
+            ("RX_TIME_RSSI", 3, 1),
+            ("RX_TIME_QUAL", 4, 1),
+            ("RX_TIME[2:0]", 5, 3),
+        )),
+        ("MCSM1", (
+            ("CCA_MODE[1:0]", 2, 2),
+            ("RXOFF_MODE[1:0]", 4, 2),
+            ("TXOFF_MODE[1:0]", 6, 2),
+        )),
+        ("MCSM0", (
+            ("FS_AUTOCAL[1:0]", 2, 2),
+            ("PO_TIMEOUT", 4, 2),
+            ("PIN_CTRL_EN", 6, 1),
+            ("XOSC_FORCE_ON", 7, 1),
+        )),
+        ("FOCCFG", (
+            ("FOC_BS_CS_GATE", 2, 1),
+            ("FOC_PRE_K[1:0]", 3, 2),
+            ("FOC_POST_K", 5, 1),
+            ("FOC_LIMIT[1:0]", 6, 2),
+        )),
+        ("BSCFG", (
+            ("BS_PRE_K[1:0]", 0, 2),
+            ("BS_PRE_KP[1:0]", 2, 2),
+            ("BS_POST_KI", 4, 1),
+            ("BS_POST_KP", 5, 1),
+            ("BS_LIMIT[1:0]", 6, 2),
+        )),
+        ("AGCCTRL2", (
+            ("MAX_DVGA_GAIN[1:0]", 0, 2),
+            ("MAX_LNA_GAIN[2:0]", 2, 3),
+            ("MAGN_TARGET[2:0]", 5, 3),
+        )),
+        ("AGCCTRL1", (
+            ("AGC_LNA_PRIORITY", 1, 1),
+            ("CARRIER_SENSE_REL_THR[1:0]", 2, 2),
+            ("CARRIER_SENSE_ABS_THR[3:0]", 4, 4),
+        )),
+        ("AGCCTRL0", (
+            ("HYST_LEVEL[1:0]", 0, 2),
+            ("WAIT_TIME[1:0]", 2, 2),
+            ("AGC_FREEZE[1:0]", 4, 2),
+            ("FILTER_LENGTH[1:0]", 6, 2),
+        )),
+        ("WOREVT1", (
+            ("EVENT0[15:8]", 0, 8),
+        )),
+        ("WOREVT0", (
+            ("EVENT0[7:0]", 0, 8),
+        )),
+        ("WORCTRL", (
+            ("RC_PD", 0, 1),
+            ("EVENT1[2:0]", 1, 3),
+            ("RC_CAL", 4, 1),
+            ("WOR_RES", 6, 2),
+        )),
+        ("FREND1", (
+            ("LNA_CURRENT[1:0]", 0, 2),
+            ("LNA2MIX_CURRENT[1:0]", 2, 2),
+            ("LODIV_BUF_CURRENT_RX[1:0]", 4, 2),
+            ("MIX_CURRENT[1:0]", 6, 2),
+        )),
+        ("FREND0", (
+            ("LODIV_BUF_CURRENT_TX[1:0]", 2, 2),
+            ("PA_POWER[2:0]", 5, 3),
+        )),
+        ("FSCAL3", (
+            ("FSCAL3[7:6]", 0, 2),
+            ("CHP_CURR_CAL_EN[1:0]", 2, 2),
+            ("FSCAL3[3:0]", 4, 4),
+        )),
+        ("FSCAL2", (
+            ("VCO_CORE_H_EN", 2, 1),
+            ("FSCAL2[4:0]", 3, 5),
+        )),
+        ("FSCAL1", (
+            ("FSCAL1[5:0]", 2, 6),
+        )),
+        ("FSCAL0", (
+            ("FSCAL0[6:0]", 1, 7),
+        )),
+        ("RCCTRL1", (
+            ("RCCTRL1[6:0]", 1, 7),
+        )),
+        ("RCCTRL0", (
+            ("RCCTRL0[6:0]", 1, 7),
+        )),
+        ("FSTEST", (
+            ("FSTEST[7:0]", 0, 8),
+        )),
+        ("PTEST", (
+            ("PTEST[7:0]", 0, 8),
+        )),
+        ("AGCTEST", (
+            ("AGCTEST[7:0]", 0, 8),
+        )),
+        ("TEST2", (
+            ("TEST2[7:0]", 0, 8),
+        )),
+        ("TEST1", (
+            ("TEST1[7:0]", 0, 8),
+        )),
+        ("TEST0", (
+            ("TEST0[7:2]", 0, 6),
+            ("VCO_SEL_CAL_EN", 6, 1),
+            ("TEST0[0]", 7, 1),
+        )),
+        ("PARTNUM", (
+            ("PARTNUM[7:0]", 0, 8),
+        )),
+        ("VERSION", (
+            ("VERSION[7:0]", 0, 8),
+        )),
+        ("FREQEST", (
+            ("FREQOSS_EST", 0, 8),
+        )),
+        ("LQI", (
+            ("CRC_OK", 0, 1),
+            ("LQI_EST[6:0]", 1, 7),
+        )),
+        ("RSSI", (
+            ("RSSI", 0, 8),
+        )),
+        ("MARCSTATE", (
+            ("MARC_STATE[4:0]", 3, 5),
+        )),
+        ("WORTIME1", (
+            ("TIME[15:8]", 0, 8),
+        )),
+        ("WORTIME0", (
+            ("TIME[7:0]", 0, 8),
+        )),
+        ("PKTSTATUS", (
+            ("CRC_OK", 0, 1),
+            ("CS", 1, 1),
+            ("PQT_REACHED", 2, 1),
+            ("CCA", 3, 1),
+            ("SFD", 4, 1),
+            ("GDO2", 5, 1),
+            ("GDO0", 7, 1),
+        )),
+        ("VCO_VC_DAC", (
+            ("VCO_VC_DAC[7:0]", 0, 8),
+        )),
+        ("TXBYTES", (
+            ("TXFIFO_UNDERFLOW", 0, 1),
+            ("NUM_TXBYTES", 1, 7),
+        )),
+        ("RXBYTES", (
+            ("RXFIFO_OVERFLOW", 0, 1),
+            ("NUM_RXBYTES", 1, 7),
+        )),
+        ("RCCTRL1_STATUS", (
+            ("RCCTRL1_STATUS[6:0]", 1, 7),
+        )),
+        ("RCCTRL0_STATUS", (
+            ("RCCTRL0_STATUS[6:0]", 1, 7),
+        )),
+    )
+
+    fields = SchemaTable()
+
     def __init__(self, *args, **kwargs):
         """
         Instantiation
@@ -115,11 +441,18 @@ class CC1101(CCAddr, CCBase):
 
         keyword-args:
             - osc_freq: (freq in hz for crystal osc. default=26Mhz)
+            - shadow_registers: (bool) cache config registers. default=False
         """
 
         self.osc_freq = 26000000
+        self.receiver = None
+        self._rx_carry = bytearray()
+
+        # last image written by load_image(), restored by wake()
+        self.loaded_image = None
+        self.rx_overflows = 0
 
-        super(CC1101, self).__init__(args, kwargs)
+        super(CC1101, self).__init__(*args, **kwargs)
 
         allowed = ['osc_freq']
         for k, v in kwargs.items():
@@ -146,35 +479,36 @@ class CC1101(CCAddr, CCBase):
     # config/setup
     # ---------------------------------
 
+    @locked
     def base_frequency(self, freq=None):
         """
         Get or set CC1101 base carrier freq.
 
-        args: [optional] Mhz = int(315|433|868|915)
-        returns:
-        """
+        Set values are rounded to the nearest synthesizer step (about
+        397 Hz with a 26 MHz crystal), see pyticc.solvers.
 
-        if freq is not None and freq not in [315, 433, 868, 915]:
-            raise ValueError("Unsupported carrier freq '%d'" % freq)
+        args: [optional] MHz (like 433 or 433.92) or Hz, inside
+              300-348, 387-464 or 779-928 MHz.
+        returns: Hz, including the channel offset
+        """
 
         if freq is None:
             f2 = self.read_byte(self.FREQ2) << 16
             f1 = self.read_byte(self.FREQ1) << 8
             f0 = self.read_byte(self.FREQ0)
             freq = f2 + f1 + f0
-            chan = self.register_value("CHANNR")['CHAN[7:0]']
-            chanspc_m = self.register_value("MDMCFG0")['CHANSPC_M[7:0]']
-            chanspc_e = self.register_value("MDMCFG1")['CHANSPC_E[1:0]']
+            chan = self.read_byte(self.CHANNR)
+            chanspc_m = self.read_byte(self.MDMCFG0)
+            chanspc_e = self._read_field(self.fields.MDMCFG1.CHANSPC_E)
 
             r = (self.osc_freq/math.pow(2, 16)) * (freq + chan * (( 256 + chanspc_m) * math.pow(2,(chanspc_e - 2))))
             return r
 
+        data = self._encode_base_frequency(freq)
         self.sidle()
-        carrier = int(0x10000 * (freq * 1000000)/ self.osc_freq)
-        data = [hex(carrier >> i & 0xff) for i in (16,8,0)]
-        self.write_byte(self.FREQ0, int(data[2], 16))
-        self.write_byte(self.FREQ1, int(data[1], 16))
-        self.write_byte(self.FREQ2, int(data[0], 16))
+        self.write_byte(self.FREQ0, data['FREQ0'])
+        self.write_byte(self.FREQ1, data['FREQ1'])
+        self.write_byte(self.FREQ2, data['FREQ2'])
         return self.base_frequency()
 
     def modulation(self, modulation=None):
@@ -185,22 +519,15 @@ class CC1101(CCAddr, CCBase):
         returns: str
         """
 
-        schemes = {
-            "2-FSK":    "000",
-            "GFSK":     "001",
-            "ASK":      "011",
-            "OOK":      "011",
-            "4-FSK":    "100",
-            "MSK":      "111"
-        }
+        schemes = self.MODULATIONS
 
         if modulation is not None and modulation not in schemes.keys():
             raise ValueError("Unknown modulation type '%s'" % modulation)
 
-        data = self.register_value("MDMCFG2")
         if not modulation:
+            mod_format = self._read_field(self.fields.MDMCFG2.MOD_FORMAT)
             for k, v in schemes.items():
-                if data['MOD_FORMAT[2:0]'] == int(v, 2):
+                if mod_format == int(v, 2):
                     return k
 
             return None
@@ -212,24 +539,21 @@ class CC1101(CCAddr, CCBase):
         """
         Get or set packet length mode.
 
-        args: [optional] str(PKT_LEN_FIXED|PKT_LEN_VARIABLE)
+        args: [optional] str(PKT_LEN_FIXED|PKT_LEN_VARIABLE|PKT_LEN_INFINITE)
         returns: str
 
-        note: PKT_LEN_INFINITE is not currently supported
+        note: send_data() and recv_data() handle fixed and variable length
+        packets; use send_stream() and recv_stream() for PKT_LEN_INFINITE.
         """
 
-        modes = {
-            "PKT_LEN_FIXED": "00",
-            "PKT_LEN_VARIABLE": "01",
-            "PKT_LEN_INFINITE": "10"
-        }
+        modes = self.PACKET_LENGTH_MODES
         if mode is not None and mode not in modes.keys():
             raise ValueError("Unknown packet mode '%s'" % mode)
 
         if not mode:
-            data = self.register_value("PKTCTRL0")
+            length_config = self._read_field(self.fields.PKTCTRL0.LENGTH_CONFIG)
             for k, v in modes.items():
-                if int(v, 2) == data['LENGTH_CONFIG[1:0]']:
+                if int(v, 2) == length_config:
                     return k
 
             return None
@@ -253,66 +577,50 @@ class CC1101(CCAddr, CCBase):
         else:
             self.write_byte('CHANNR', int(channel))
 
+    @locked
     def baud_rate(self, rate=None):
         """
         Get or set CC1101 buad rate.
 
+        Set values are rounded to the nearest achievable rate.
+
         args: int(baud value)
         returns: int
         """
 
         # read existing data rate value
         if rate is None:
-            drate_e = self.register_value("MDMCFG4")['DRATE_E[3:0]']
-            drate_m = self.register_value("MDMCFG3")['DRATE_M[7:0]']
-            return int(((256 + drate_m) * math.pow(2,drate_e) / math.pow(2,28)) * self.osc_freq)
+            drate_e = self._read_field(self.fields.MDMCFG4.DRATE_E)
+            drate_m = self.read_byte(self.MDMCFG3)
+            return int(tables(self.osc_freq)['DRATE'].value(drate_e, drate_m))
 
         # calculate and set new data rate value
-        drate_e = int( math.log(rate * math.pow(2, 20) / self.osc_freq, 2) )
-        drate_m = int( (rate * math.pow(2, 28) / ( self.osc_freq * math.pow(2, drate_e))) ) - 256
-
-        if drate_m == 256:
-            drate_m = 0
-            drate_e += 1
-
-        self.register_write('MDMCFG4', 'DRATE_E[3:0]', drate_e)
-        self.register_write('MDMCFG3', 'DRATE_M[7:0]', drate_m)
+        data = self._encode_baud_rate(rate)
+        self.register_write('MDMCFG4', 'DRATE_E[3:0]', data['MDMCFG4']['DRATE_E[3:0]'])
+        self.register_write('MDMCFG3', 'DRATE_M[7:0]', data['MDMCFG3']['DRATE_M[7:0]'])
         return self.baud_rate()
 
+    @locked
     def rx_bandwidth(self, value=None):
         """
         Get or set receive filter bandwidth.
 
-        args: [optional] (int) [58000|100000|232000|325000|540000|812000] Hz
+        Set values are rounded to the nearest of the 16 filter settings
+        (58 kHz thru 812 kHz with a 26 MHz crystal).
+
+        args: [optional] (int) Hz
         returns: int
         """
 
-        def write_this_bw(bw_e, bw_m):
-            self.register_write('MDMCFG4', 'CHANBW_M[1:0]', bw_m)
-            self.register_write('MDMCFG4', 'CHANBW_E[1:0]', bw_e)
-
-        if value is not None and value not in [58000,100000,232000,325000,540000,812000]:
-            raise ValueError("Invalid receive bandwidth setting.")
-
         if value is None:
-            mdmcfg4 = self.register_value('MDMCFG4')
-            bwm = mdmcfg4['CHANBW_M[1:0]']
-            bwe = mdmcfg4['CHANBW_E[1:0]']
-            return int(self.osc_freq / 8 * (4 + bwm) * math.pow(2, bwe))
-
-        if value == 58000:
-            write_this_bw(0x03,0x03)
-        elif value == 100000:
-            write_this_bw(0x03,0x00)
-        elif value == 232000:
-            write_this_bw(0x01,0x03)
-        elif value == 325000:
-            write_this_bw(0x01,0x01)
-        elif value == 540000:
-            write_this_bw(0x00,0x02)
-        elif value == 812000:
-            write_this_bw(0x00,0x00)
-
+            mdmcfg4 = self.read_byte(self.MDMCFG4)
+            bwm = self.fields.MDMCFG4.CHANBW_M.decode(mdmcfg4)
+            bwe = self.fields.MDMCFG4.CHANBW_E.decode(mdmcfg4)
+            return int(tables(self.osc_freq)['CHANBW'].value(bwe, bwm))
+
+        data = self._encode_rx_bandwidth(value)['MDMCFG4']
+        self.register_write('MDMCFG4', 'CHANBW_M[1:0]', data['CHANBW_M[1:0]'])
+        self.register_write('MDMCFG4', 'CHANBW_E[1:0]', data['CHANBW_E[1:0]'])
         return self.rx_bandwidth()
 
     def manchester(self, value=None):
@@ -324,7 +632,7 @@ class CC1101(CCAddr, CCBase):
         """
 
         if value is None:
-            return self.register_value("MDMCFG2")['MANCHESTER_EN']
+            return self._read_field(self.fields.MDMCFG2.MANCHESTER_EN)
 
         self.register_write('MDMCFG2', 'MANCHESTER_EN', value)
         return self.manchester()
@@ -338,25 +646,57 @@ class CC1101(CCAddr, CCBase):
         """
 
         if value is None:
-            return self.register_value('PKTCTRL0')['WHITE_DATA']
+            return self._read_field(self.fields.PKTCTRL0.WHITE_DATA)
 
         self.register_write('PKTCTRL0', 'WHITE_DATA', value)
         return self.whitening()
 
-    def channel_spacing(self):
+    @locked
+    def channel_spacing(self, value=None):
         """
-        Get channel spacing.
-        TODO: Add option to SET channel spacing.
+        Get or set channel spacing.
 
-        args: none
-        returns: int
+        Set values are rounded to the nearest achievable spacing.
+
+        args: [optional] (int) Hz
+        returns: float Hz
         """
-        chan = self.register_value("CHANNR")['CHAN']
+
         if value is None:
-            chanspc_m = self.register_value("MDMCFG0")['CHANSPC_M[7:0]']
-            chanspc_e = self.register_value("MDMCFG1")['CHANSPC_E[1:0]']
-            return (self.osc_freq/math.pow(2,18)) * (256 + chanspc_m) * (math.pow(2, chanspc_e))
+            chanspc_m = self.read_byte(self.MDMCFG0)
+            chanspc_e = self._read_field(self.fields.MDMCFG1.CHANSPC_E)
+            return tables(self.osc_freq)['CHANSPC'].value(chanspc_e, chanspc_m)
 
+        data = self._encode_channel_spacing(value)
+        self.register_write('MDMCFG1', 'CHANSPC_E[1:0]', data['MDMCFG1']['CHANSPC_E[1:0]'])
+        self.write_byte(self.MDMCFG0, data['MDMCFG0'])
+        return self.channel_spacing()
+
+    @locked
+    def deviation(self, value=None):
+        """
+        Get or set the FSK frequency deviation.
+
+        Set values are rounded to the nearest achievable deviation.
+
+        args: [optional] (int) Hz
+        returns: float Hz
+        """
+
+        if value is None:
+            deviatn = self.read_byte(self.DEVIATN)
+            dev_e = self.fields.DEVIATN.DEVIATION_E.decode(deviatn)
+            dev_m = self.fields.DEVIATN.DEVIATION_M.decode(deviatn)
+            return tables(self.osc_freq)['DEVIATN'].value(dev_e, dev_m)
+
+        data = self._encode_deviation(value)['DEVIATN']
+        byte = self.read_byte(self.DEVIATN)
+        byte = self.fields.DEVIATN.DEVIATION_E.encode(byte, data['DEVIATION_E[2:0]'])
+        byte = self.fields.DEVIATN.DEVIATION_M.encode(byte, data['DEVIATION_M[2:0]'])
+        self.write_byte(self.DEVIATN, byte)
+        return self.deviation()
+
+    @locked
     def sync_word(self, value=None):
         """
         Get or set packet sync word
@@ -370,20 +710,9 @@ class CC1101(CCAddr, CCBase):
             s0 = "{:x}".format(self.read_byte('SYNC0')).zfill(2).upper()
             return s1 + s0
 
-        if type(value) is str:
-            if len(list(value)) != 4:
-                raise ValueError("Must be 4 letter sync word like 'FAFA'.")
-
-            s1 = int("".join(list(value)[:2]), 16)
-            s0 = int("".join(list(value)[2:]), 16)
-        elif type(value) is int:
-            s0 = value & 0xFF
-            s1 = value >> 8
-        else:
-            raise ValueError("Unexpected sync word type.")
-
-        self.register_write('SYNC1', 'SYNC[15:8]', s1)
-        self.register_write('SYNC0', 'SYNC[7:0]', s0)
+        data = self._encode_sync_word(value)
+        self.register_write('SYNC1', 'SYNC[15:8]', data['SYNC1'])
+        self.register_write('SYNC0', 'SYNC[7:0]', data['SYNC0'])
         return self.sync_word()
 
     def rssi_offset(self):
@@ -404,13 +733,7 @@ class CC1101(CCAddr, CCBase):
         returns: int
         """
 
-        value = self.read_byte(self.RSSI)
-        if value >= 128:
-            dbm = ((value - 256) /2) - self.rssi_offset()
-        else:
-            dbm = (value / 2) - self.rssi_offset()
-
-        return dbm
+        return self._rssi_dbm(self.read_byte(self.RSSI))
 
 
     # config register convenience methods
@@ -419,15 +742,15 @@ class CC1101(CCAddr, CCBase):
         """
         Get named register values.
 
-        args: register name
+        args: register name or address
         returns:
-            dict, if a register mapping-specification is found.
-            Otherwise byte value.
+            dict of {field name: value}
         """
 
-        byte = self.read_byte(name)
-        return self._register_value_from_byte(name, byte)
+        register = self.fields[name]
+        return register.decode(self.read_byte(register.address))
 
+    @locked
     def register_write(self, name, attr_name, value):
         """
         Update specific attribute in a register.
@@ -436,7 +759,7 @@ class CC1101(CCAddr, CCBase):
 
         args:
             - register name (str)
-            - attribute name (str)
+            - attribute name (str), with or without the bit range
             - value (str or int)
                 for boolean values, an int of 1 or zero is fine.
                 For multi-bit fields it can be easier to enter the bit string.
@@ -446,46 +769,519 @@ class CC1101(CCAddr, CCBase):
             register_write('MDMCFG2', 'MOD_FORMAT', '011')
         """
 
-        byte = self.read_byte(name)
-        spec = self._register_schema(name)[attr_name]
-        if not spec:
-            raise ValueError("Register specification for '%s' not found" % name)
+        register = self.fields[name]
+        field = register.get(attr_name)
+        if field is None:
+            raise ValueError("Register specification for '%s' not found" % attr_name)
+
+        byte = self.read_byte(register.address)
+        self.write_byte(register.address, field.encode(byte, value))
+
+    # whole-config apply
+    # ---------------------------------
+    def register_image(self):
+        """
+        Get the current values of all config registers.
+
+        Uses the register shadow when it is complete, otherwise a single
+        burst read of the config space.
+
+        args: none
+        returns: bytearray (CONFIG_SIZE bytes, indexed by address)
+        """
+
+        if self.shadow is not None and self.shadow.complete():
+            return bytearray(self.shadow.image())
+
+        return bytearray(self.read_burst(0x00, self.CONFIG_SIZE))
+
+    def config_image(self, config, base):
+        """
+        Compute a config register image without touching the chip.
+
+        args:
+            - config (dict): keys are register names or high-level setting
+              names (see SETTINGS). Register values are either a whole
+              byte, or a dict of {field name: value}. Settings take the
+              same values as their get/set methods.
+
+                {
+                    'modulation': 'OOK',
+                    'baud_rate': 4800,
+                    'FREND1': 0xB6,
+                    'AGCCTRL2': {'MAX_LNA_GAIN[2:0]': '000'}
+                }
+
+            - base: image to start from (CONFIG_SIZE bytes)
+        returns: bytearray
+        """
+
+        image = bytearray(base)
+        for key, value in config.items():
+            if key in self.SETTINGS:
+                registers = getattr(self, '_encode_' + key)(value)
+            else:
+                registers = {key: value}
+
+            for name, data in registers.items():
+                register = self.fields[name]
+                addr = register.address
+                if addr >= self.CONFIG_SIZE:
+                    raise ValueError("'%s' is not a config register" % name)
+
+                if isinstance(data, dict):
+                    for field_name, field_value in data.items():
+                        field = register.get(field_name)
+                        if field is None:
+                            raise ValueError("Register specification for '%s' not found" % field_name)
+                        image[addr] = field.encode(image[addr], field_value)
+                else:
+                    image[addr] = data
+
+        return image
+
+    @locked
+    def apply_config(self, config, gap=2, idle=True):
+        """
+        Apply a whole configuration, writing only the registers that change.
+
+        The target image is compared with the current one (see
+        register_image), and each run of changed registers goes out in one
+        burst write.
+
+        args:
+            - config (dict): see config_image()
+            - [optional] gap (int): unchanged registers allowed inside one
+              run, since rewriting a couple of bytes is cheaper than
+              another transaction. default=2
+            - [optional] idle (bool): strobe SIDLE before writing.
+        returns:
+            list of (address, bytes) runs that were written.
+        """
+
+        current = self.register_image()
+        target = self.config_image(config, current)
+        runs = self._changed_runs(current, target, gap)
+
+        if runs and idle:
+            self.sidle()
+
+        for addr, data in runs:
+            self.write_burst(addr, data)
+
+        return runs
+
+    # profiles
+    # ---------------------------------
+    def load_profile(self, profile, cache=None, idle=True):
+        """
+        Load a named radio profile, see pyticc.profiles.
+
+        The profile is compiled to a full register image (or taken from
+        the cache) and written in one burst, with the PATABLE after it.
 
-        new_value = self._update_val_in_byte(byte, spec, value)
-        self.write_byte(name, new_value)
+        args:
+            - profile: name from pyticc.profiles.PROFILES, Profile or
+              RegisterImage
+            - [optional] cache: pyticc.profiles.ProfileCache
+            - [optional] idle (bool): strobe SIDLE before writing.
+        returns: RegisterImage that was loaded
+        """
+
+        if cache is not None:
+            compiled = cache.get(profile, self)
+        else:
+            compiled = get_profile(profile)
+            if not isinstance(compiled, RegisterImage):
+                compiled = compiled.compile(self)
+
+        self.load_image(compiled.image, compiled.patable, idle)
+        return compiled
+
+    @locked
+    def load_image(self, image, patable=None, idle=True):
+        """
+        Write every config register with one burst.
+
+        args:
+            - image: CONFIG_SIZE bytes, indexed by address (see
+              register_image and config_image)
+            - [optional] patable: up to PATABLE_SIZE bytes
+            - [optional] idle (bool): strobe SIDLE before writing.
+        returns: none
+        """
+
+        if len(image) != self.CONFIG_SIZE:
+            raise ValueError("Register image must be %d bytes" % self.CONFIG_SIZE)
+
+        if idle:
+            self.sidle()
+
+        self.write_burst(0x00, image)
+        if patable is not None:
+            self.write_burst(self.PATABLE, patable)
+
+        self.loaded_image = RegisterImage(None, bytes(image),
+                                          None if patable is None else bytes(patable))
+
+    @locked
+    def wake(self):
+        """
+        Wake from power_down() and restore what SLEEP lost.
+
+        The TEST, FSTEST, PTEST and AGCTEST registers and the PATABLE of
+        the last load_image() are written back; the rest of the config
+        survives SLEEP.
+
+        args: none
+        returns: none
+        """
+
+        if self.loaded_image is None:
+            raise ValueError("No register image loaded")
+
+        # CSn going low wakes the chip, sidle waits for CHIP_RDYn
+        self.sidle()
+
+        first = min(self.SLEEP_LOST)
+        last = max(self.SLEEP_LOST)
+        self.write_burst(first, self.loaded_image.image[first:last + 1])
+        if self.loaded_image.patable is not None:
+            self.write_burst(self.PATABLE, self.loaded_image.patable)
+
+    # wake-on-radio
+    # ---------------------------------
+    def wor_config(self, plan):
+        """
+        Registers for a Wake-on-Radio setting, as an apply_config() dict.
+
+        args: plan (pyticc.wor.WorPlan)
+        returns: dict
+        """
+
+        return {
+            'WOREVT1': plan.event0 >> 8,
+            'WOREVT0': plan.event0 & 0xFF,
+            'WORCTRL': {'RC_PD': 0, 'EVENT1[2:0]': plan.event1,
+                        'RC_CAL': 1, 'WOR_RES': plan.wor_res},
+            'MCSM2': {'RX_TIME[2:0]': plan.rx_time},
+            # back to IDLE after a packet, until the host strobes SWOR again
+            'MCSM1': {'RXOFF_MODE[1:0]': 0},
+        }
+
+    @locked
+    def start_wor(self, latency=None, duty_cycle=None, rx_window=None,
+                  event1=7, currents=None):
+        """
+        Start duty-cycled receive (Wake-on-Radio).
+
+        The chip sleeps, wakes every period to listen for a sync word, and
+        goes back to sleep if none comes within the RX timeout. The
+        settings are picked by pyticc.wor.plan_wor(). While WOR is on,
+        enable_rx() strobes SWOR instead of SRX, so recv_data(),
+        recv_packets() and the background receiver go back to polling
+        after every packet.
+
+        Every SPI access wakes the chip, so receive with recv_wait(),
+        rx_events() or start_receiver(edge=) on a GDO line (e.g.
+        configure_gdo(0, 'RX_FIFO_THR_OR_END')) to keep the power savings.
+
+            plan = cc.start_wor(latency=0.5, rx_window=0.004)
+            print(plan.current)             # estimated average amps
+            packet = cc.recv_wait(edge)
+
+        args:
+            - [optional] latency (float): worst-case seconds until a
+              transmission is heard. default=about 1 s
+            - [optional] duty_cycle (float): share of time in RX, 0 thru 1
+            - [optional] rx_window (float): seconds of RX per wake-up.
+              default=64 bits at the current baud rate, when duty_cycle
+              is not given either.
+            - [optional] event1 (int): WORCTRL.EVENT1. default=7
+            - [optional] currents (dict): see pyticc.wor.CURRENTS
+        returns: pyticc.wor.WorPlan
+        """
+
+        if duty_cycle is None and rx_window is None:
+            rx_window = 64.0 / self.baud_rate()
+
+        autocal = self.register_value('MCSM0')['FS_AUTOCAL[1:0]'] == 1
+        plan = plan_wor(latency, duty_cycle, rx_window, event1, self.osc_freq,
+                        autocal, currents)
+
+        self.apply_config(self.wor_config(plan))
+        self.sidle()
+        self.wor = plan
+        self.enable_rx()
+        return plan
+
+    @locked
+    def stop_wor(self):
+        """Stop Wake-on-Radio and leave the chip in IDLE."""
+
+        self.wor = None
+        self.sidle()
 
     # read/write data
     # ---------------------------------
+    @locked
     def recv_data(self):
-        """Receive FIFO data"""
+        """
+        Receive FIFO data
+
+        The payload and its appended status bytes come out in one burst,
+        so RSSI, LQI and CRC_OK are the ones measured for this packet.
+
+        returns: Packet, or None if the FIFO is empty or the length byte
+                 was bad (the FIFO is then flushed).
+        """
 
         self.enable_rx()
-        rx_bytes_val = self.read_byte(self.RXBYTES)
+        return self._read_packet(self.status)
+
+    def start_receiver(self, capacity=64, policy='drop-oldest', edge=None,
+                       poll_interval=0.001):
+        """
+        Run the RX loop on a background thread.
+
+        Packets, with timestamp, RSSI and LQI, go into a bounded ring
+        buffer that consumers read at their own pace.
+
+        args:
+            - [optional] capacity (int): ring slots. default=64
+            - [optional] policy (str): drop-oldest|drop-newest|block
+            - [optional] edge: pyticc.gpio.EdgeSource to wait on GDO edges.
+            - [optional] poll_interval: seconds between FIFO polls.
+        returns: pyticc.receiver.Receiver
+
+            rx = cc.start_receiver(capacity=256)
+            for packet in rx:
+                print(packet.timestamp, packet.rssi, packet.data)
+        """
+
+        if self.receiver is not None and self.receiver.running():
+            raise RuntimeError("Receiver already running")
+
+        self.receiver = Receiver(self, capacity, policy, edge, poll_interval)
+        return self.receiver.start()
+
+    def stop_receiver(self, timeout=None):
+        """Stop the background receiver thread, if running."""
 
-        #if rx_bytes_val has something and Underflow bit is not 1
-        if (rx_bytes_val & 0x7F and not (rx_bytes_val & 0x80)):
-            pkt_len = self.packet_length()
+        if self.receiver is not None:
+            self.receiver.stop(timeout)
 
-            if pkt_len == "PKT_LEN_FIXED":
-                data_len = self.read_byte(self.PKTLEN)
+    @locked
+    def configure_gdo(self, gdo, signal, invert=0):
+        """
+        Route a chip signal to a GDO pin.
+
+        args:
+            - gdo (int): 0|1|2
+            - signal (str|int): name from GDO_SIGNALS, or raw GDOx_CFG value.
+            - [optional] invert (int-boolean): active low output.
+        returns: none
+        """
+
+        if gdo not in (0, 1, 2):
+            raise ValueError("Unknown GDO pin '%s'" % gdo)
+
+        if type(signal) is str:
+            if signal not in self.GDO_SIGNALS:
+                raise ValueError("Unknown GDO signal '%s'" % signal)
+            signal = self.GDO_SIGNALS[signal]
+
+        register = self.fields['IOCFG%d' % gdo]
+        byte = self.read_byte(register.address)
+        byte = register['GDO%d_CFG' % gdo].encode(byte, signal)
+        byte = register['GDO%d_INV' % gdo].encode(byte, invert)
+        self.write_byte(register.address, byte)
+
+    def recv_wait(self, edge, timeout=None):
+        """
+        Receive a packet, sleeping until the chip signals one.
 
-            elif pkt_len == "PKT_LEN_VARIABLE":
-                max_len = self.read_byte(self.PKTLEN)
+        The GDO pin wired to "edge" should be set up with configure_gdo(),
+        e.g. configure_gdo(0, 'RX_FIFO_THR_OR_END'). No SPI traffic happens
+        while waiting.
+
+        args:
+            - edge: pyticc.gpio.EdgeSource for the GDO line.
+            - [optional] timeout in seconds. None waits forever.
+        returns:
+            same as recv_data(), or None on timeout.
+        """
+
+        self.enable_rx()
+        if not edge.wait(timeout):
+            return None
+
+        return self._read_packet()
+
+    def rx_events(self, edge, timeout=None):
+        """
+        Generator of received packets, driven by GDO edges.
+
+        args:
+            - edge: pyticc.gpio.EdgeSource for the GDO line.
+            - [optional] timeout in seconds. Iteration stops when no edge
+              arrives within timeout. None runs forever.
+        yields: Packet (see recv_data)
+        """
+
+        self.enable_rx()
+        while edge.wait(timeout):
+            data = self._read_packet()
+            self.enable_rx()
+            if data is not None:
+                yield data
+
+    @locked
+    def _read_packet(self, status=None):
+        """
+        Read one packet from the RX FIFO, if there is one.
+
+        args: [optional] status: ChipStatus from a read header transfer
+              that just happened. Default fetches one with SNOP.
+        """
+
+        if status is None:
+            status = self.read_status()
+
+        #if the FIFO has something and has not overflowed
+        if (status.fifo_bytes and status.state != 'RXFIFO_OVERFLOW'):
+            pktlen, pktctrl1, pktctrl0 = self._packet_format()
+            length_config = self.fields.PKTCTRL0.LENGTH_CONFIG.decode(pktctrl0)
+
+            if length_config == 0:
+                data_len = pktlen
+
+            elif length_config == 1:
                 data_len = self.read_byte(self.RXFIFO)
 
-                if data_len > max_len:
-                    return False
+                if data_len > pktlen:
+                    # bad length byte, the rest of the FIFO cannot be framed
+                    self.sidle()
+                    self.flush_rx_fifo()
+                    return None
 
-            elif pkt_len == "PKT_LEN_INFINITE":
-                # ToDo
-                raise Exception("MODE NOT IMPLEMENTED")
+            else:
+                raise ValueError("Use recv_stream() for PKT_LEN_INFINITE")
 
-            data = self.read_burst(self.RXFIFO, data_len)
+            # payload and appended status bytes in one burst
+            status_len = self._status_length(pktctrl1)
+            buffer = self.read_burst(self.RXFIFO, data_len + status_len)
+            packet = self._decode_packet(buffer, 0, data_len, status_len, pktctrl1,
+                                         time.monotonic())
             self.flush_rx_fifo()
             self.sidle()
 
-            return data
+            return packet
+
+    @locked
+    def recv_packets(self):
+        """
+        Receive every packet waiting in the RX FIFO.
+
+        RXBYTES is read once and everything available comes out in one
+        burst, which is split into packets using the length byte (variable
+        length mode) or PKTLEN (fixed length), plus the appended status
+        bytes. A packet that is still arriving is kept back and completed
+        on the next call. The FIFO is only flushed after an overflow.
+
+        While the chip is in RX the last FIFO byte is left in place unless
+        it ends a packet (CC1101 errata, reading the FIFO empty mid-packet
+        can duplicate the last byte).
+
+        args: none
+        returns: list of Packet (rssi/lqi are set when APPEND_STATUS is on)
+        """
+
+        self.enable_rx()
+        status = self.status
+        if not status.fifo_bytes and status.state != 'RXFIFO_OVERFLOW':
+            # nothing new, the SRX status byte already told us
+            return []
+
+        rx_bytes_val = self.read_byte(self.RXBYTES)
+        available = rx_bytes_val & 0x7F
+        count = available
+        if available and self.status.state == 'RX':
+            # errata: never read the RX FIFO empty while a packet is
+            # arriving, the last byte can come out twice
+            count -= 1
+        if count:
+            self._rx_carry += self.read_burst(self.RXFIFO, count)
+
+        packets = []
+        if self._rx_carry:
+            packet_format = self._packet_format()
+            timestamp = time.monotonic()
+            packets, missing = self._split_packets(timestamp, packet_format)
+            if missing == 1 and count < available:
+                # the byte kept back ends a packet, it is safe to read
+                self._rx_carry += self.read_burst(self.RXFIFO, 1)
+                packets += self._split_packets(timestamp, packet_format)[0]
+
+        if rx_bytes_val & 0x80:
+            self.rx_overflows += 1
+            self.sidle()
+            self.flush_rx_fifo()
+            del self._rx_carry[:]
+
+        return packets
+
+    def recv_stream(self, length, timeout=None):
+        """
+        Receive a packet of any length, then yield it in FIFO chunks.
+
+        This is a buffered read: the RX FIFO is drained in FIFOTHR sized
+        chunks while the packet arrives, as one atomic section, and the
+        chunks are yielded once the whole packet is in. The packet is held
+        in memory and the caller gets nothing before it ends; for large
+        payloads use recv_into() with a preallocated buffer. The radio
+        lock is not held while the caller runs.
+
+        Packets over 255 bytes use infinite length mode, switching to fixed
+        length for the last segment as the datasheet describes (PKTLEN =
+        length % 256). PKTLEN and PKTCTRL0 are restored afterwards.
+
+        With APPEND_STATUS enabled the two status bytes are the last two
+        bytes of the stream, on top of "length".
+
+        args:
+            - length (int): payload length in bytes.
+            - [optional] timeout in seconds to wait for more data.
+        yields: bytes
+        raises: RXOverflow, TimeoutError
+        """
+
+        for chunk in self._recv_chunks(length, timeout):
+            yield chunk
+
+    @locked
+    def recv_into(self, buffer, timeout=None):
+        """
+        Receive a packet straight into a buffer.
+
+        The buffer is sized for the whole packet: payload plus, with
+        APPEND_STATUS, the two status bytes. See recv_stream().
 
+        args:
+            - writable bytearray or memoryview
+            - [optional] timeout in seconds to wait for more data.
+        returns: number of bytes received
+        """
+
+        view = memoryview(buffer)
+        pos = 0
+        for count in self._rx_stream(len(view) - self._status_length(), timeout):
+            self.read_burst_into(self.RXFIFO, view[pos:pos + count])
+            pos += count
+
+        return pos
+
+    @locked
     def send_data(self, bytes):
         """
         Send data to TX FIFO.
@@ -493,22 +1289,163 @@ class CC1101(CCAddr, CCBase):
         args:
           - list of bytes
         returns:
-            none
+            True if the packet went out, False on TX FIFO underflow or
+            when CCA kept the chip from transmitting.
+        """
+
+        return self._run_steps(self._send_steps(bytes))
+
+    @locked
+    def send_stream(self, source, length=None, timeout=1.0, edge=None):
+        """
+        Transmit a payload of any length, refilling the TX FIFO as it drains.
+
+        The FIFO is prefilled, then topped up with one burst write each time
+        it falls to the TX threshold (FIFOTHR). Payloads over 255 bytes use
+        infinite length mode, switching to fixed length when fewer than
+        256 bytes are left to send (PKTLEN = length % 256). PKTLEN and
+        PKTCTRL0 are restored afterwards. No length or address byte is added.
+
+        args:
+            - source: bytes-like, file-like object (has read()), or an
+              iterable of ints or of byte chunks.
+            - [optional] length (int): bytes to send. Required for file-like
+              objects and iterables, unless they should be read to the end
+              up front.
+            - [optional] timeout in seconds without FIFO progress.
+            - [optional] edge: pyticc.gpio.EdgeSource on a GDO pin set up
+              with configure_gdo(x, 'TX_FIFO_THR'), signalled when the FIFO
+              drains below the threshold. Default polls TXBYTES.
+        returns: number of bytes sent
+        raises: TXUnderflow, TimeoutError
+        """
+
+        read, size = _byte_reader(source)
+        if length is None:
+            length = size
+        if length is None:
+            data = read(None)
+            read, length = _byte_reader(data)
+
+        if length == 0:
+            raise ValueError("Must include payload")
+
+        threshold = 61 - 4 * self._read_field(self.fields.FIFOTHR.FIFO_THR)
+        mode = self.fields.PKTCTRL0.LENGTH_CONFIG
+        pktlen = self.read_byte(self.PKTLEN)
+        pktctrl0 = self.read_byte(self.PKTCTRL0)
+        fixed = mode.encode(pktctrl0, 0)
+        is_fixed = length < 256
+
+        self.sidle()
+        self.flush_tx_fifo()
+        self.write_byte(self.PKTLEN, length % 256)
+        self.write_byte(self.PKTCTRL0, fixed if is_fixed else mode.encode(pktctrl0, 2))
+
+        remaining = length
+        in_fifo = 0
+        completed = False
+
+        try:
+            chunk = read(min(self.FIFO_SIZE, remaining))
+            self.write_burst(self.TXFIFO, chunk)
+            remaining -= len(chunk)
+            in_fifo = len(chunk)
+            self.enable_tx()
+
+            deadline = time.monotonic() + timeout
+            while remaining:
+                tx_bytes_val = self.read_byte(self.TXBYTES)
+                if tx_bytes_val & 0x80:
+                    raise TXUnderflow("TX FIFO underflow, %d bytes unsent" % remaining)
+
+                in_fifo = tx_bytes_val & 0x7F
+                if not is_fixed and remaining + in_fifo < 256:
+                    self.write_byte(self.PKTCTRL0, fixed)
+                    is_fixed = True
+
+                if in_fifo <= threshold:
+                    chunk = read(min(self.FIFO_SIZE - in_fifo, remaining))
+                    if not chunk:
+                        raise ValueError("Source ended %d bytes early" % remaining)
+                    self.write_burst(self.TXFIFO, chunk)
+                    remaining -= len(chunk)
+                    deadline = time.monotonic() + timeout
+                    continue
+
+                if time.monotonic() > deadline:
+                    raise TimeoutError("TX FIFO stalled, %d bytes unsent" % remaining)
+
+                if edge is not None:
+                    edge.wait(min(timeout, 0.01))
+                else:
+                    self.cmd_delay(100)
+
+            # wait for the tail to go out
+            while True:
+                tx_bytes_val = self.read_byte(self.TXBYTES)
+                if tx_bytes_val & 0x80:
+                    raise TXUnderflow("TX FIFO underflow at end of packet")
+                if not tx_bytes_val & 0x7F and self.marcstate() not in [0x13, 0x14, 0x15]:
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError("TX did not complete")
+                self.cmd_delay(100)
+
+            completed = True
+        finally:
+            if not completed:
+                self.sidle()
+                self.flush_tx_fifo()
+            self.write_byte(self.PKTLEN, pktlen)
+            self.write_byte(self.PKTCTRL0, pktctrl0)
+
+        return length
+
+    # PRIVATE class methods
+    # ---------------------------------
+    def _send_steps(self, bytes):
+        """
+        send_data() as a step generator.
+
+        Yields the delay (in microseconds) to wait before the next chip
+        poll, and returns the send result. See CCBase._run_steps.
         """
-        self.enable_tx()
-        marcstate = self.marcstate()
-        payload = []
 
         if len(bytes) == 0:
             raise ValueError("Must include payload")
 
-        while ((marcstate & 0x1F) != 0x0D):
-            if marcstate == 0x11:
-                self.flush_rx_fifo()
+        payload = self._tx_payload(bytes)
+        self.write_burst(self.TXFIFO, payload)
+        self.enable_tx()
 
-            marcstate = self.marcstate()
+        if self._read_field(self.fields.MCSM1.TXOFF_MODE) != 2:
+            # the chip leaves TX once the packet is out
+            status = self.read_status(rx=False)
+            while status.state in ('TX', 'CALIBRATE', 'SETTLING'):
+                yield 100
+                status = self.read_status(rx=False)
+        else:
+            remaining = self.read_byte(self.TXBYTES) & 0x7F
+            while remaining != 0:
+                yield 100
+                remaining =  self.read_byte(self.TXBYTES) & 0x7F
+
+        tx_bytes_val = self.read_byte(self.TXBYTES)
+        if tx_bytes_val & 0x80 or tx_bytes_val & 0x7F:
+            # underflow, or CCA kept the chip in RX
+            yield from self._sidle_steps()
+            self.flush_tx_fifo()
+            self.enable_rx()
+
+            return False
 
+        return True
 
+    def _tx_payload(self, bytes):
+        """Frame payload bytes for the current packet length mode."""
+
+        payload = []
         sending_mode = self.packet_length()
         data_len = len(bytes)
 
@@ -516,7 +1453,7 @@ class CC1101(CCAddr, CCBase):
             if data_len > self.read_byte(self.PKTLEN):
                 raise ValueError("Payload too big.")
 
-            if self.register_value("PKTCTRL1")['APPEND_STATUS']:
+            if self._read_field(self.fields.PKTCTRL1.APPEND_STATUS):
                 payload.append(self.read_byte(self.ADDR))
 
             payload.extend(bytes)
@@ -525,322 +1462,338 @@ class CC1101(CCAddr, CCBase):
         elif sending_mode == "PKT_LEN_VARIABLE":
             payload.append(data_len)
 
-            if self.register_value("PKTCTRL1")['APPEND_STATUS']:
+            if self._read_field(self.fields.PKTCTRL1.APPEND_STATUS):
                 payload.append(self.read_byte(self.ADDR))
                 payload[0] += 1
 
             payload.extend(bytes)
 
         elif sending_mode == "PKT_LEN_INFINITE":
-            # ToDo
-            raise Exception("MODE NOT IMPLEMENTED")
+            raise ValueError("Use send_stream() for PKT_LEN_INFINITE")
 
-        self.write_burst(self.TXFIFO, payload)
-        self.cmd_delay(2000)
-        self.enable_tx()
-        marcstate = self.marcstate()
+        return payload
 
-        if marcstate not in [0x13, 0x14, 0x15]:  # RX, RX_END, RX_RST
-            self.sidle()
-            self.flush_tx_fifo()
-            self.enable_rx()
+    @locked
+    def _recv_chunks(self, length, timeout):
+        """Run a streaming receive, returning the chunks as a list."""
 
-            return False
+        return [self.read_burst(self.RXFIFO, count)
+                for count in self._rx_stream(length, timeout)]
 
-        remaining = self.read_byte(self.TXBYTES) & 0x7F
-        while remaining != 0:
-            self.cmd_delay(100)
-            remaining =  self.read_byte(self.TXBYTES) & 0x7F
+    def _rx_stream(self, length, timeout):
+        """
+        Drive a streaming receive.
 
-        if (self.read_byte(self.TXBYTES) & 0x07) == 0:
-            return True
-        else:
-            return False
+        Yields how many bytes can be read from the RX FIFO right now;
+        the caller reads them before resuming the generator.
+        """
 
+        total = length + self._status_length()
+        chunk = 4 * (self._read_field(self.fields.FIFOTHR.FIFO_THR) + 1)
+        mode = self.fields.PKTCTRL0.LENGTH_CONFIG
+        pktlen = self.read_byte(self.PKTLEN)
+        pktctrl0 = self.read_byte(self.PKTCTRL0)
+        fixed = mode.encode(pktctrl0, 0)
+        is_fixed = length < 256
 
-    # PRIVATE class methods
-    # ---------------------------------
-    def _register_value_from_byte(self, name, byte):
+        self.write_byte(self.PKTLEN, length % 256)
+        self.write_byte(self.PKTCTRL0, fixed if is_fixed else mode.encode(pktctrl0, 2))
+
+        remaining = total
+        deadline = None if timeout is None else time.monotonic() + timeout
+        completed = False
+        self.enable_rx()
+
+        try:
+            while remaining:
+                rx_bytes_val = self.read_byte(self.RXBYTES)
+                if rx_bytes_val & 0x80:
+                    raise RXOverflow("RX FIFO overflow, %d bytes short" % remaining)
+
+                available = rx_bytes_val & 0x7F
+                if not is_fixed and remaining - available < 256:
+                    self.write_byte(self.PKTCTRL0, fixed)
+                    is_fixed = True
+
+                if available >= chunk or available >= remaining:
+                    count = min(available, remaining)
+                    if count < remaining:
+                        # never empty the FIFO while the packet is arriving
+                        count -= 1
+                    if count > 0:
+                        yield count
+                        remaining -= count
+                        if deadline is not None:
+                            deadline = time.monotonic() + timeout
+                        continue
+
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("Stream stalled, %d bytes short" % remaining)
+
+                self.cmd_delay(100)
+
+            completed = True
+        finally:
+            if not completed:
+                self.sidle()
+                self.flush_rx_fifo()
+            self.write_byte(self.PKTLEN, pktlen)
+            self.write_byte(self.PKTCTRL0, pktctrl0)
+
+    def _split_packets(self, timestamp, packet_format):
+        """
+        Split complete packets off the front of the RX carry buffer.
+
+        args:
+            - timestamp (float)
+            - packet_format: (PKTLEN, PKTCTRL1, PKTCTRL0)
+        returns: (list of Packet, bytes still missing from the packet at
+                 the front of the buffer, or None if none was started)
         """
-        Extract config register attributes/values from a byte
+
+        pktlen, pktctrl1, pktctrl0 = packet_format
+        variable = self.fields.PKTCTRL0.LENGTH_CONFIG.decode(pktctrl0) == 1
+        status_len = self._status_length(pktctrl1)
+
+        buffer = self._rx_carry
+        if not variable and pktlen + status_len == 0:
+            # zero length frames cannot be split, drop what was read
+            del buffer[:]
+            return [], None
+
+        packets = []
+        missing = None
+        pos = 0
+        while pos < len(buffer):
+            if variable:
+                data_len = buffer[pos]
+                if data_len > pktlen:
+                    # lost sync with the packet boundaries, drop the rest
+                    pos = len(buffer)
+                    break
+                start = pos + 1
+            else:
+                data_len = pktlen
+                start = pos
+
+            end = start + data_len + status_len
+            if end > len(buffer):
+                missing = end - len(buffer)
+                break
+
+            packets.append(self._decode_packet(buffer, start, data_len, status_len,
+                                               pktctrl1, timestamp))
+            pos = end
+
+        del buffer[:pos]
+        return packets, missing
+
+    def _packet_format(self):
+        """Get PKTLEN, PKTCTRL1 and PKTCTRL0, in one burst unless cached."""
+
+        if self.shadow is not None:
+            return (self.read_byte(self.PKTLEN), self.read_byte(self.PKTCTRL1),
+                    self.read_byte(self.PKTCTRL0))
+
+        return tuple(self.read_burst(self.PKTLEN, 3))
+
+    def _decode_packet(self, buffer, start, data_len, status_len, pktctrl1, timestamp):
+        """
+        Build a Packet from a FIFO burst, without more SPI traffic.
 
         args:
-            - register name
-            - byte
+            - buffer: bytes read from the RX FIFO
+            - start (int): offset of the payload, after any length byte
+            - data_len (int): payload length
+            - status_len (int): 2 with APPEND_STATUS, else 0
+            - pktctrl1 (int): PKTCTRL1, for the address check setting
+            - timestamp (float)
+        returns: Packet
         """
 
-        data = {}
-        spec = self._register_schema(name)
-        for attr_name, attr_schema in spec.items():
-            value = self._extract_val_from_byte(byte, attr_schema)
-            data[attr_name] = value
+        end = start + data_len
+        data = bytes(buffer[start:end])
 
-        return data
+        rssi = lqi = crc_ok = address = None
+        if status_len:
+            rssi = self._rssi_dbm(buffer[end])
+            lqi = buffer[end + 1] & 0x7F
+            crc_ok = bool(buffer[end + 1] & 0x80)
+        if data and self.fields.PKTCTRL1.ADR_CHK.decode(pktctrl1):
+            address = data[0]
+
+        return Packet(timestamp, data, rssi, lqi, crc_ok, address)
+
+    def _rssi_dbm(self, value):
+        """Convert a raw RSSI byte to dBm."""
+
+        if value >= 128:
+            dbm = ((value - 256) /2) - self.rssi_offset()
+        else:
+            dbm = (value / 2) - self.rssi_offset()
+
+        return dbm
+
+    def _status_length(self, pktctrl1=None):
+        """
+        Number of status bytes appended to received packets.
+
+        args: [optional] pktctrl1 (int): PKTCTRL1 if already read.
+        """
+
+        if pktctrl1 is None:
+            return 2 if self._read_field(self.fields.PKTCTRL1.APPEND_STATUS) else 0
+
+        return 2 if self.fields.PKTCTRL1.APPEND_STATUS.decode(pktctrl1) else 0
+
+    def _read_field(self, field):
+        """Read the value of one compiled register field."""
+
+        return field.decode(self.read_byte(field.address))
+
+    def _changed_runs(self, current, target, gap):
+        """
+        Find runs of registers that differ between two images.
+
+        returns: list of (address, bytes)
+        """
+
+        runs = []
+        for addr in range(len(target)):
+            if target[addr] == current[addr]:
+                continue
+
+            if runs and addr - runs[-1][1] <= gap:
+                runs[-1][1] = addr + 1
+            else:
+                runs.append([addr, addr + 1])
+
+        return [(start, bytes(target[start:end])) for start, end in runs]
+
+    def _encode_base_frequency(self, freq):
+        if freq < 1000000:
+            # MHz
+            freq = int(round(freq * 1000000))
+
+        carrier = solve_frequency(freq, self.osc_freq).code
+        return {
+            'FREQ2': carrier >> 16 & 0xFF,
+            'FREQ1': carrier >> 8 & 0xFF,
+            'FREQ0': carrier & 0xFF
+        }
+
+    def _encode_modulation(self, modulation):
+        if modulation not in self.MODULATIONS:
+            raise ValueError("Unknown modulation type '%s'" % modulation)
+
+        return {'MDMCFG2': {'MOD_FORMAT[2:0]': self.MODULATIONS[modulation]}}
 
-    def _register_schema(self, name):
-        """
-        Get schema for named register.
-
-        Each value (schema) is a tuple or list containing:
-            - which index position the attribute starts at.
-            - how many bits does it use.
-
-        """
-
-        # Indexing here is opposite of spec sheet.
-        # Ti Doc Index 7 => here is 0
-        # Ti Doc Index 0 => here is 7
-        data = {
-            "IOCFG2": {
-                "GDO2_INV": [1,1],
-                "GDO2_CFG[5:0]": [2,6]
-            },
-            "IOCFG1": {
-                "GDO_DS": [0,1],
-                "GDO1_INV": [1,1],
-                "GDO1_CFG[5:0]": [2,6]
-            },
-            "IOCFG0": {
-                "TEMP_SENSOR_ENABLE": [0,1],
-                "GDO0_INF": [1,1],
-                "GDO0_CFG[5:0]": [2,6]
-            },
-            "FIFOTHR": {
-                "ADC_RETENTION": [1,1],
-                "CLOSE_IN_RX[1:0]": [2,2],
-                "FIFO_THR[3:0]": [4,4]
-            },
-            "SYNC1": {
-                "SYNC[15:8]": [0,8]
-            },
-            "SYNC0": {
-                "SYNC[7:0]": [0,8]
-            },
-            "PKTLEN": {
-                "PACKET_LENGTH": [0,8]
-            },
-            'PKTCTRL1': {
-                "PQT[2:0]": [0,3],
-                "CRC_AUTOFLUSH": [4,1],
-                "APPEND_STATUS": [5,1],
-                "ADR_CHK[1:0]": [6,2]
-            },
-            'PKTCTRL0': {
-                "WHITE_DATA": [1,1],
-                "PKT_FORMAT[1:0]": [2,2],
-                "CRC_EN": [5,1],
-                "LENGTH_CONFIG[1:0]": [6,2]
-            },
-            'ADDR': {
-                'DEVICE_ADDR[7:0]': [0,8]
-            },
-            'CHANNR': {
-                'CHAN[7:0]': [0,8]
-            },
-            "FSCTRL1": {
-                "FREQ_IF[4:0]": [3,5]
-            },
-            "FSCTRL0": {
-                "FREQOFF[7:0]": [0,8]
-            },
-            'FREQ2': {
-                'FREQ[23:22]': [0,2],
-                'FREQ[21:16]': [2,6]
-            },
-            'FREQ1': {
-                'FREQ[15:8]': [0,8]
-            },
-            'FREQ0': {
-                'FREQ[7:0]': [0,8]
-            },
-            "MDMCFG4": {
-                "CHANBW_E[1:0]": [0,2],
-                "CHANBW_M[1:0]": [2,2],
-                "DRATE_E[3:0]": [4, 4]
-            },
-            "MDMCFG3": {
-                "DRATE_M[7:0]": [0,8]
-            },
-            "MDMCFG2": {
-                "DEM_DCFILT_OFF": [0,1],
-                "MOD_FORMAT[2:0]": [1,3],
-                "MANCHESTER_EN": [4,1],
-                "SYNC_MODE[2:0]": [5,3]
-            },
-            "MDMCFG1": {
-                "FEC_EN": [0,1],
-                "NUM_PREAMBLE[2:0]": [1,3],
-                "CHANSPC_E[1:0]": [6,1]
-            },
-            "MDMCFG0": {
-                "CHANSPC_M[7:0]": [0,8]
-            },
-            "DEVIATN": {
-                "DEVIATION_E[2:0]": [1,3],
-                "DEVIATION_M[2:0]": [5,3]
-            },
-            "MCSM2": {
-                "RX_TIME_RSSI": [3,1],
-                "RX_TIME_QUAL": [4,1],
-                "RX_TIME[2:0]": [5,3]
-            },
-            "MCSM1": {
-                "CCA_MODE[1:0]": [2,2],
-                "RXOFF_MODE[1:0]": [4,2],
-                "TXOFF_MODE[1:0]": [6,2]
-            },
-            "MCSM0": {
-                "FS_AUTOCAL[1:0]": [2,2],
-                "PO_TIMEOUT": [4,2],
-                "PIN_CTRL_EN": [6,1],
-                "XOSC_FORCE_ON": [7,1]
-            },
-            "FOCCFG": {
-                "FOC_BS_CS_GATE": [2,1],
-                "FOC_PRE_K[1:0]": [3,2],
-                "FOC_POST_K": [5,1],
-                "FOC_LIMIT[1:0]": [6,2]
-            },
-            "BSCFG": {
-                "BS_PRE_K[1:0]": [0,2],
-                "BS_PRE_KP[1:0]": [2,2],
-                "BS_POST_KI": [4,1],
-                "BS_POST_KP": [5,1],
-                "BS_LIMIT[1:0]": [6,2]
-            },
-            "AGCCTRL2": {
-                "MAX_DVGA_GAIN[1:0]": [0,2],
-                "MAX_LNA_GAIN[2:0]": [2,3],
-                "MAGN_TARGET[2:0]": [5,3]
-            },
-            "AGCCTRL1": {
-                "AGC_LNA_PRIORITY": [1,1],
-                "CARRIER_SENSE_REL_THR[1:0]": [2,2],
-                "CARRIER_SENSE_ABS_THR[3:0]": [4,4]
-            },
-            "AGCCTRL0": {
-                "HYST_LEVEL[1:0]": [0,2],
-                "WAIT_TIME[1:0]": [2,2],
-                "AGC_FREEZE[1:0]": [4,2],
-                "FILTER_LENGTH[1:0]": [6,2]
-            },
-            "WOREVT1": {
-                "EVENT0[15:8]": [0,8]
-            },
-            "WOREVT0": {
-                "EVENT0[7:0]": [0,8]
-            },
-            "WORCTRL": {
-                "RC_PD": [0,1],
-                "EVENT1[2:0]": [1,3],
-                "RC_CAL": [4,1],
-                "WOR_RES": [6,2]
-            },
-            "FREND1": {
-                "LNA_CURRENT[1:0]": [0, 2],
-                "LNA2MIX_CURRENT[1:0]": [2, 2],
-                "LODIV_BUF_CURRENT_RX[1:0]": [4,2],
-                "MIX_CURRENT[1:0]": [6,2]
-            },
-            "FREND0": {
-                "LODIV_BUF_CURRENT_TX[1:0]": [2, 2],
-                "PA_POWER[2:0]": [5,3]
-            },
-            "FSCAL3": {
-                "FSCAL3[7:6]": [0,2],
-                "CHP_CURR_CAL_EN[1:0]": [2,2],
-                "FSCAL3[3:0]": [4,4],
-            },
-            "FSCAL2": {
-                "VCO_CORE_H_EN": [2,1],
-                "FSCAL2[4:0]": [3,5]
-            },
-            "FSCAL1": {
-                "FSCAL1[5:0]": [2,6]
-            },
-            "FSCAL0": {
-                "FSCAL0[6:0]": [1,7]
-            },
-            "RCCTRL1": {
-                "RCCTRL1[6:0]": [1,7]
-            },
-            "RCCTRL0": {
-                "RCCTRL0[6:0]": [1,7]
-            },
-            "FSTEST": {
-                "FSTEST[7:0]": [0,8]
-            },
-            "PTEST": {
-                "PTEST[7:0]": [0,8]
-            },
-            "AGCTEST": {
-                "AGCTEST[7:0]": [0,8]
-            },
-            "TEST2": {
-                "TEST2[7:0]": [0,8]
-            },
-            "TEST1": {
-                "TEST1[7:0]": [0,8]
-            },
-            "TEST0": {
-                "TEST0[7:2]": [0,6],
-                "VCO_SEL_CAL_EN": [6,1],
-                "TEST0[0]": [7,1]
-            },
-            "PARTNUM": {
-                "PARTNUM[7:0]": [0,8]
-            },
-            "PARTNUM": {
-                "VERSION[7:0]": [0,8]
-            },
-            "FREQEST": {
-                "FREQOSS_EST": [0,8]
-            },
-            "LQI": {
-                "CRC_OK": [0,1],
-                "LQI_EST[6:0]": [1,7]
-            },
-            "RSSI": {
-                "RSSI": [0,8]
-            },
-            "MARCSTATE": {
-                "MARC_STATE[4:0]": [3,5]
-            },
-            "WORTIME1": {
-                "TIME[15:8]": [0,8]
-            },
-            "WORTIME0": {
-                "TIME[7:0]": [0,8]
-            },
-            'PKTSTATUS': {
-                "CRC_OK": [0,1],
-                "CS": [1,1],
-                "PQT_REACHED": [2,1],
-                "CCA": [3,1],
-                "SFD": [4,1],
-                "GDO2": [5,1],
-                "GDO0": [7,1]
-            },
-            "VCO_VC_DAC": {
-                "VCO_VC_DAC[7:0]": [0,8]
-            },
-            "TXBYTES": {
-                "TXFIFO_UNDERFLOW": [0,1],
-                "NUM_TXBYTES": [1,7]
-            },
-            "RXBYTES": {
-                "RXFIFO_UNDERFLOW": [0,1],
-                "NUM_TXBYTES": [1,7]
-            },
-            "RCCTRL1_STATUS": {
-                "RCCTRL1_STATUS[6:0]": [1,7]
-            },
-            "RCCTRL0_STATUS": {
-                "RCCTRL0_STATUS[6:0]": [1,7]
-            }
+    def _encode_packet_length(self, mode):
+        if mode not in self.PACKET_LENGTH_MODES:
+            raise ValueError("Unknown packet mode '%s'" % mode)
+
+        return {'PKTCTRL0': {'LENGTH_CONFIG[1:0]': self.PACKET_LENGTH_MODES[mode]}}
+
+    def _encode_channel(self, channel):
+        if type(channel) is not int:
+            raise ValueError("Invalid channel number.")
+
+        return {'CHANNR': channel}
+
+    def _encode_baud_rate(self, rate):
+        drate_e, drate_m = solve_data_rate(rate, self.osc_freq).code
+        return {
+            'MDMCFG4': {'DRATE_E[3:0]': drate_e},
+            'MDMCFG3': {'DRATE_M[7:0]': drate_m}
         }
 
-        if name not in data:
-            raise ValueError("Register name '%s' not found" % name)
+    def _encode_rx_bandwidth(self, value):
+        bw_e, bw_m = solve_rx_bandwidth(value, self.osc_freq).code
+        return {'MDMCFG4': {'CHANBW_E[1:0]': bw_e, 'CHANBW_M[1:0]': bw_m}}
+
+    def _encode_channel_spacing(self, value):
+        chanspc_e, chanspc_m = solve_channel_spacing(value, self.osc_freq).code
+        return {'MDMCFG1': {'CHANSPC_E[1:0]': chanspc_e}, 'MDMCFG0': chanspc_m}
+
+    def _encode_deviation(self, value):
+        dev_e, dev_m = solve_deviation(value, self.osc_freq).code
+        return {'DEVIATN': {'DEVIATION_E[2:0]': dev_e, 'DEVIATION_M[2:0]': dev_m}}
+
+    def _encode_manchester(self, value):
+        return {'MDMCFG2': {'MANCHESTER_EN': value}}
+
+    def _encode_whitening(self, value):
+        return {'PKTCTRL0': {'WHITE_DATA': value}}
 
-        return data[name]
+    def _encode_sync_word(self, value):
+        if type(value) is str:
+            if len(list(value)) != 4:
+                raise ValueError("Must be 4 letter sync word like 'FAFA'.")
+
+            s1 = int("".join(list(value)[:2]), 16)
+            s0 = int("".join(list(value)[2:]), 16)
+        elif type(value) is int:
+            s0 = value & 0xFF
+            s1 = value >> 8
+        else:
+            raise ValueError("Unexpected sync word type.")
+
+        return {'SYNC1': s1, 'SYNC0': s0}
+
+
+def _byte_reader(source):
+    """
+    Get a read(n) function over bytes-like, file-like or iterable sources.
+
+    read(n) returns up to n bytes (fewer only at the end). read(None)
+    returns everything that is left.
+
+    returns: (read, length), length is None unless the source is bytes-like.
+    """
+
+    if hasattr(source, 'read'):
+        def read_file(count):
+            if count is None:
+                return bytes(source.read())
+            data = bytearray()
+            while len(data) < count:
+                more = source.read(count - len(data))
+                if not more:
+                    break
+                data.extend(more)
+            return bytes(data)
+        return read_file, None
+
+    try:
+        view = memoryview(source).cast('B')
+    except TypeError:
+        view = None
+
+    if view is not None:
+        position = [0]
+
+        def read_view(count):
+            start = position[0]
+            end = len(view) if count is None else min(len(view), start + count)
+            position[0] = end
+            return view[start:end]
+        return read_view, len(view)
+
+    items = iter(source)
+    pending = bytearray()
+
+    def read_iter(count):
+        while count is None or len(pending) < count:
+            item = next(items, None)
+            if item is None:
+                break
+            if type(item) is int:
+                pending.append(item)
+            else:
+                pending.extend(item)
+        if count is None:
+            count = len(pending)
+        data = bytes(pending[:count])
+        del pending[:count]
+        return data
+    return read_iter, None
@@ -0,0 +1,624 @@
+import functools
+
+from pyticc.utils import _byte_array, _numpy
+
+
+# Software versions of the CC1101 packet handling transforms, in the order
+# the chip applies them on TX (datasheet section 15):
+#
+#   length byte, address, payload -> CRC16 appended -> PN9 whitening ->
+#   FEC + interleaving, or Manchester (not both)
+#
+# Every transform has a bytes in, bytes out version and a numpy batch
+# version that takes a 2-D uint8 array, one frame per row.
+
+# ---------------------------------
+# PN9 whitening
+# ---------------------------------
+def _pn9_sequence(length):
+    """PN9 (x^9 + x^5 + 1) bytes, starting from the all ones state."""
+
+    state = 0x1FF
+    out = bytearray(length)
+    for i in range(length):
+        out[i] = state & 0xFF
+        for _ in range(8):
+            state = (state >> 1) | (((state ^ (state >> 5)) & 1) << 8)
+
+    return bytes(out)
+
+
+# The PN9 byte sequence repeats every 511 bytes
+PN9_PERIOD = 511
+PN9 = _pn9_sequence(PN9_PERIOD)
+
+
+def _pn9(length):
+    """PN9 bytes for a frame of "length" bytes."""
+
+    if length <= PN9_PERIOD:
+        return PN9[:length]
+
+    return (PN9 * (length // PN9_PERIOD + 1))[:length]
+
+
+def whiten(data):
+    """
+    XOR data with the CC1101 PN9 sequence. Whitening and de-whitening are
+    the same operation.
+
+    args: data: bytes-like, from the length byte on.
+    returns: bytes
+    """
+
+    data = bytes(data)
+    key = int.from_bytes(_pn9(len(data)), 'big')
+    return (int.from_bytes(data, 'big') ^ key).to_bytes(len(data), 'big')
+
+
+def whiten_batch(frames):
+    """
+    Whiten (or de-whiten) many frames at once. Requires numpy.
+
+    args: frames: array-like, frames x bytes
+    returns: uint8 array, frames x bytes
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    key = np.frombuffer(_pn9(frames.shape[-1]), dtype=np.uint8)
+    return frames ^ key
+
+
+# ---------------------------------
+# CRC16
+# ---------------------------------
+CRC_POLY = 0x8005
+CRC_INIT = 0xFFFF
+
+
+def _crc_table(poly):
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly if crc & 0x8000 else crc << 1) & 0xFFFF
+        table.append(crc)
+
+    return tuple(table)
+
+
+CRC_TABLE = _crc_table(CRC_POLY)
+
+
+def crc16(data, crc=CRC_INIT):
+    """
+    CC1101 CRC16: polynomial 0x8005, MSB first, no final XOR (TI DN502).
+
+    The chip computes it over the length byte, address and payload,
+    before whitening, and sends it high byte first.
+
+    args:
+        - data: bytes-like
+        - [optional] crc (int): start value, or the CRC of the data so
+          far. default=0xFFFF
+    returns: int
+    """
+
+    table = CRC_TABLE
+    for byte in bytes(data):
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+
+    return crc
+
+
+def crc16_batch(frames, lengths=None):
+    """
+    CRC16 of many frames at once, one table lookup per byte column.
+    Requires numpy.
+
+    args:
+        - frames: array-like, frames x bytes
+        - [optional] lengths: bytes to cover in each frame. default=all
+    returns: uint16 array, one CRC per frame
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    if frames.ndim != 2:
+        raise ValueError("Expected frames x bytes")
+
+    if lengths is not None:
+        lengths = np.asarray(lengths)
+
+    table = _np_tables()['crc']
+    crc = np.full(frames.shape[0], CRC_INIT, dtype=np.uint16)
+    for column in range(frames.shape[1]):
+        update = (crc << 8) ^ table[(crc >> 8) ^ frames[:, column]]
+        if lengths is None:
+            crc = update
+        else:
+            crc = np.where(column < lengths, update, crc)
+
+    return crc
+
+
+# ---------------------------------
+# Manchester
+# ---------------------------------
+# Each bit becomes two chips: a 1 is sent as 10, a 0 as 01
+def _manchester_table():
+    table = []
+    for byte in range(256):
+        word = 0
+        for bit in range(7, -1, -1):
+            word = (word << 2) | (0b10 if byte >> bit & 1 else 0b01)
+        table.append(word)
+
+    return tuple(table)
+
+
+MANCHESTER_ENCODE = _manchester_table()
+
+# Encoded byte -> 4 data bits, or None for a byte with a 00 or 11 chip pair
+MANCHESTER_DECODE = tuple(
+    dict((MANCHESTER_ENCODE[nibble] & 0xFF, nibble) for nibble in range(16)).get(byte)
+    for byte in range(256))
+
+
+def manchester_encode(data):
+    """
+    Manchester encode. returns: bytes, twice as long as data
+    """
+
+    table = MANCHESTER_ENCODE
+    out = bytearray()
+    for byte in bytes(data):
+        word = table[byte]
+        out.append(word >> 8)
+        out.append(word & 0xFF)
+
+    return bytes(out)
+
+
+def manchester_decode(data):
+    """
+    Manchester decode.
+
+    args: data: bytes-like, even length
+    returns: bytes, half as long as data
+    """
+
+    data = bytes(data)
+    if len(data) % 2:
+        raise ValueError("Manchester data must be an even number of bytes")
+
+    table = MANCHESTER_DECODE
+    out = bytearray(len(data) // 2)
+    for i in range(len(out)):
+        high = table[data[2 * i]]
+        low = table[data[2 * i + 1]]
+        if high is None or low is None:
+            raise ValueError("Invalid Manchester symbol at byte %d" % (2 * i))
+        out[i] = high << 4 | low
+
+    return bytes(out)
+
+
+def manchester_encode_batch(frames):
+    """
+    Manchester encode many frames. Requires numpy.
+
+    args: frames: array-like, frames x bytes
+    returns: uint8 array, frames x (2 * bytes)
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    words = _np_tables()['manchester'][frames].astype('>u2')
+    return words.view(np.uint8).reshape(frames.shape[:-1] + (-1,))
+
+
+def manchester_decode_batch(frames):
+    """
+    Manchester decode many frames. Requires numpy.
+
+    args: frames: array-like, frames x bytes (even)
+    returns: (uint8 array frames x (bytes / 2),
+              int array of invalid symbol bytes per frame)
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    if frames.shape[-1] % 2:
+        raise ValueError("Manchester data must be an even number of bytes")
+
+    # 0x10 marks an invalid byte
+    nibbles = _np_tables()['unmanchester'][frames]
+    invalid = (nibbles >> 4).sum(axis=-1)
+    data = (nibbles[..., 0::2] << 4) | (nibbles[..., 1::2] & 0x0F)
+    return data.astype(np.uint8), invalid
+
+
+# ---------------------------------
+# FEC and interleaving (TI DN504)
+# ---------------------------------
+# Rate 1/2, constraint length 4 convolutional code. Indexed by the last
+# three input bits (oldest first) and the new one; gives a 2 bit symbol.
+FEC_ENCODE_TABLE = (0, 3, 1, 2, 3, 0, 2, 1, 3, 0, 2, 1, 0, 3, 1, 2)
+
+# Bit errors between two 2-bit symbols, by their XOR
+_HAMMING = (0, 1, 1, 2)
+
+# Appended before encoding, so the decoder has bits past the end of the data
+FEC_TERMINATOR = 0x0B
+
+
+def _interleave_order():
+    """
+    Interleaver as a permutation of the 16 2-bit symbols of a 4 byte block.
+
+    Output symbol j (MSB first) is symbol (j >> 2) (LSB first) of byte
+    3 - (j & 3), as in DN504.
+    """
+
+    order = []
+    for j in range(16):
+        byte = 3 - (j & 3)
+        order.append(byte * 4 + (3 - (j >> 2)))
+
+    return tuple(order)
+
+
+INTERLEAVE = _interleave_order()
+DEINTERLEAVE = tuple(INTERLEAVE.index(k) for k in range(16))
+
+
+def _permute(data, order):
+    """Apply a symbol permutation to every 4 byte block."""
+
+    data = bytes(data)
+    if len(data) % 4:
+        raise ValueError("Interleaved data must be a multiple of 4 bytes")
+
+    out = bytearray()
+    for i in range(0, len(data), 4):
+        block = int.from_bytes(data[i:i + 4], 'big')
+        symbols = [block >> (30 - 2 * k) & 3 for k in range(16)]
+        word = 0
+        for k in order:
+            word = (word << 2) | symbols[k]
+        out += word.to_bytes(4, 'big')
+
+    return bytes(out)
+
+
+def interleave(data):
+    """Interleave FEC encoded data, 4 byte blocks. returns: bytes"""
+
+    return _permute(data, INTERLEAVE)
+
+
+def deinterleave(data):
+    """Undo interleave(). returns: bytes"""
+
+    return _permute(data, DEINTERLEAVE)
+
+
+def fec_encode(data, interleaved=True):
+    """
+    Convolutionally encode data the way the CC1101 does with FEC_EN.
+
+    One or two terminator bytes are added first, so the encoded length is
+    always a multiple of 4 bytes.
+
+    args:
+        - data: bytes-like, from the length byte through the CRC.
+        - [optional] interleaved (bool): interleave the result, as the
+          chip always does. default=True
+    returns: bytes, 2 * (len(data) + 2) rounded down to 4 bytes
+    """
+
+    data = bytes(data) + bytes([FEC_TERMINATOR, FEC_TERMINATOR])
+    data = data[:len(data) // 2 * 2]
+
+    table = FEC_ENCODE_TABLE
+    out = bytearray()
+    state = 0
+    for byte in data:
+        word = 0
+        for bit in range(7, -1, -1):
+            index = (state << 1) | (byte >> bit & 1)
+            word = (word << 2) | table[index]
+            state = index & 0x07
+        out.append(word >> 8)
+        out.append(word & 0xFF)
+
+    return interleave(out) if interleaved else bytes(out)
+
+
+def fec_decode(data, length=None, interleaved=True):
+    """
+    Viterbi decode FEC data (hard decision, 8 states).
+
+    args:
+        - data: bytes-like, as from fec_encode() or captured off the air.
+        - [optional] length (int): data bytes to return. default=all
+          decoded bytes, including the terminator.
+        - [optional] interleaved (bool): default=True
+    returns: bytes
+    """
+
+    if interleaved:
+        data = deinterleave(data)
+    data = bytes(data)
+    if len(data) % 2:
+        raise ValueError("FEC data must be an even number of bytes")
+
+    table = FEC_ENCODE_TABLE
+    metrics = [0] + [None] * 7
+    decisions = []
+    for byte in data:
+        for shift in (6, 4, 2, 0):
+            symbol = byte >> shift & 3
+            step = [None] * 8
+            new = [None] * 8
+            for state in range(8):
+                # predecessors (state >> 1) and (state >> 1) | 4, with the
+                # new bit in the low bit of state
+                best = None
+                for high in (0, 1):
+                    previous = (state >> 1) | (high << 2)
+                    if metrics[previous] is None:
+                        continue
+                    cost = metrics[previous] + _HAMMING[table[state | high << 3] ^ symbol]
+                    if best is None or cost < best:
+                        best, step[state] = cost, high
+                new[state] = best
+            metrics = new
+            decisions.append(step)
+
+    state = min((metric, state) for state, metric in enumerate(metrics)
+                if metric is not None)[1]
+    bits = []
+    for step in reversed(decisions):
+        bits.append(state & 1)
+        state = (state >> 1) | (step[state] << 2)
+
+    bits.reverse()
+    out = bytearray()
+    for i in range(0, len(bits), 8):
+        byte = 0
+        for bit in bits[i:i + 8]:
+            byte = (byte << 1) | bit
+        out.append(byte)
+
+    return bytes(out if length is None else out[:length])
+
+
+def interleave_batch(frames, inverse=False):
+    """
+    Interleave (or deinterleave) many frames. Requires numpy.
+
+    args:
+        - frames: array-like, frames x bytes, multiple of 4 bytes
+        - [optional] inverse (bool): deinterleave. default=False
+    returns: uint8 array, same shape
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    if frames.shape[-1] % 4:
+        raise ValueError("Interleaved data must be a multiple of 4 bytes")
+
+    order = _np_tables()['deinterleave' if inverse else 'interleave']
+    symbols = _symbols(np, frames).reshape(frames.shape[:-1] + (-1, 16))
+    symbols = symbols[..., order].reshape(frames.shape[:-1] + (-1,))
+    return _pack_symbols(np, symbols)
+
+
+def fec_encode_batch(frames, interleaved=True):
+    """
+    FEC encode many frames of the same length. Requires numpy.
+
+    args: see fec_encode(). frames: array-like, frames x bytes
+    returns: uint8 array, one encoded frame per row
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    if frames.ndim != 2:
+        raise ValueError("Expected frames x bytes")
+
+    count, size = frames.shape
+    size += 2
+    size -= size % 2
+    data = np.full((count, size), FEC_TERMINATOR, dtype=np.uint8)
+    data[:, :frames.shape[1]] = frames
+
+    table = _np_tables()['fec']
+    bits = np.unpackbits(data, axis=1)
+    symbols = np.empty(bits.shape, dtype=np.uint8)
+    state = np.zeros(count, dtype=np.uint8)
+    for t in range(bits.shape[1]):
+        index = (state << 1) | bits[:, t]
+        symbols[:, t] = table[index]
+        state = index & 0x07
+
+    encoded = _pack_symbols(np, symbols)
+    return interleave_batch(encoded) if interleaved else encoded
+
+
+def fec_decode_batch(frames, length=None, interleaved=True):
+    """
+    Viterbi decode many frames of the same length at once; the trellis
+    runs over all frames and states in each step. Requires numpy.
+
+    args: see fec_decode(). frames: array-like, frames x bytes
+    returns: (uint8 array frames x bytes decoded,
+              int array of corrected bit errors per frame)
+    """
+
+    np = _numpy()
+    frames = _byte_array(np, frames)
+    if frames.ndim != 2:
+        raise ValueError("Expected frames x bytes")
+    if frames.shape[1] % 2:
+        raise ValueError("FEC data must be an even number of bytes")
+
+    if interleaved:
+        frames = interleave_batch(frames, inverse=True)
+
+    tables = _np_tables()
+    symbols = _symbols(np, frames)
+    count, steps = symbols.shape
+    states = np.arange(8)
+    low, high = states >> 1, (states >> 1) | 4
+
+    # unreachable start states
+    metrics = np.full((count, 8), 1 << 20, dtype=np.int32)
+    metrics[:, 0] = 0
+    decisions = np.empty((steps, count, 8), dtype=bool)
+    for t in range(steps):
+        # branch costs of the 16 (previous high bit, state) transitions
+        cost = tables['fec_cost'][symbols[:, t]]
+        from_low = metrics[:, low] + cost[:, :8]
+        from_high = metrics[:, high] + cost[:, 8:]
+        decisions[t] = from_high < from_low
+        metrics = np.minimum(from_low, from_high)
+
+    errors = metrics.min(axis=1)
+    state = metrics.argmin(axis=1)
+    rows = np.arange(count)
+    bits = np.empty((count, steps), dtype=np.uint8)
+    for t in range(steps - 1, -1, -1):
+        bits[:, t] = state & 1
+        state = (state >> 1) | (decisions[t, rows, state] << 2)
+
+    data = np.packbits(bits, axis=1)
+    if length is not None:
+        data = data[:, :length]
+
+    return data, errors
+
+
+def _symbols(np, frames):
+    """Split bytes into 2-bit symbols, MSB first."""
+
+    bits = np.unpackbits(frames, axis=-1)
+    return (bits[..., 0::2] << 1) | bits[..., 1::2]
+
+
+def _pack_symbols(np, symbols):
+    """Join 2-bit symbols, MSB first, into bytes."""
+
+    bits = np.empty(symbols.shape[:-1] + (symbols.shape[-1] * 2,), dtype=np.uint8)
+    bits[..., 0::2] = symbols >> 1
+    bits[..., 1::2] = symbols & 1
+    return np.packbits(bits, axis=-1)
+
+
+@functools.lru_cache(maxsize=None)
+def _np_tables():
+    """Lookup tables as numpy arrays, built on first batch call."""
+
+    np = _numpy()
+    fec = np.array(FEC_ENCODE_TABLE, dtype=np.uint8)
+    hamming = np.array(_HAMMING, dtype=np.int32)
+    unmanchester = [0x10 if value is None else value for value in MANCHESTER_DECODE]
+
+    # transition index: state | previous high bit << 3
+    return {
+        'crc': np.array(CRC_TABLE, dtype=np.uint16),
+        'manchester': np.array(MANCHESTER_ENCODE, dtype=np.uint16),
+        'unmanchester': np.array(unmanchester, dtype=np.uint8),
+        'fec': fec,
+        'fec_cost': hamming[fec[None, :] ^ np.arange(4, dtype=np.uint8)[:, None]],
+        'interleave': np.array(INTERLEAVE),
+        'deinterleave': np.array(DEINTERLEAVE),
+    }
+
+
+# ---------------------------------
+# Whole frames
+# ---------------------------------
+def encode_frame(payload, address=None, variable=True, crc=True,
+                 whitening=True, fec=False, manchester=False):
+    """
+    Build the bytes a CC1101 sends after the sync word, for test vectors
+    or for transmitting in asynchronous/raw mode.
+
+    args:
+        - payload: bytes-like
+        - [optional] address (int): address byte, when ADR_CHK is on.
+        - [optional] variable (bool): prepend the length byte.
+        - [optional] crc (bool): append CRC16 (CRC_EN).
+        - [optional] whitening (bool): PN9 whiten (WHITE_DATA).
+        - [optional] fec (bool): FEC encode and interleave (FEC_EN).
+        - [optional] manchester (bool): MANCHESTER_EN.
+    returns: bytes
+    """
+
+    if fec and manchester:
+        raise ValueError("FEC and Manchester can not be used together")
+
+    frame = bytes(payload)
+    if address is not None:
+        frame = bytes([address]) + frame
+    if variable:
+        frame = bytes([len(frame)]) + frame
+    if crc:
+        frame += crc16(frame).to_bytes(2, 'big')
+    if whitening:
+        frame = whiten(frame)
+    if fec:
+        frame = fec_encode(frame)
+    if manchester:
+        frame = manchester_encode(frame)
+
+    return frame
+
+
+def decode_frame(frame, length=None, address=False, crc=True,
+                 whitening=True, fec=False, manchester=False):
+    """
+    Undo encode_frame(), e.g. on bits captured after the sync word.
+
+    args:
+        - frame: bytes-like, at least one whole frame. Bytes after it
+          are ignored.
+        - [optional] length (int): payload length (with the address
+          byte) for fixed length frames. default=None, read the length
+          byte.
+        - [optional] address (bool): the first payload byte is an address.
+        - see encode_frame() for the rest.
+    returns: (payload bytes, address or None, crc_ok bool or None)
+    """
+
+    frame = bytes(frame)
+    if manchester:
+        # up to the first invalid chip pair, past the end of the frame
+        end = 0
+        while end + 1 < len(frame) and MANCHESTER_DECODE[frame[end]] is not None \
+                and MANCHESTER_DECODE[frame[end + 1]] is not None:
+            end += 2
+        frame = manchester_decode(frame[:end])
+    if fec:
+        frame = fec_decode(frame[:len(frame) // 4 * 4])
+    if whitening:
+        frame = whiten(frame)
+
+    start = 0
+    if length is None:
+        length, start = frame[0], 1
+
+    end = start + length
+    if end + (2 if crc else 0) > len(frame):
+        raise ValueError("Frame is shorter than its length")
+
+    payload = frame[start:end]
+    crc_ok = crc16(frame[:end + 2]) == 0 if crc else None
+    if address and payload:
+        return payload[1:], payload[0], crc_ok
+
+    return payload, None, crc_ok
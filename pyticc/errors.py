@@ -0,0 +1,10 @@
+class FIFOError(Exception):
+    """The chip's RX or TX FIFO went into an error state."""
+
+
+class RXOverflow(FIFOError):
+    """More bytes arrived than the RX FIFO could hold."""
+
+
+class TXUnderflow(FIFOError):
+    """The TX FIFO ran empty before the packet was complete."""
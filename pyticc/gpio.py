@@ -0,0 +1,142 @@
+import os
+import select
+
+
+class EdgeSource(object):
+    """
+    Something that signals GDO pin edges through a file descriptor.
+
+    fileno() must become readable when an edge is pending.
+
+    Receivers block in wait() instead of polling the chip over SPI.
+    """
+
+    def fileno(self):
+        raise NotImplementedError
+
+    def wait(self, timeout=None):
+        """
+        Block until an edge is signalled.
+
+        args: [optional] timeout in seconds. None waits forever.
+        returns: True if an edge was seen, False on timeout.
+        """
+
+        ready, _, _ = select.select([self], [], [], timeout)
+        if not ready:
+            return False
+
+        self.clear()
+        return True
+
+    def clear(self):
+        """Consume any pending edge notification."""
+
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SysfsEdge(EdgeSource):
+    """
+    GPIO input line through the sysfs GPIO interface.
+
+    The kernel reports edges as an exceptional condition (POLLPRI) on the
+    line's value file, which we wait on with epoll.
+
+    args:
+        - pin (int): GPIO number the GDO pin is wired to.
+        - [optional] edge (str): rising|falling|both. default=rising
+        - [optional] root (str): sysfs gpio directory.
+    """
+
+    def __init__(self, pin, edge='rising', root='/sys/class/gpio'):
+        if edge not in ('rising', 'falling', 'both'):
+            raise ValueError("Unknown edge '%s'" % edge)
+
+        self.pin = pin
+        path = os.path.join(root, 'gpio%d' % pin)
+
+        if not os.path.exists(path):
+            with open(os.path.join(root, 'export'), 'w') as fh:
+                fh.write(str(pin))
+
+        with open(os.path.join(path, 'direction'), 'w') as fh:
+            fh.write('in')
+        with open(os.path.join(path, 'edge'), 'w') as fh:
+            fh.write(edge)
+
+        self._fd = os.open(os.path.join(path, 'value'), os.O_RDONLY | os.O_NONBLOCK)
+        self._epoll = select.epoll()
+        self._epoll.register(self._fd, select.EPOLLPRI | select.EPOLLERR)
+        self.clear()
+
+    def fileno(self):
+        # The epoll fd turns readable on an edge, so this source works with
+        # select() and asyncio add_reader() like any other.
+        return self._epoll.fileno()
+
+    def wait(self, timeout=None):
+        events = self._epoll.poll(-1 if timeout is None else timeout)
+        if not events:
+            return False
+
+        self.clear()
+        return True
+
+    def clear(self):
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.read(self._fd, 8)
+
+    def value(self):
+        """Current level of the line (0|1)."""
+
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        return int(os.read(self._fd, 8).strip() or 0)
+
+    def close(self):
+        if self._fd is not None:
+            self._epoll.close()
+            os.close(self._fd)
+            self._fd = None
+
+
+class PipeEdge(EdgeSource):
+    """
+    In-process edge source backed by a pipe.
+
+    Stands in for a GPIO line in tests and simulators: call trigger() where
+    the chip would have raised its GDO pin.
+    """
+
+    def __init__(self):
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+
+    def fileno(self):
+        return self._read_fd
+
+    def trigger(self):
+        """Signal one edge."""
+
+        os.write(self._write_fd, b'\x01')
+
+    def clear(self):
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        if self._read_fd is not None:
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+            self._read_fd = self._write_fd = None
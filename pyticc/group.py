@@ -0,0 +1,232 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pyticc.cc1101 import CC1101
+from pyticc.receiver import PacketRing
+
+
+class RadioGroup(object):
+    """
+    Several CC1101s, with one I/O worker thread per SPI bus.
+
+    Radios on the same bus are served in turn by that bus' worker; radios
+    on different buses run in parallel. Received packets from every radio
+    go into one timestamped feed, tagged with the radio id. Each radio has
+    its own TX queue, drained by its bus worker between RX polls.
+
+    A radio whose service fails (SPI error, ...) is retried with a growing
+    back-off while the others carry on; its last error is in
+    self.errors[radio id] until it recovers.
+
+        group = RadioGroup({
+            'north': {'spi_bus': 0, 'spi_device': 0},
+            'south': {'spi_bus': 1, 'spi_device': 0},
+        }, config={'modulation': 'GFSK'})
+
+        group.start()
+        group.send('north', [0x01, 0x02])
+        for packet in group:
+            print(packet.radio, packet.timestamp, packet.data)
+        group.stop()
+
+    args:
+        - radios (dict): {radio id: CC1101, or CC1101 keyword-args}.
+          Keyword-args may carry their own 'config' dict, applied on top
+          of the group config.
+        - [optional] config (dict): apply_config() for every radio.
+        - [optional] capacity (int): slots of the merged RX feed. default=256
+        - [optional] policy (str): feed overflow policy, see PacketRing.
+        - [optional] poll_interval: seconds a bus worker sleeps when none
+          of its radios had anything to do. default=0.001
+        - [optional] factory: radio class for keyword-args. default=CC1101
+    """
+
+    # seconds between retries of a failing radio, doubling up to the max
+    RETRY_MIN = 0.01
+    RETRY_MAX = 1.0
+
+    def __init__(self, radios, config=None, capacity=256, policy='drop-oldest',
+                 poll_interval=0.001, factory=CC1101):
+        self.capacity = capacity
+        self.policy = policy
+        self.poll_interval = poll_interval
+        self.feed = PacketRing(capacity, policy)
+        self.radios = {}
+        self.errors = {}
+        self.counters = {}
+
+        self._tx = {}
+        self._retry = {}
+        self._buses = {}
+        self._threads = []
+        self._stop = threading.Event()
+
+        # radios on one bus are set up in turn, buses in parallel
+        specs = {}
+        for radio_id, spec in radios.items():
+            bus = spec.spi_bus if isinstance(spec, CC1101) else spec.get('spi_bus', 0)
+            specs.setdefault(bus, []).append((radio_id, spec))
+
+        with ThreadPoolExecutor(max_workers=max(1, len(specs))) as pool:
+            jobs = [pool.submit(self._setup_bus, entries, config, factory)
+                    for entries in specs.values()]
+            for bus, job in zip(specs, jobs):
+                self._buses[bus] = job.result()
+
+        for radio_id in radios:
+            self._tx[radio_id] = queue.Queue()
+            self.counters[radio_id] = {"received": 0, "sent": 0, "errors": 0}
+
+    def __iter__(self):
+        """Yield packets until the group is stopped and drained."""
+
+        while True:
+            try:
+                yield self.feed.get()
+            except queue.Empty:
+                return
+
+    def __getitem__(self, radio_id):
+        return self.radios[radio_id]
+
+    def get(self, timeout=None):
+        """Get the next packet from any radio. raises: queue.Empty"""
+
+        return self.feed.get(timeout=timeout)
+
+    def send(self, radio_id, data):
+        """
+        Queue a packet for transmission on one radio.
+
+        args:
+            - radio id
+            - list of bytes, as for CC1101.send_data()
+        returns: concurrent.futures.Future with the send_data() result.
+        """
+
+        if radio_id not in self._tx:
+            raise ValueError("Unknown radio '%s'" % radio_id)
+
+        future = Future()
+        self._tx[radio_id].put((data, future))
+        return future
+
+    def start(self):
+        if self.running():
+            raise RuntimeError("Radio group already running")
+
+        if self._threads:
+            # the old feed was closed by stop()
+            self.feed = PacketRing(self.capacity, self.policy)
+
+        self._stop.clear()
+        self._threads = []
+        for bus, radio_ids in self._buses.items():
+            thread = threading.Thread(target=self._run, args=(radio_ids,),
+                                      name='pyticc-bus%s' % bus, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the bus workers. Queued packets can still be read."""
+
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.feed.close()
+
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stats(self):
+        """Get per-radio counters and feed counters as a dict."""
+
+        data = {"feed": self.feed.stats()}
+        for radio_id, counters in self.counters.items():
+            data[radio_id] = dict(counters)
+
+        return data
+
+    # Private methods
+    # ---------------------------------
+    def _setup_bus(self, entries, config, factory):
+        radio_ids = []
+        for radio_id, spec in entries:
+            if isinstance(spec, CC1101):
+                radio = spec
+                radio_config = config
+            else:
+                spec = dict(spec)
+                radio_config = dict(config or {})
+                radio_config.update(spec.pop('config', {}))
+                radio = factory(**spec)
+
+            if radio_config:
+                radio.apply_config(radio_config)
+
+            self.radios[radio_id] = radio
+            radio_ids.append(radio_id)
+
+        return radio_ids
+
+    def _run(self, radio_ids):
+        while not self._stop.is_set():
+            busy = False
+            for radio_id in radio_ids:
+                retry = self._retry.get(radio_id)
+                if retry is not None and time.monotonic() < retry[0]:
+                    continue
+
+                try:
+                    busy = self._service(radio_id) or busy
+                except Exception as e:
+                    self.errors[radio_id] = e
+                    self.counters[radio_id]["errors"] += 1
+                    delay = min(retry[1] * 2, self.RETRY_MAX) if retry else self.RETRY_MIN
+                    self._retry[radio_id] = (time.monotonic() + delay, delay)
+                else:
+                    if retry is not None:
+                        del self._retry[radio_id]
+                        self.errors.pop(radio_id, None)
+
+            if not busy:
+                self._stop.wait(self.poll_interval)
+
+    def _service(self, radio_id):
+        """One pass over a radio: pending TX, then the RX FIFO."""
+
+        radio = self.radios[radio_id]
+        counters = self.counters[radio_id]
+        tx = self._tx[radio_id]
+        busy = False
+
+        while True:
+            try:
+                data, future = tx.get_nowait()
+            except queue.Empty:
+                break
+
+            busy = True
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(radio.send_data(data))
+                counters["sent"] += 1
+            except Exception as e:
+                future.set_exception(e)
+                counters["errors"] += 1
+
+        overflows = radio.rx_overflows
+        packets = radio.recv_packets()
+        counters["errors"] += radio.rx_overflows - overflows
+
+        for packet in packets:
+            packet.radio = radio_id
+            self.feed.put(packet)
+        counters["received"] += len(packets)
+
+        return busy or bool(packets)
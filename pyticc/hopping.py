@@ -0,0 +1,226 @@
+import time
+
+from pyticc.solvers import solve_frequency
+
+
+class Hopper(object):
+    """
+    Frequency hopping with calibration done ahead of time.
+
+    Each channel of the hop table is calibrated once, and its FSCAL3,
+    FSCAL2 and FSCAL1 results are kept. With autocalibration turned off
+    (MCSM0.FS_AUTOCAL=0), a hop is then: SIDLE, a write of the channel, a
+    burst write of its calibration, SRX (or STX). No ~700 us calibration on
+    the way back into RX or TX (TI DN505 / SWRA147 fast hopping).
+
+        hopper = Hopper(cc, [0, 10, 20, 30])     # CHANNR values
+        hopper.calibrate()
+        hopper.hop(2)                            # CHANNR=20, calibrated
+        hopper.run(dwell=0.02, hops=100, on_hop=read_packets)
+
+    Channels are CHANNR values (0-255), or carrier frequencies in Hz, which
+    are written to FREQ2..FREQ0 instead. Calibration depends on every
+    other setting (crystal, modulation, ...), so call calibrate() again
+    after changing them.
+
+    args:
+        - radio (CC1101)
+        - channels: list of CHANNR values or frequencies in Hz
+        - [optional] mode (str): state after each hop, rx|tx|idle. default=rx
+        - [optional] burst (bool): write the channel and calibration with
+          one burst, running over the ~28 registers in between with their
+          value at calibration time. This saves a transfer on a fast bus,
+          but reverts any config change made after calibrate(). default=
+          False, two short writes.
+    """
+
+    MODES = ('rx', 'tx', 'idle')
+
+    def __init__(self, radio, channels, mode='rx', burst=False):
+        if mode not in self.MODES:
+            raise ValueError("Unknown hop mode '%s'" % mode)
+        if not channels:
+            raise ValueError("Empty hop table")
+
+        self.radio = radio
+        self.channels = list(channels)
+        self.mode = mode
+        self.burst = burst
+        self.calibration = None
+        self.current = None
+        self.hops = 0
+        self.hop_time_max = 0.0
+        self.hop_time_total = 0.0
+
+        # hopping by FREQ2..FREQ0 when any channel is a frequency
+        self.by_frequency = any(channel > 0xFF for channel in self.channels)
+        self._writes = None
+        self._next = 0
+
+    def __len__(self):
+        return len(self.channels)
+
+    def calibrate(self):
+        """
+        Calibrate every channel and turn autocalibration off.
+
+        One SCAL per channel, then one burst read of FSCAL3..FSCAL1.
+
+        args: none
+        returns: list of (FSCAL3, FSCAL2, FSCAL1), one per channel
+        """
+
+        radio = self.radio
+        with radio.atomic():
+            radio.register_write('MCSM0', 'FS_AUTOCAL[1:0]', 0)
+            radio.sidle()
+
+            calibration = []
+            for channel in self.channels:
+                for addr, data in self._channel_registers(channel):
+                    radio.write_burst(addr, data)
+                radio.strobe(radio.SCAL)
+                radio._run_steps(self._idle_steps())
+                calibration.append(tuple(radio.read_burst(radio.FSCAL3, 3)))
+
+            self.calibration = calibration
+            self._writes = self._compile(radio.register_image())
+            self.current = len(self.channels) - 1
+
+        return calibration
+
+    def hop(self, index=None):
+        """
+        Move to a channel of the hop table.
+
+        args: [optional] index into the hop table. default=the next one.
+        returns: the channel (CHANNR or Hz)
+        """
+
+        if self._writes is None:
+            raise ValueError("Hop table is not calibrated")
+
+        if index is None:
+            index = self._next
+
+        start = time.perf_counter()
+        radio = self.radio
+        with radio.atomic():
+            radio._run_steps(self._hop_steps(index))
+
+        elapsed = time.perf_counter() - start
+        self.hops += 1
+        self.hop_time_total += elapsed
+        self.hop_time_max = max(self.hop_time_max, elapsed)
+
+        self.current = index
+        self._next = (index + 1) % len(self.channels)
+        return self.channels[index]
+
+    def run(self, dwell, hops=None, sequence=None, on_hop=None):
+        """
+        Hop on a fixed schedule.
+
+        Hops are timed against absolute deadlines (start + n * dwell), so
+        time spent in on_hop, or a late wake-up, does not push the rest of
+        the schedule back.
+
+        args:
+            - dwell (float): seconds per channel
+            - [optional] hops (int): number of hops. default=once through
+              the sequence
+            - [optional] sequence: hop table indexes to visit, repeated.
+              default=every channel in order
+            - [optional] on_hop: func(hopper, channel) called after each
+              hop, inside the dwell (read packets, send, ...)
+        returns: dict with hops, late (hops started more than one dwell
+                 late) and max_lateness_us
+        """
+
+        if sequence is None:
+            sequence = range(len(self.channels))
+        sequence = list(sequence)
+        if hops is None:
+            hops = len(sequence)
+
+        late = 0
+        max_lateness = 0.0
+        deadline = time.perf_counter()
+        for n in range(hops):
+            lateness = time.perf_counter() - deadline
+            if lateness > dwell:
+                late += 1
+            max_lateness = max(max_lateness, lateness)
+
+            channel = self.hop(sequence[n % len(sequence)])
+            if on_hop is not None:
+                on_hop(self, channel)
+
+            deadline += dwell
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+        return {"hops": hops, "late": late,
+                "max_lateness_us": max_lateness * 1000000.0}
+
+    def stats(self):
+        """Hop counters, times in microseconds."""
+
+        return {
+            "hops": self.hops,
+            "hop_max_us": self.hop_time_max * 1000000.0,
+            "hop_mean_us": (self.hop_time_total / self.hops * 1000000.0
+                            if self.hops else 0.0),
+        }
+
+    # Private methods
+    # ---------------------------------
+    def _hop_steps(self, index):
+        radio = self.radio
+        radio.strobe(radio.SIDLE)
+        yield from self._idle_steps()
+
+        for addr, data in self._writes[index]:
+            radio.write_burst(addr, data)
+
+        if self.mode == 'rx':
+            # read header, so the status byte counts RX FIFO bytes
+            radio.strobe(radio.SRX | radio.READ_SINGLE_BYTE)
+        elif self.mode == 'tx':
+            radio.strobe(radio.STX)
+
+    def _idle_steps(self):
+        """Wait for IDLE, after SIDLE or SCAL."""
+
+        status = self.radio.read_status()
+        while not (status.chip_ready and status.state == 'IDLE'):
+            yield 1
+            status = self.radio.read_status()
+
+    def _channel_registers(self, channel):
+        """(address, bytes) writes that select a channel."""
+
+        radio = self.radio
+        if not self.by_frequency:
+            return [(radio.CHANNR, bytes([channel]))]
+
+        word = solve_frequency(channel, radio.osc_freq).code
+        return [(radio.FREQ2, bytes([word >> 16 & 0xFF, word >> 8 & 0xFF, word & 0xFF]))]
+
+    def _compile(self, image):
+        """Per channel writes for hop(), built once after calibration."""
+
+        radio = self.radio
+        writes = []
+        for channel, fscal in zip(self.channels, self.calibration):
+            (addr, data), = self._channel_registers(channel)
+            if self.burst:
+                frame = bytearray(image[addr:radio.FSCAL1 + 1])
+                frame[:len(data)] = data
+                frame[radio.FSCAL3 - addr:] = fscal
+                writes.append([(addr, bytes(frame))])
+            else:
+                writes.append([(addr, data), (radio.FSCAL3, bytes(fscal))])
+
+        return writes
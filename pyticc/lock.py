@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class TimedLock(object):
+    """
+    Re-entrant lock that measures how long it is waited for and held.
+
+    Hold times are counted from the outermost acquire to the matching
+    release, so nested atomic sections count once.
+
+    args:
+        - [optional] name (str): shown in repr and stats.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._acquired_at = 0.0
+        self.reset_stats()
+
+    def __repr__(self):
+        return "<TimedLock %s>" % self.name
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def acquire(self, blocking=True, timeout=-1):
+        wait = 0.0
+        if not self._lock.acquire(False):
+            if not blocking:
+                return False
+
+            start = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            wait = time.perf_counter() - start
+            self.contended += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+        self._depth += 1
+        if self._depth == 1:
+            self.acquisitions += 1
+            self._acquired_at = time.perf_counter()
+
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            hold = time.perf_counter() - self._acquired_at
+            self.hold_total += hold
+            self.hold_max = max(self.hold_max, hold)
+
+        self._lock.release()
+
+    def stats(self):
+        """Get counters as a dict, times in microseconds."""
+
+        return {
+            "name": self.name,
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_max_us": self.wait_max * 1e6,
+            "wait_total_us": self.wait_total * 1e6,
+            "hold_max_us": self.hold_max * 1e6,
+            "hold_mean_us": (self.hold_total / self.acquisitions * 1e6
+                             if self.acquisitions else 0.0),
+        }
+
+    def reset_stats(self):
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+
+_bus_locks = {}
+_bus_locks_guard = threading.Lock()
+
+
+def bus_lock(bus):
+    """
+    Get the lock shared by every chip select on one SPI bus.
+
+    args: bus number (or any hashable bus key)
+    returns: TimedLock
+    """
+
+    with _bus_locks_guard:
+        lock = _bus_locks.get(bus)
+        if lock is None:
+            lock = _bus_locks[bus] = TimedLock('spi%s' % (bus,))
+
+        return lock
@@ -0,0 +1,44 @@
+class Packet(object):
+    """
+    A received packet.
+
+    Everything is decoded from the FIFO burst the packet came out in; the
+    link metrics are the ones the chip appended for this packet, not a
+    later read of the RSSI register.
+
+    attributes:
+        - timestamp: time.monotonic() when the packet was read.
+        - data: payload bytes, without length byte or status bytes. With
+          address filtering on, the first byte is the address.
+        - rssi: signal strength in dBm, or None if unknown.
+        - lqi: link quality indicator, or None if unknown.
+        - crc_ok: CRC result, or None if unknown.
+        - address: destination address byte when address filtering is
+          on (PKTCTRL1.ADR_CHK), else None.
+        - radio: id of the receiving radio in a RadioGroup, or None.
+    """
+
+    __slots__ = ('timestamp', 'data', 'rssi', 'lqi', 'crc_ok', 'address', 'radio')
+
+    def __init__(self, timestamp, data, rssi=None, lqi=None, crc_ok=None,
+                 address=None, radio=None):
+        self.timestamp = timestamp
+        self.data = data
+        self.rssi = rssi
+        self.lqi = lqi
+        self.crc_ok = crc_ok
+        self.address = address
+        self.radio = radio
+
+    def __repr__(self):
+        return "<Packet %d bytes rssi=%s lqi=%s crc_ok=%s>" % (
+            len(self.data), self.rssi, self.lqi, self.crc_ok)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def payload(self):
+        """Same as data."""
+
+        return self.data
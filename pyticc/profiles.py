@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+
+# A profile compiled for one chip: the full config register image
+# (CONFIG_SIZE bytes, indexed by address) and the PATABLE (or None).
+RegisterImage = namedtuple('RegisterImage', ['name', 'image', 'patable'])
+
+
+class Profile(object):
+    """
+    Named radio settings.
+
+    A profile is an apply_config() style dict, compiled on top of the
+    chip's reset defaults into a complete register image. Loading that
+    image is one burst write, whatever the profile contains, and needs no
+    read-backs or float math.
+
+        cc.reset()
+        cc.load_profile('433 OOK 4.8k')
+
+    args:
+        - name (str)
+        - config (dict): see CC1101.config_image()
+        - [optional] patable: list of up to 8 PA power bytes.
+    """
+
+    def __init__(self, name, config, patable=None):
+        self.name = name
+        self.config = config
+        self.patable = None if patable is None else bytes(patable)
+
+    def __repr__(self):
+        return "<Profile %s>" % self.name
+
+    def compile(self, radio):
+        """
+        Compute the register image. No SPI traffic.
+
+        args: radio (CC1101) the image is for; only its osc_freq and
+              register schema are used.
+        returns: RegisterImage
+        """
+
+        image = radio.config_image(self.config, radio.RESET_DEFAULTS)
+        if self.patable is not None and len(self.patable) > radio.PATABLE_SIZE:
+            raise ValueError("PATABLE holds %d bytes" % radio.PATABLE_SIZE)
+
+        return RegisterImage(self.name, bytes(image), self.patable)
+
+    def key(self, radio):
+        """Cache key: changes with the settings and the crystal."""
+
+        source = json.dumps([self.config, list(self.patable or []),
+                             radio.osc_freq], sort_keys=True)
+        return hashlib.sha1(source.encode()).hexdigest()
+
+
+PROFILES = {}
+
+
+def register_profile(profile):
+    """Add a Profile to the PROFILES catalog. returns: the profile"""
+
+    PROFILES[profile.name] = profile
+    return profile
+
+
+def get_profile(profile):
+    """
+    Look a profile up by name.
+
+    args: profile name, Profile or RegisterImage (returned as is).
+    """
+
+    if isinstance(profile, (Profile, RegisterImage)):
+        return profile
+
+    if profile not in PROFILES:
+        raise ValueError("Unknown profile '%s'" % profile)
+
+    return PROFILES[profile]
+
+
+# Receiver setup of tests/test_rx.py, with the ASK/OOK values of TI DN022.
+# PATABLE index 0 is the "0" symbol, index 1 the "1" symbol.
+register_profile(Profile('433 OOK 4.8k', {
+    'base_frequency': 433,
+    'baud_rate': 4800,
+    'modulation': 'OOK',
+    'packet_length': 'PKT_LEN_FIXED',
+    'rx_bandwidth': 232000,
+    'manchester': 1,
+    'whitening': 0,
+    'sync_word': '0000',
+    'MDMCFG2': {'SYNC_MODE[2:0]': '000'},
+    'AGCCTRL2': 0x83,
+    'AGCCTRL1': 0x00,
+    'AGCCTRL0': 0x91,
+    'FREND1': 0xB6,
+    'FREND0': {'PA_POWER[2:0]': 1},
+    'TEST2': 0x81,
+    'TEST1': 0x35,
+    'FIFOTHR': 0x47,
+}, patable=[0x00, 0xC0]))
+
+register_profile(Profile('868 GFSK 38.4k', {
+    'base_frequency': 868,
+    'baud_rate': 38400,
+    'modulation': 'GFSK',
+    'packet_length': 'PKT_LEN_VARIABLE',
+    'rx_bandwidth': 100000,
+    'DEVIATN': 0x34,
+    'sync_word': 'D391',
+    'MDMCFG2': {'SYNC_MODE[2:0]': '011'},
+    'MCSM0': {'FS_AUTOCAL[1:0]': '01'},
+    'FREND1': 0x56,
+    'FREND0': 0x10,
+}, patable=[0xC0]))
+
+
+class ProfileCache(object):
+    """
+    Compiled profiles, kept in a small JSON file.
+
+    Entries are keyed by a hash of the profile settings and the crystal
+    frequency, so a changed profile is compiled again. The file is
+    rewritten whenever a new image is added.
+
+        cache = ProfileCache('/var/cache/pyticc/profiles.json')
+        cc.load_profile('433 OOK 4.8k', cache=cache)
+
+    args:
+        - [optional] path (str): JSON file. default=None, memory only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+        if path is not None and os.path.exists(path):
+            with open(path) as fh:
+                self.entries = json.load(fh)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, profile, radio):
+        """
+        Get a compiled profile, compiling and storing it on a miss.
+
+        args:
+            - profile name or Profile
+            - radio (CC1101) the image is for
+        returns: RegisterImage
+        """
+
+        profile = get_profile(profile)
+        if isinstance(profile, RegisterImage):
+            return profile
+
+        key = profile.key(radio)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            patable = entry['patable']
+            return RegisterImage(entry['name'], bytes.fromhex(entry['image']),
+                                 None if patable is None else bytes.fromhex(patable))
+
+        self.misses += 1
+        compiled = profile.compile(radio)
+        self.entries[key] = {
+            'name': compiled.name,
+            'image': compiled.image.hex(),
+            'patable': None if compiled.patable is None else compiled.patable.hex(),
+        }
+        self.save()
+        return compiled
+
+    def save(self):
+        if self.path is None:
+            return
+
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(self.entries, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+# SmartRF Studio export
+# ---------------------------------
+_SMARTRF_PREFIX = re.compile(r'^(?:SMARTRF_SETTING_|CC1101_|RF_)')
+_SMARTRF_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_SMARTRF_PATABLE = re.compile(r'^PA_?TABLE(\d?)$')
+_SMARTRF_HEX = re.compile(r'0x([0-9A-Fa-f]{1,2})\b')
+
+
+def parse_smartrf(text, registers):
+    """
+    Read register values from a SmartRF Studio export.
+
+    Understands the usual export templates, one register per line with
+    the value as the last hex literal on it:
+
+        #define SMARTRF_SETTING_FSCTRL1     0x06
+        {CC1101_IOCFG0, 0x06},  // GDO0 Output Pin Configuration
+        FREQ2       0x0D    0x10
+
+    A PA_TABLE / PATABLE line gives the PATABLE bytes, as do PA_TABLE0,
+    PA_TABLE1, ... lines. Anything else is ignored.
+
+    args:
+        - text (str): export file contents
+        - registers: config register names, like CC1101.fields names
+    returns: ({register name: byte}, patable list or None)
+    """
+
+    registers = set(registers)
+    config = {}
+    patable = None
+
+    for line in text.splitlines():
+        line = line.split('//')[0]
+        values = _SMARTRF_HEX.findall(line)
+        if not values:
+            continue
+
+        for token in _SMARTRF_NAME.findall(line):
+            name = _SMARTRF_PREFIX.sub('', token.upper())
+            match = _SMARTRF_PATABLE.match(name)
+            if match:
+                if match.group(1):
+                    # one entry per line: PA_TABLE0, PA_TABLE1, ...
+                    index = int(match.group(1))
+                    patable = patable or []
+                    patable.extend([0] * (index + 1 - len(patable)))
+                    patable[index] = int(values[-1], 16)
+                else:
+                    patable = [int(value, 16) for value in values]
+                break
+            if name in registers:
+                config[name] = int(values[-1], 16)
+                break
+
+    return config, patable
+
+
+def load_smartrf(path, radio, name=None):
+    """
+    Make a Profile from a SmartRF Studio export file.
+
+    args:
+        - path (str)
+        - radio (CC1101): chip whose register names to look for.
+        - [optional] name (str): default=file name
+    returns: Profile
+    """
+
+    with open(path) as fh:
+        text = fh.read()
+
+    names = [register.name for register in radio.fields
+             if register.address < radio.CONFIG_SIZE]
+    config, patable = parse_smartrf(text, names)
+    if not config:
+        raise ValueError("No register settings found in '%s'" % path)
+
+    return Profile(name or os.path.basename(path), config, patable)
@@ -0,0 +1,238 @@
+import queue
+import threading
+
+
+class PacketRing(object):
+    """
+    Bounded, preallocated ring buffer between the RX thread and consumers.
+
+    args:
+        - capacity (int): number of slots.
+        - [optional] policy (str): what put() does when the ring is full.
+            drop-oldest: overwrite the oldest entry. (default)
+            drop-newest: discard the new entry.
+            block: wait for a consumer to make room.
+    """
+
+    POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+    def __init__(self, capacity, policy='drop-oldest'):
+        if capacity < 1:
+            raise ValueError("Ring capacity must be at least 1")
+        if policy not in self.POLICIES:
+            raise ValueError("Unknown overflow policy '%s'" % policy)
+
+        self.capacity = capacity
+        self.policy = policy
+        self._slots = [None] * capacity
+        self._head = 0
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.put_count = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.high_water = 0
+
+    def __len__(self):
+        return self._count
+
+    def put(self, item, timeout=None):
+        """
+        Add an item, applying the overflow policy if full.
+
+        args:
+            - item
+            - [optional] timeout in seconds, for the block policy.
+        returns: True if the item was stored.
+        """
+
+        with self._cond:
+            if self._count == self.capacity:
+                if self.policy == 'drop-newest':
+                    self.dropped_newest += 1
+                    return False
+
+                if self.policy == 'drop-oldest':
+                    self._head = (self._head + 1) % self.capacity
+                    self._count -= 1
+                    self.dropped_oldest += 1
+
+                elif not self._cond.wait_for(
+                        lambda: self._count < self.capacity or self._closed, timeout) \
+                        or self._closed:
+                    self.dropped_newest += 1
+                    return False
+
+            self._slots[(self._head + self._count) % self.capacity] = item
+            self._count += 1
+            self.put_count += 1
+            self.high_water = max(self.high_water, self._count)
+            self._cond.notify_all()
+            return True
+
+    def get(self, block=True, timeout=None):
+        """
+        Remove and return the oldest item.
+
+        raises: queue.Empty if nothing arrives in time, or the ring is
+                closed and drained.
+        """
+
+        with self._cond:
+            if block and not self._cond.wait_for(
+                    lambda: self._count or self._closed, timeout):
+                raise queue.Empty()
+
+            if not self._count:
+                raise queue.Empty()
+
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Wake up everyone waiting; get() raises once the ring is drained."""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        """Get ring counters as a dict."""
+
+        return {
+            "queued": self._count,
+            "put": self.put_count,
+            "dropped_oldest": self.dropped_oldest,
+            "dropped_newest": self.dropped_newest,
+            "high_water": self.high_water,
+        }
+
+
+class Receiver(object):
+    """
+    Runs a radio's RX loop on its own thread.
+
+    Packets are timestamped as soon as they leave the chip and pushed into
+    a PacketRing, so a slow consumer never holds up FIFO reads. If the RX
+    loop fails, the thread stops, and once the queued packets are read
+    get() and iteration raise the error (also kept in self.error).
+
+    args:
+        - radio: CC1101
+        - [optional] capacity (int): ring slots. default=64
+        - [optional] policy (str): ring overflow policy. default=drop-oldest
+        - [optional] edge: pyticc.gpio.EdgeSource. Wait on GDO edges
+          instead of polling.
+        - [optional] poll_interval: seconds between polls. default=0.001
+    """
+
+    def __init__(self, radio, capacity=64, policy='drop-oldest', edge=None,
+                 poll_interval=0.001):
+        self.radio = radio
+        self.ring = PacketRing(capacity, policy)
+        self.edge = edge
+        self.poll_interval = poll_interval
+        self.received = 0
+        self.errors = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __iter__(self):
+        """Yield packets until the receiver is stopped and drained."""
+
+        while True:
+            try:
+                yield self.ring.get()
+            except queue.Empty:
+                if self.error is not None:
+                    raise self.error
+                return
+
+    def get(self, timeout=None):
+        """
+        Get the next packet.
+
+        raises: queue.Empty on timeout, or the exception that stopped the
+                RX thread.
+        """
+
+        try:
+            return self.ring.get(timeout=timeout)
+        except queue.Empty:
+            if self.error is not None:
+                raise self.error
+            raise
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Receiver already running")
+
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name='pyticc-rx',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the RX thread. Queued packets can still be read."""
+
+        self._stop.set()
+        self.ring.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self):
+        """Get receive and ring counters as a dict."""
+
+        data = self.ring.stats()
+        data.update({"received": self.received, "errors": self.errors})
+        return data
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                for packet in self._poll():
+                    self.received += 1
+                    self.ring.put(packet)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ring.close()
+
+    def _poll(self):
+        """Fetch whatever the radio has. returns: list of Packet"""
+
+        radio = self.radio
+        if self.edge is not None:
+            # the chip only raises the GDO pin while it is receiving; it
+            # may have gone to IDLE after the last packet (RXOFF_MODE)
+            radio.enable_rx()
+            if not self.edge.wait(0.1):
+                return []
+
+        overflows = radio.rx_overflows
+        packets = radio.recv_packets()
+        self.errors += radio.rx_overflows - overflows
+
+        if not packets:
+            if self.edge is None:
+                self._stop.wait(self.poll_interval)
+            return []
+
+        for packet in packets:
+            if packet.rssi is None:
+                packet.rssi = radio.rssi()
+                packet.lqi = radio.read_byte(radio.LQI) & 0x7F
+
+        return packets
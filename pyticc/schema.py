@@ -0,0 +1,258 @@
+import re
+
+from pyticc.utils import byte_bit_values
+
+
+class Field(object):
+    """
+    One bit field of a register, with precomputed mask and shift.
+
+    Indexing follows pyticc.utils: index 0 is the msb.
+    """
+
+    __slots__ = ('register', 'address', 'name', 'attr', 'index', 'bits',
+                 'shift', 'mask')
+
+    def __init__(self, register, address, name, index, bits):
+        self.register = register
+        self.address = address
+        self.name = name
+        self.attr = name
+        self.index = index
+        self.bits = bits
+        self.shift = 8 - (index + bits)
+        self.mask = (1 << bits) - 1
+
+    def __repr__(self):
+        return "<Field %s.%s [%d,%d]>" % (self.register, self.name,
+                                          self.index, self.bits)
+
+    def decode(self, byte):
+        """Extract this field's value from a register byte."""
+
+        return (byte >> self.shift) & self.mask
+
+    def encode(self, byte, value):
+        """
+        Update this field inside a register byte.
+
+        args:
+            - register byte (int)
+            - new value (int, or bit string like '011')
+        returns: new byte value (int)
+        """
+
+        if type(value) is str:
+            value = int(value, 2)
+
+        if value < 0 or value > self.mask:
+            raise ValueError("Value %d does not fit in %s.%s" %
+                             (value, self.register, self.name))
+
+        return (byte & ~(self.mask << self.shift) & 0xFF) | (value << self.shift)
+
+
+class Register(object):
+    """
+    Compiled register description.
+
+    Fields are reachable by spec sheet name (register['MOD_FORMAT[2:0]'])
+    or, with the bit range dropped, as attributes (register.MOD_FORMAT).
+    """
+
+    def __init__(self, name, address, fields):
+        self.name = name
+        self.address = address
+        self.fields = tuple(fields)
+        self._by_name = {}
+        self._decoder = tuple((f.name, f.shift, f.mask) for f in self.fields)
+
+        for field in self.fields:
+            self._by_name[field.name] = field
+            self._by_name[field.attr] = field
+            setattr(self, field.attr, field)
+
+    def __repr__(self):
+        return "<Register %s 0x%02X>" % (self.name, self.address)
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def decode(self, byte):
+        """Decode a register byte into {field name: value}."""
+
+        return {name: (byte >> shift) & mask for name, shift, mask in self._decoder}
+
+
+class RegisterTable(object):
+    """
+    All compiled registers of a chip, by name and by address.
+
+    Registers are also attributes, so fields can be reached like:
+
+        cc.fields.MDMCFG2.MOD_FORMAT
+    """
+
+    def __init__(self, registers):
+        self.registers = tuple(registers)
+        self._by_name = {}
+        self._by_address = {}
+
+        for register in self.registers:
+            self._by_name[register.name] = register
+            self._by_address[register.address] = register
+            setattr(self, register.name, register)
+
+    def __getitem__(self, key):
+        """Get register by name or address."""
+
+        try:
+            if type(key) is int:
+                return self._by_address[key]
+            return self._by_name[key]
+        except KeyError:
+            raise ValueError("Register name '%s' not found" % key)
+
+    def __contains__(self, key):
+        return key in self._by_name or key in self._by_address
+
+    def __iter__(self):
+        return iter(self.registers)
+
+    def __len__(self):
+        return len(self.registers)
+
+    def decode(self, key, byte):
+        """Decode byte of the named register into {field name: value}."""
+
+        return self[key].decode(byte)
+
+    def decode_array(self, images, registers=None):
+        """
+        Decode many register snapshots at once. Requires numpy.
+
+        args:
+            - images: array-like (N, registers) of register dumps,
+              indexed by address (i.e. N x CONFIG_SIZE burst reads).
+            - [optional] registers: names to decode. Default is every
+              register whose address is inside the snapshot.
+        returns:
+            numpy structured array of shape (N,), with one field per
+            register field, named like 'MDMCFG2.MOD_FORMAT'.
+        """
+
+        width = len(images[0]) if len(images) else 0
+        if registers is None:
+            registers = [r for r in self.registers if r.address < width]
+        else:
+            registers = [self[name] for name in registers]
+
+        schemas = {}
+        for register in registers:
+            for field in register.fields:
+                key = '%s.%s' % (register.name, field.attr)
+                schemas[key] = [register.address, field.index, field.bits]
+
+        return byte_bit_values(images, schemas)
+
+
+class SchemaTable(object):
+    """
+    Class attribute that compiles the owner's REGISTER_SCHEMA.
+
+    The table is built once per class, on first access.
+    """
+
+    def __init__(self):
+        self._tables = {}
+
+    def __get__(self, obj, owner):
+        table = self._tables.get(owner)
+        if table is None:
+            table = compile_schema(owner.REGISTER_SCHEMA, owner)
+            self._tables[owner] = table
+
+        return table
+
+
+def compile_schema(spec, addresses):
+    """
+    Compile and validate a register schema.
+
+    args:
+        - spec: sequence of (register name, ((field name, index, bits), ...))
+        - addresses: object holding register addresses as attributes.
+
+    returns: RegisterTable
+    raises: ValueError on duplicate registers/fields, overlapping bits,
+            or fields that do not fit in a byte.
+    """
+
+    registers = []
+    seen_names = set()
+    seen_addresses = {}
+
+    for reg_name, field_specs in spec:
+        if reg_name in seen_names:
+            raise ValueError("Duplicate register '%s' in schema" % reg_name)
+        seen_names.add(reg_name)
+
+        address = getattr(addresses, reg_name, None)
+        if type(address) is not int:
+            raise ValueError("No address for register '%s'" % reg_name)
+        if address in seen_addresses:
+            raise ValueError("Registers '%s' and '%s' share address 0x%02X" %
+                             (seen_addresses[address], reg_name, address))
+        seen_addresses[address] = reg_name
+
+        fields = []
+        used = 0
+        for field_name, index, bits in field_specs:
+            if index < 0 or index > 7 or bits < 1 or index + bits > 8:
+                raise ValueError("Field %s.%s [%d,%d] does not fit in a byte" %
+                                 (reg_name, field_name, index, bits))
+
+            field = Field(reg_name, address, field_name, index, bits)
+            if field.mask << field.shift & used:
+                raise ValueError("Field %s.%s overlaps another field" %
+                                 (reg_name, field_name))
+            used |= field.mask << field.shift
+            fields.append(field)
+
+        _assign_attr_names(reg_name, fields)
+        registers.append(Register(reg_name, address, fields))
+
+    return RegisterTable(registers)
+
+
+def _assign_attr_names(reg_name, fields):
+    """
+    Pick python attribute names for fields.
+
+    'MOD_FORMAT[2:0]' becomes MOD_FORMAT. When two fields of one register
+    share a base name (FREQ[23:22] / FREQ[21:16]) the bit range is kept,
+    as FREQ_23_22 and FREQ_21_16.
+    """
+
+    names = [f.name for f in fields]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate field in register '%s'" % reg_name)
+
+    short = [re.sub(r'\[.*\]$', '', n) for n in names]
+    for field, attr in zip(fields, short):
+        if short.count(attr) > 1:
+            attr = re.sub(r'\[(\d+)(?::(\d+))?\]$',
+                          lambda m: '_' + '_'.join(g for g in m.groups() if g),
+                          field.name)
+        if attr in ('name', 'address', 'fields', 'decode', 'get'):
+            raise ValueError("Field name %s.%s is reserved" % (reg_name, attr))
+        field.attr = attr
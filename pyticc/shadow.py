@@ -0,0 +1,130 @@
+class RegisterShadow(object):
+    """
+    Write-through copy of a chip's configuration register space.
+
+    Values land here whenever they are written to, or read from, the chip,
+    so later reads of the same register can be answered without any SPI
+    traffic. Registers that the chip may have changed behind our back
+    (after a reset, sleep or a synthesizer calibration) are marked invalid
+    and fetched again on next use.
+
+    args:
+        - size (int): number of config registers, starting at address 0x00.
+        - volatile (iterable): addresses that are lost in SLEEP.
+        - [optional] calibration (iterable): addresses the chip rewrites
+          when it calibrates the synthesizer.
+    """
+
+    def __init__(self, size, volatile=(), calibration=()):
+        self.size = size
+        self.volatile = tuple(volatile)
+        self.calibration = tuple(calibration)
+        self.values = bytearray(size)
+        self.valid = [False] * size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def __contains__(self, addr):
+        return type(addr) is int and 0 <= addr < self.size
+
+    def get(self, addr):
+        """
+        Get cached register value.
+
+        args: register address (int)
+        returns: int, or None if the cached copy is not valid.
+        """
+
+        if self.valid[addr]:
+            self.hits += 1
+            return self.values[addr]
+
+        self.misses += 1
+        return None
+
+    def set(self, addr, value):
+        """Store a value that was written to, or read from, the chip."""
+
+        self.values[addr] = value & 0xFF
+        self.valid[addr] = True
+        self.writes += 1
+
+    def update(self, addr, data):
+        """
+        Store a run of consecutive register values (burst access).
+
+        Bytes that fall outside of the config space are ignored.
+        """
+
+        for offset, value in enumerate(data):
+            if addr + offset >= self.size:
+                break
+            self.set(addr + offset, value)
+
+    def invalidate(self, addrs=None):
+        """
+        Mark registers as unknown.
+
+        args: [optional] iterable of addresses. Default is everything.
+        """
+
+        if addrs is None:
+            self.valid = [False] * self.size
+            return
+
+        for addr in addrs:
+            self.valid[addr] = False
+
+    def sleep(self):
+        """Forget the registers that do not survive SLEEP."""
+
+        self.invalidate(self.volatile)
+
+    def calibrated(self):
+        """Forget the registers written by a synthesizer calibration."""
+
+        self.invalidate(self.calibration)
+
+    def complete(self):
+        """True if every config register has a valid cached value."""
+
+        return all(self.valid)
+
+    def image(self):
+        """
+        Get the full cached register image.
+
+        returns: bytes, or None if any register is unknown.
+        """
+
+        if not self.complete():
+            return None
+
+        return bytes(self.values)
+
+    def hit_rate(self):
+        """Fraction of cached reads answered without bus traffic."""
+
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+
+        return self.hits / float(total)
+
+    def stats(self):
+        """Get cache counters as a dict."""
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": self.hit_rate(),
+        }
+
+    def reset_stats(self):
+        """Zero the cache counters."""
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
@@ -0,0 +1,518 @@
+import threading
+from collections import deque
+
+from pyticc.cc1101 import CC1101
+from pyticc.utils import busy_wait
+
+
+class SimulatedCC1101(object):
+    """
+    Software CC1101 behind the spidev.SpiDev interface.
+
+    Pass it as the "spi" keyword-arg and CC1101 talks to it like to a real
+    chip, with no hardware attached:
+
+        sim = SimulatedCC1101()
+        cc = CC1101(spi=sim)
+        cc.enable_rx()
+        sim.inject(b'hello', rssi=-60)
+        packet = cc.recv_data()
+        packet.data, packet.rssi, packet.crc_ok
+        (b'hello', -60.0, True)
+
+    What is modelled:
+        - config registers with reset defaults, PATABLE and status
+          registers, with single and burst read/write semantics.
+        - the chip status byte clocked out with every byte.
+        - command strobes and the MARCSTATE state machine, including
+          RXOFF_MODE/TXOFF_MODE, CCA and SLEEP (which loses the TEST
+          registers and PATABLE).
+        - 64 byte RX/TX FIFOs with RXFIFO_OVERFLOW / TXFIFO_UNDERFLOW.
+        - packet framing for fixed, variable and infinite length modes,
+          APPEND_STATUS, CRC autoflush and address filtering.
+        - synthesizer calibration (SCAL and FS_AUTOCAL from IDLE): the
+          FSCAL3/2/1 results are made-up values that depend only on the
+          carrier frequency, and "pll_lock" tells whether the values in
+          the registers match the frequency the synthesizer last started
+          on.
+
+    The radio link is instant by default: an injected packet lands in the
+    RX FIFO as soon as the chip is in RX, and a TX packet leaves as soon as
+    it is complete in the TX FIFO. With "bytes_per_xfer" the link moves
+    that many bytes per SPI transfer instead, so long packets trickle
+    through the FIFOs and can overflow or underflow them. Calibration and
+    PLL settling take no time.
+
+    Bus timing can be simulated too: each transfer then takes "latency"
+    seconds plus "byte_time" seconds per byte clocked, busy-waited so
+    microsecond delays are honoured.
+
+    args:
+        - [optional] bytes_per_xfer (int): link speed in bytes per SPI
+          transfer. default=None, instant.
+        - [optional] latency (float): seconds per transfer. default=0
+        - [optional] byte_time (float): seconds per byte. default=0
+        - [optional] partnum (int): PARTNUM register. default=0x00
+        - [optional] version (int): VERSION register. default=0x14
+    """
+
+    RESET_DEFAULTS = CC1101.RESET_DEFAULTS
+    PATABLE_DEFAULTS = CC1101.PATABLE_DEFAULTS
+
+    # MARCSTATE values
+    SLEEP = 0x00
+    IDLE = 0x01
+    XOFF = 0x02
+    RX = 0x0D
+    RXFIFO_OVERFLOW = 0x11
+    FSTXON = 0x12
+    TX = 0x13
+    TXFIFO_UNDERFLOW = 0x16
+
+    # MARCSTATE -> STATE[2:0] of the chip status byte
+    STATUS_STATES = {SLEEP: 0, IDLE: 0, XOFF: 0, RX: 1, RXFIFO_OVERFLOW: 6,
+                     FSTXON: 3, TX: 2, TXFIFO_UNDERFLOW: 7}
+
+    # RXOFF_MODE / TXOFF_MODE -> next state
+    OFF_MODES = (IDLE, FSTXON, TX, RX)
+
+    def __init__(self, bytes_per_xfer=None, latency=0.0, byte_time=0.0,
+                 partnum=0x00, version=0x14):
+        self.bytes_per_xfer = bytes_per_xfer
+        self.latency = latency
+        self.byte_time = byte_time
+        self.partnum = partnum
+        self.version = version
+
+        # spidev.SpiDev attributes
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.bits_per_word = 8
+
+        self.rssi = -100.0          # channel RSSI in dBm when not receiving,
+                                    # or func(carrier Hz) -> dBm
+        self.osc_freq = 26000000
+        self.channel_clear = True   # CCA result for STX in RX
+        self.tx_hook = None         # called with each transmitted payload
+        self.transmitted = []       # payloads sent, oldest first
+        self.air = deque()          # injected packets not received yet
+        self.dropped = 0            # injected packets filtered by the chip
+        self.transfers = 0
+        self.bytes_clocked = 0
+        self.calibrations = 0       # SCAL strobes and autocalibrations
+        self.pll_lock = False
+
+        self._lock = threading.RLock()
+        self.reset()
+
+    # spidev.SpiDev interface
+    # ---------------------------------
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
+
+    def xfer(self, data):
+        """One SPI transaction (CSn low, clock data, CSn high)."""
+
+        with self._lock:
+            if self.latency or self.byte_time:
+                busy_wait(self.latency + self.byte_time * len(data))
+
+            self.transfers += 1
+            self.bytes_clocked += len(data)
+            if self.state in (self.SLEEP, self.XOFF):
+                self._wake()
+
+            self._link()
+            out = self._transact(list(data))
+
+            if self._power_down and self.state == self.IDLE:
+                self._sleep()
+            self._power_down = False
+            return out
+
+    xfer2 = xfer
+
+    # test and load hooks
+    # ---------------------------------
+    def inject(self, payload, rssi=-60.0, lqi=20, crc_ok=True):
+        """
+        Put a packet on the air. It is received next time the chip is in RX.
+
+        args:
+            - payload: bytes-like, without length byte or status bytes.
+            - [optional] rssi (float): dBm reported for the packet.
+            - [optional] lqi (int): link quality, 0 thru 127.
+            - [optional] crc_ok (bool): CRC result reported for the packet.
+        """
+
+        with self._lock:
+            self.air.append((bytes(payload), rssi, lqi, crc_ok))
+
+    def reset(self):
+        """Power-on reset, same as an SRES strobe."""
+
+        self.registers = bytearray(self.RESET_DEFAULTS)
+        self.patable = bytearray(self.PATABLE_DEFAULTS)
+        self.rx_fifo = bytearray()
+        self.tx_fifo = bytearray()
+        self.state = self.IDLE
+        self.lqi = 0x00
+        self.pktstatus = 0x00
+        self._rx_frame = None
+        self._rx_status = None
+        self._tx_sent = bytearray()
+        self._power_down = False
+
+    # SPI protocol
+    # ---------------------------------
+    def _transact(self, data):
+        header = data[0]
+        addr = header & 0x3F
+        read = header & 0x80
+        burst = header & 0x40
+        status = self._status_byte(read)
+
+        if 0x30 <= addr <= 0x3D and not burst:
+            # command strobe, anything after it is a new header
+            self._strobe(addr)
+            out = [status]
+            if len(data) > 1:
+                out += self._transact(data[1:])
+            return out
+
+        out = [status]
+        count = len(data) - 1
+        if 0x30 <= addr <= 0x3D:
+            out += [self._status_register(header | 0xC0)] * count
+
+        elif addr == 0x3E:
+            for i, value in enumerate(data[1:]):
+                index = (i if burst else 0) & 0x07
+                if read:
+                    out.append(self.patable[index])
+                else:
+                    self.patable[index] = value
+                    out.append(status)
+
+        elif addr == 0x3F:
+            if read:
+                for _ in range(count):
+                    out.append(self.rx_fifo.pop(0) if self.rx_fifo else 0)
+            else:
+                for value in data[1:]:
+                    out.append(self._status_byte(False))
+                    if len(self.tx_fifo) >= CC1101.FIFO_SIZE:
+                        self.state = self.TXFIFO_UNDERFLOW
+                    else:
+                        self.tx_fifo.append(value)
+
+        else:
+            for i, value in enumerate(data[1:]):
+                reg = addr + i if burst else addr
+                if reg >= len(self.registers):
+                    out.append(0x00 if read else status)
+                elif read:
+                    out.append(self.registers[reg])
+                else:
+                    self.registers[reg] = value
+                    out.append(status)
+
+        return out
+
+    def _status_byte(self, read):
+        state = self.STATUS_STATES.get(self.state, 0)
+        if read:
+            fifo = len(self.rx_fifo)
+        else:
+            fifo = CC1101.FIFO_SIZE - len(self.tx_fifo)
+
+        return state << 4 | min(fifo, 15)
+
+    def _status_register(self, addr):
+        if addr == CC1101.PARTNUM:
+            return self.partnum
+        if addr == CC1101.VERSION:
+            return self.version
+        if addr == CC1101.LQI:
+            return self.lqi
+        if addr == CC1101.RSSI:
+            if callable(self.rssi):
+                return _rssi_raw(self.rssi(self._carrier() * self.osc_freq / 2.0 ** 18))
+            return _rssi_raw(self.rssi)
+        if addr == CC1101.MARCSTATE:
+            return self.state
+        if addr == CC1101.PKTSTATUS:
+            return self.pktstatus | (0x10 if self.channel_clear else 0x00)
+        if addr == CC1101.TXBYTES:
+            return (0x80 if self.state == self.TXFIFO_UNDERFLOW else 0) | len(self.tx_fifo)
+        if addr == CC1101.RXBYTES:
+            return (0x80 if self.state == self.RXFIFO_OVERFLOW else 0) | len(self.rx_fifo)
+
+        return 0x00
+
+    def _strobe(self, addr):
+        if addr == CC1101.SRES:
+            self.reset()
+        elif addr == CC1101.SIDLE:
+            self._idle()
+        elif addr == CC1101.SRX or addr == CC1101.SWOR:
+            if self.state in (self.IDLE, self.FSTXON, self.TX):
+                self._synth_on()
+                self._idle()
+                self.state = self.RX
+        elif addr == CC1101.STX:
+            if self.state == self.RX:
+                cca_mode = (self.registers[CC1101.MCSM1] >> 4) & 0x03
+                if cca_mode and not self.channel_clear:
+                    return
+                self._idle()
+                self.state = self.TX
+            elif self.state in (self.IDLE, self.FSTXON):
+                self._synth_on()
+                self.state = self.TX
+        elif addr == CC1101.SFSTXON:
+            if self.state in (self.IDLE, self.RX):
+                self._synth_on()
+                self._idle()
+                self.state = self.FSTXON
+        elif addr == CC1101.SCAL:
+            if self.state == self.IDLE:
+                self._calibrate()
+        elif addr == CC1101.SFRX:
+            del self.rx_fifo[:]
+            self._rx_frame = None
+            if self.state == self.RXFIFO_OVERFLOW:
+                self.state = self.IDLE
+        elif addr == CC1101.SFTX:
+            del self.tx_fifo[:]
+            del self._tx_sent[:]
+            if self.state == self.TXFIFO_UNDERFLOW:
+                self.state = self.IDLE
+        elif addr == CC1101.SXOFF:
+            if self.state == self.IDLE:
+                self.state = self.XOFF
+        elif addr == CC1101.SPWD:
+            # takes effect when CSn goes high
+            self._power_down = True
+
+    def _idle(self):
+        """Abort whatever is on the air and go to IDLE."""
+
+        self._rx_frame = None
+        del self._tx_sent[:]
+        self.state = self.IDLE
+
+    def _synth_on(self):
+        """Synthesizer starts from IDLE, with FS_AUTOCAL=1 it calibrates first."""
+
+        if self.state == self.IDLE and (self.registers[CC1101.MCSM0] >> 4) & 0x03 == 1:
+            self._calibrate()
+
+        if self.state == self.IDLE:
+            registers = self.registers
+            self.pll_lock = (
+                (registers[CC1101.FSCAL3] & 0x0F, registers[CC1101.FSCAL2] & 0x3F,
+                 registers[CC1101.FSCAL1] & 0x3F) == self._fscal(self._carrier()))
+
+    def _calibrate(self):
+        fscal3, fscal2, fscal1 = self._fscal(self._carrier())
+        registers = self.registers
+        registers[CC1101.FSCAL3] = (registers[CC1101.FSCAL3] & 0xF0) | fscal3
+        registers[CC1101.FSCAL2] = (registers[CC1101.FSCAL2] & 0xC0) | fscal2
+        registers[CC1101.FSCAL1] = (registers[CC1101.FSCAL1] & 0xC0) | fscal1
+        self.calibrations += 1
+
+    def _carrier(self):
+        """Carrier frequency, in quarter FREQ steps (FREQ + CHANNR * spacing)."""
+
+        registers = self.registers
+        freq = (registers[CC1101.FREQ2] << 16 | registers[CC1101.FREQ1] << 8 |
+                registers[CC1101.FREQ0])
+        chanspc_e = registers[CC1101.MDMCFG1] & 0x03
+        chanspc_m = registers[CC1101.MDMCFG0]
+        return freq * 4 + registers[CC1101.CHANNR] * (256 + chanspc_m) * 2 ** chanspc_e
+
+    def _fscal(self, carrier):
+        mixed = (carrier * 2654435761) & 0xFFFFFFFF
+        return (mixed >> 8) & 0x0F, (mixed >> 12) & 0x3F, (mixed >> 18) & 0x3F
+
+    def _sleep(self):
+        self.state = self.SLEEP
+        del self.rx_fifo[:]
+        del self.tx_fifo[:]
+
+    def _wake(self):
+        if self.state == self.SLEEP:
+            for addr in CC1101.SLEEP_LOST:
+                self.registers[addr] = self.RESET_DEFAULTS[addr]
+            self.patable[:] = self.PATABLE_DEFAULTS
+        self.state = self.IDLE
+
+    # radio link
+    # ---------------------------------
+    def _link(self):
+        budget = self.bytes_per_xfer
+        if self.state == self.RX:
+            self._receive(budget)
+        elif self.state == self.TX:
+            self._transmit(budget)
+
+    def _receive(self, budget):
+        """Move air bytes into the RX FIFO."""
+
+        while self.state == self.RX:
+            if self._rx_frame is None:
+                if not self.air:
+                    return
+                self._rx_frame = self._rx_framing(*self.air.popleft())
+                if self._rx_frame is None:
+                    self.dropped += 1
+                    continue
+
+            frame = self._rx_frame
+            count = len(frame) if budget is None else min(budget, len(frame))
+            self.rx_fifo += frame[:count]
+            del frame[:count]
+
+            if len(self.rx_fifo) > CC1101.FIFO_SIZE:
+                del self.rx_fifo[CC1101.FIFO_SIZE:]
+                self._rx_frame = None
+                self.state = self.RXFIFO_OVERFLOW
+                return
+
+            if not frame and not self._packet_end():
+                self._rx_frame = None
+                self.state = self.OFF_MODES[(self.registers[CC1101.MCSM1] >> 2) & 0x03]
+
+            if budget is not None:
+                budget -= count
+                if budget <= 0:
+                    return
+
+    def _packet_end(self):
+        """
+        Latch LQI/CRC status at the end of a packet, and queue the
+        appended status bytes if enabled.
+
+        returns: True if status bytes were added to the current frame.
+        """
+
+        if self._rx_status is None:
+            return False
+
+        rssi, lqi, crc_ok = self._rx_status
+        self._rx_status = None
+        self.lqi = (0x80 if crc_ok else 0) | (lqi & 0x7F)
+        self.pktstatus = 0x80 if crc_ok else 0x00
+
+        if (self.registers[CC1101.PKTCTRL0] & 0x03) == 2:
+            return False
+        if not self.registers[CC1101.PKTCTRL1] & 0x04:
+            return False
+
+        self._rx_frame += bytes([_rssi_raw(rssi), self.lqi])
+        return True
+
+    def _rx_framing(self, payload, rssi, lqi, crc_ok):
+        """Packet as the chip puts it in the RX FIFO, or None if filtered."""
+
+        pktctrl1 = self.registers[CC1101.PKTCTRL1]
+        pktctrl0 = self.registers[CC1101.PKTCTRL0]
+        pktlen = self.registers[CC1101.PKTLEN]
+        length_config = pktctrl0 & 0x03
+
+        if not crc_ok and pktctrl0 & 0x04 and pktctrl1 & 0x08:
+            return None     # CRC_AUTOFLUSH
+
+        if length_config == 1:
+            if len(payload) > pktlen:
+                return None
+            frame = bytearray([len(payload)]) + payload
+            first = 1
+        elif length_config == 0:
+            frame = bytearray(payload[:pktlen].ljust(pktlen, b'\x00'))
+            first = 0
+        else:
+            frame = bytearray(payload)
+            first = 0
+
+        adr_chk = pktctrl1 & 0x03
+        if adr_chk and len(frame) > first:
+            allowed = {self.registers[CC1101.ADDR]}
+            if adr_chk >= 2:
+                allowed.add(0x00)
+            if adr_chk == 3:
+                allowed.add(0xFF)
+            if frame[first] not in allowed:
+                return None
+
+        self._rx_status = (rssi, lqi, crc_ok)
+        return frame
+
+    def _transmit(self, budget):
+        """Move TX FIFO bytes onto the air."""
+
+        sent = self._tx_sent
+        fifo = self.tx_fifo
+        while self.state == self.TX:
+            length_config = self.registers[CC1101.PKTCTRL0] & 0x03
+            if length_config == 1:
+                if not sent and not fifo:
+                    return
+                remaining = (sent or fifo)[0] + 1 - len(sent)
+            elif length_config == 0:
+                # after an infinite to fixed switch the packet ends when
+                # the byte counter, mod 256, reaches PKTLEN
+                remaining = (self.registers[CC1101.PKTLEN] - len(sent)) % 256
+                if not remaining and not sent:
+                    remaining = 256
+            else:
+                remaining = None
+
+            if remaining == 0:
+                self._tx_end()
+                continue
+
+            if budget is None:
+                # instant link: whole packets only, never underflows
+                count = len(fifo) if remaining is None else remaining
+                if not count or count > len(fifo):
+                    return
+            else:
+                if not fifo:
+                    if sent:
+                        self.state = self.TXFIFO_UNDERFLOW
+                    return
+                count = min(budget, len(fifo))
+                if remaining is not None:
+                    count = min(count, remaining)
+                budget -= count
+
+            sent += fifo[:count]
+            del fifo[:count]
+            if count == remaining:
+                self._tx_end()
+
+            if budget is not None and budget <= 0:
+                return
+
+    def _tx_end(self):
+        sent = self._tx_sent
+        variable = (self.registers[CC1101.PKTCTRL0] & 0x03) == 1
+        payload = bytes(sent[1:] if variable else sent)
+        del sent[:]
+
+        self.transmitted.append(payload)
+        self.state = self.OFF_MODES[self.registers[CC1101.MCSM1] & 0x03]
+        if self.tx_hook is not None:
+            self.tx_hook(payload)
+
+
+def _rssi_raw(dbm, offset=74):
+    """RSSI register value for a signal strength in dBm."""
+
+    value = int(round((dbm + offset) * 2))
+    return max(-128, min(127, value)) & 0xFF
@@ -0,0 +1,163 @@
+import functools
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+
+# Nearest achievable setting for a requested value.
+#   value: what the chip will actually do (Hz or baud)
+#   code: (exponent, mantissa) register values, or the 24 bit FREQ word
+#   error: value - requested
+Solution = namedtuple('Solution', ['value', 'code', 'error'])
+
+# CC1101 carrier frequency bands, Hz
+FREQUENCY_BANDS = (
+    (300000000, 348000000),
+    (387000000, 464000000),
+    (779000000, 928000000),
+)
+
+# CC1101 data rate range, baud (0.6 - 600 kBaud)
+DATA_RATE_RANGE = (600, 600000)
+
+
+class SolverTable(object):
+    """
+    Every (exponent, mantissa) setting of one register pair, sorted by the
+    value it produces.
+
+    Built once per crystal frequency, then each lookup is a bisect and a
+    comparison of the two neighbours, no float math.
+
+    args:
+        - name (str): register pair, shown in repr.
+        - formula: func(exponent, mantissa) -> value
+        - exponents (int): number of exponent values
+        - mantissas (int): number of mantissa values
+    """
+
+    def __init__(self, name, formula, exponents, mantissas):
+        self.name = name
+        entries = sorted((formula(e, m), (e, m))
+                         for e in range(exponents) for m in range(mantissas))
+        self.values = [value for value, _ in entries]
+        self.codes = [code for _, code in entries]
+        self._by_code = {code: value for value, code in entries}
+
+    def __repr__(self):
+        return "<SolverTable %s>" % self.name
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(zip(self.values, self.codes))
+
+    def nearest(self, target, maximum=None):
+        """
+        Get the setting closest to "target".
+
+        args:
+            - target: requested value
+            - [optional] maximum: highest value allowed. default=none
+        returns: Solution
+        """
+
+        end = len(self.values) if maximum is None else bisect_right(self.values, maximum)
+        index = bisect_left(self.values, target, 0, end)
+        if index == end:
+            index -= 1
+        elif index > 0 and target - self.values[index - 1] <= self.values[index] - target:
+            index -= 1
+
+        value = self.values[index]
+        return Solution(value, self.codes[index], value - target)
+
+    def value(self, exponent, mantissa):
+        """Value of one register setting."""
+
+        return self._by_code[(exponent, mantissa)]
+
+    def range(self):
+        return self.values[0], self.values[-1]
+
+
+@functools.lru_cache(maxsize=None)
+def tables(osc_freq):
+    """
+    Get the solver tables for one crystal frequency (datasheet formulas).
+
+    args: osc_freq (int): crystal Hz
+    returns: {'DRATE': SolverTable, 'CHANBW':, 'CHANSPC':, 'DEVIATN':}
+    """
+
+    return {
+        # MDMCFG4.DRATE_E, MDMCFG3.DRATE_M
+        'DRATE': SolverTable('DRATE', lambda e, m:
+                             (256 + m) * 2 ** e * osc_freq / 2 ** 28, 16, 256),
+        # MDMCFG4.CHANBW_E, MDMCFG4.CHANBW_M
+        'CHANBW': SolverTable('CHANBW', lambda e, m:
+                              osc_freq / (8.0 * (4 + m) * 2 ** e), 4, 4),
+        # MDMCFG1.CHANSPC_E, MDMCFG0.CHANSPC_M
+        'CHANSPC': SolverTable('CHANSPC', lambda e, m:
+                               osc_freq / 2 ** 18 * (256 + m) * 2 ** e, 4, 256),
+        # DEVIATN.DEVIATION_E, DEVIATN.DEVIATION_M
+        'DEVIATN': SolverTable('DEVIATN', lambda e, m:
+                               osc_freq / 2 ** 17 * (8 + m) * 2 ** e, 8, 8),
+    }
+
+
+def solve_data_rate(rate, osc_freq=26000000):
+    """
+    Nearest data rate the chip supports.
+
+    args:
+        - rate: baud, inside DATA_RATE_RANGE
+        - [optional] osc_freq (int): crystal Hz
+    returns: Solution, code (DRATE_E, DRATE_M)
+    """
+
+    low, high = DATA_RATE_RANGE
+    if not low <= rate <= high:
+        raise ValueError("Unsupported data rate '%s'" % rate)
+
+    return tables(osc_freq)['DRATE'].nearest(rate, maximum=high)
+
+
+def solve_rx_bandwidth(bandwidth, osc_freq=26000000):
+    """Nearest RX filter bandwidth (Hz). returns: Solution, code (CHANBW_E, CHANBW_M)"""
+
+    return tables(osc_freq)['CHANBW'].nearest(bandwidth)
+
+
+def solve_channel_spacing(spacing, osc_freq=26000000):
+    """Nearest channel spacing (Hz). returns: Solution, code (CHANSPC_E, CHANSPC_M)"""
+
+    return tables(osc_freq)['CHANSPC'].nearest(spacing)
+
+
+def solve_deviation(deviation, osc_freq=26000000):
+    """Nearest FSK deviation (Hz). returns: Solution, code (DEVIATION_E, DEVIATION_M)"""
+
+    return tables(osc_freq)['DEVIATN'].nearest(deviation)
+
+
+def solve_frequency(freq, osc_freq=26000000):
+    """
+    Nearest carrier frequency.
+
+    args:
+        - freq (int): Hz, inside one of FREQUENCY_BANDS
+        - [optional] osc_freq (int): crystal Hz
+    returns: Solution, code is the 24 bit FREQ2:FREQ1:FREQ0 word
+    """
+
+    for low, high in FREQUENCY_BANDS:
+        if low <= freq <= high:
+            break
+    else:
+        raise ValueError("Unsupported carrier freq '%s'" % freq)
+
+    # integer rounding: FREQ = freq * 2^16 / fxosc
+    word = (int(freq) * 0x10000 + osc_freq // 2) // osc_freq
+    value = word * osc_freq / float(0x10000)
+    return Solution(value, word, value - freq)
@@ -0,0 +1,273 @@
+import threading
+import time
+
+from pyticc.hopping import Hopper
+from pyticc.utils import _numpy, busy_wait
+
+
+# Reads of one sample that may find the chip out of RX before giving up
+MAX_RETRIES = 100
+
+# AGCCTRL0 WAIT_TIME and FILTER_LENGTH, in channel filter samples
+AGC_WAIT_SAMPLES = (8, 16, 24, 32)
+AGC_FILTER_SAMPLES = (8, 16, 32, 64)
+
+
+def rssi_settle_time(radio):
+    """
+    Estimate how long after entering RX the RSSI register is valid.
+
+    The AGC waits WAIT_TIME channel filter samples after a gain change
+    and averages over FILTER_LENGTH samples, with filter samples coming at
+    about twice the RX filter bandwidth (see TI DN505 for measured
+    response times). The estimate covers both.
+
+    args: radio (CC1101)
+    returns: seconds
+    """
+
+    agcctrl0 = radio.register_value('AGCCTRL0')
+    samples = (AGC_WAIT_SAMPLES[agcctrl0['WAIT_TIME[1:0]']] +
+               AGC_FILTER_SAMPLES[agcctrl0['FILTER_LENGTH[1:0]']])
+    return samples / (2.0 * radio.rx_bandwidth())
+
+
+class RSSISweep(object):
+    """
+    RSSI survey over a list of channels, into numpy arrays. Requires numpy.
+
+    Channels are stepped with a pyticc.hopping.Hopper, so each step is a
+    calibrated hop with no calibration on RX entry. After each hop the
+    sweep waits for the RSSI to settle, then takes "samples" RSSI reads.
+    Reads whose status byte shows the chip still settling are taken
+    again, so no extra polling transfers are needed; if the chip left RX
+    (a packet ended with RXOFF_MODE=IDLE, ...) it is put back first. Raw
+    bytes go into a preallocated array and are converted to dBm in one
+    vectorized step per sweep.
+
+        sweep = RSSISweep(cc, range(0, 200, 2), samples=4)
+        dbm = sweep.sweep()             # channels x samples, float32 dBm
+        dbm.max(axis=1)                 # peak per channel
+
+    args:
+        - radio (CC1101)
+        - channels: CHANNR values or frequencies in Hz, see Hopper.
+        - [optional] samples (int): RSSI reads per channel. default=1
+        - [optional] settle (float): seconds from hop to first read.
+          default=rssi_settle_time()
+        - [optional] burst (bool): see Hopper. default=False
+    """
+
+    def __init__(self, radio, channels, samples=1, settle=None, burst=False):
+        np = _numpy()
+
+        if samples < 1:
+            raise ValueError("Need at least one sample per channel")
+
+        self.radio = radio
+        self.hopper = Hopper(radio, channels, mode='rx', burst=burst)
+        self.channels = self.hopper.channels
+        self.samples = samples
+        self.settle = settle
+        self.sweeps = 0
+        self.retries = 0
+        self.raw = np.zeros((len(self.channels), samples), dtype=np.uint8)
+
+    def calibrate(self):
+        """Calibrate every channel (done on the first sweep otherwise)."""
+
+        self.hopper.calibrate()
+        if self.settle is None:
+            self.settle = rssi_settle_time(self.radio)
+
+    def sweep(self, out=None):
+        """
+        Take one sweep.
+
+        args: [optional] out: float32 array of shape (channels, samples)
+              to write dBm into. default=a new array
+        returns: dBm array, channels x samples
+        """
+
+        return self.to_dbm(self.sweep_raw(), out)
+
+    def sweep_raw(self):
+        """
+        Take one sweep, without dBm conversion.
+
+        returns: the RSSI register bytes, uint8 channels x samples. The
+                 array is reused by the next sweep.
+        """
+
+        if self.hopper.calibration is None:
+            self.calibrate()
+
+        radio = self.radio
+        raw = self.raw
+        samples = self.samples
+        header = radio.READ_SINGLE_BYTE | radio.RSSI
+        hop = self.hopper.hop
+
+        with radio.atomic():
+            for index in range(len(self.channels)):
+                hop(index)
+                busy_wait(self.settle)
+
+                row = raw[index]
+                taken = retries = 0
+                while taken < samples:
+                    out = radio._xfer(radio._frame(header, 2))
+                    state = (out[0] >> 4) & 0x07
+                    if state == 1:
+                        # RX
+                        row[taken] = out[1]
+                        taken += 1
+                        continue
+
+                    retries += 1
+                    if retries > MAX_RETRIES:
+                        raise RuntimeError("Chip does not stay in RX, state %s"
+                                           % radio.STATUS_STATES[state])
+                    if state not in (4, 5):
+                        # not CALIBRATE or SETTLING: back into RX
+                        radio.strobe(radio.SRX | radio.READ_SINGLE_BYTE)
+                        busy_wait(self.settle)
+
+                self.retries += retries
+
+        self.sweeps += 1
+        return raw
+
+    def to_dbm(self, raw, out=None):
+        """
+        Convert RSSI register bytes to dBm, vectorized.
+
+        args:
+            - raw: uint8 array
+            - [optional] out: float32 array of the same shape
+        returns: float32 array
+        """
+
+        np = _numpy()
+        if out is None:
+            out = np.empty(raw.shape, dtype=np.float32)
+
+        np.multiply(raw.view(np.int8), np.float32(0.5), out=out)
+        out -= np.float32(self.radio.rssi_offset())
+        return out
+
+
+class Waterfall(object):
+    """
+    Continuous sweeps into a ring of rows, on a background thread.
+
+    Each row holds one sweep reduced to one dBm value per channel (the
+    peak of its samples by default), with its start time in
+    "timestamps". The ring is preallocated; when full, the oldest row is
+    overwritten.
+
+        waterfall = Waterfall(RSSISweep(cc, range(100)), depth=512).start()
+        ...
+        image, timestamps = waterfall.rows()    # oldest first, depth x channels
+        waterfall.stop()
+
+    args:
+        - sweep (RSSISweep)
+        - [optional] depth (int): rows kept. default=256
+        - [optional] reduce (str): max|mean|min over each channel's
+          samples. default=max
+        - [optional] interval (float): seconds between sweep starts.
+          default=0, back to back.
+    """
+
+    REDUCTIONS = ('max', 'mean', 'min')
+
+    def __init__(self, sweep, depth=256, reduce='max', interval=0.0):
+        np = _numpy()
+
+        if reduce not in self.REDUCTIONS:
+            raise ValueError("Unknown reduction '%s'" % reduce)
+
+        self.sweep = sweep
+        self.depth = depth
+        self.reduce = reduce
+        self.interval = interval
+        self.data = np.full((depth, len(sweep.channels)), np.nan, dtype=np.float32)
+        self.timestamps = np.zeros(depth, dtype=np.float64)
+        self.count = 0
+        self.error = None
+
+        self._dbm = np.empty(sweep.raw.shape, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return min(self.count, self.depth)
+
+    def step(self):
+        """Take one sweep into the next row. returns: the row index"""
+
+        timestamp = time.time()
+        dbm = self.sweep.sweep(self._dbm)
+
+        with self._lock:
+            row = self.count % self.depth
+            getattr(dbm, self.reduce)(axis=1, out=self.data[row])
+            self.timestamps[row] = timestamp
+            self.count += 1
+
+        return row
+
+    def rows(self, n=None):
+        """
+        Copy out the newest rows, oldest first.
+
+        args: [optional] n (int): number of rows. default=all stored
+        returns: (float32 array n x channels, float64 timestamps)
+        """
+
+        np = _numpy()
+        with self._lock:
+            stored = min(self.count, self.depth)
+            n = stored if n is None else min(n, stored)
+            order = np.arange(self.count - n, self.count) % self.depth
+            return self.data[order], self.timestamps[order]
+
+    def latest(self):
+        """Newest row, or None before the first sweep."""
+
+        with self._lock:
+            if not self.count:
+                return None
+            return self.data[(self.count - 1) % self.depth].copy()
+
+    def start(self):
+        if self.running():
+            raise RuntimeError("Waterfall already running")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pyticc-waterfall',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            deadline = time.perf_counter()
+            while not self._stop.is_set():
+                self.step()
+                if self.interval:
+                    deadline += self.interval
+                    self._stop.wait(max(0.0, deadline - time.perf_counter()))
+        except Exception as e:
+            self.error = e
+
@@ -0,0 +1,219 @@
+import inspect
+import json
+import sys
+import threading
+from collections import deque
+
+
+class SPITracer(object):
+    """
+    Records every SPI transfer of one radio.
+
+    Each transfer is kept with its header byte, length, start time,
+    duration and the public radio method that issued it (send_data,
+    base_frequency, ...), found by walking up the call stack. Nothing is
+    decoded until the trace is read, so tracing stays cheap, and a radio
+    without a tracer only pays one attribute check per transfer.
+
+        tracer = cc.start_trace()
+        cc.base_frequency()
+        cc.stop_trace()
+        tracer.summary()
+        {'base_frequency': {'transfers': 3, 'bytes': 6, 'time_us': 210.0}}
+
+    args:
+        - radio: CCBase the tracer is attached to.
+        - [optional] capacity (int): keep only the last n transfers.
+          default=None, keep everything.
+    """
+
+    def __init__(self, radio, capacity=None):
+        self.names = _register_names(type(radio))
+        self.events = deque(maxlen=capacity)
+        self._methods = _method_codes(type(radio))
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, header, length, start, end):
+        """Record one transfer. Called by CCBase._xfer()."""
+
+        self.events.append((start, end - start, header, length,
+                            self._caller(), threading.get_ident()))
+
+    def clear(self):
+        self.events.clear()
+
+    def transfers(self):
+        """
+        Get the recorded transfers, decoded.
+
+        returns: list of dict with start and duration (seconds), header,
+                 opcode, register, length, method and thread.
+        """
+
+        out = []
+        for start, duration, header, length, method, thread in self.events:
+            opcode, register = self.decode_header(header)
+            out.append({"start": start, "duration": duration, "header": header,
+                        "opcode": opcode, "register": register,
+                        "length": length, "method": method, "thread": thread})
+
+        return out
+
+    def decode_header(self, header):
+        """
+        Name the access a header byte starts.
+
+        returns: (opcode, register name)
+                 opcode is read|write|read_burst|write_burst|strobe|status
+        """
+
+        addr = header & 0x3F
+        read = header & 0x80
+        burst = header & 0x40
+
+        if 0x30 <= addr <= 0x3D:
+            if read and burst:
+                return 'status', self.names.get(header | 0xC0, '0x%02X' % header)
+            return 'strobe', self.names.get(addr, '0x%02X' % addr)
+
+        opcode = 'read' if read else 'write'
+        if burst:
+            opcode += '_burst'
+
+        if addr == 0x3F:
+            return opcode, 'RXFIFO' if read else 'TXFIFO'
+
+        return opcode, self.names.get(addr, '0x%02X' % addr)
+
+    def summary(self, by='method'):
+        """
+        Aggregate counters.
+
+        args: [optional] by: method|register|opcode. default=method
+        returns: {key: {'transfers': n, 'bytes': n, 'time_us': float}}
+        """
+
+        if by not in ('method', 'register', 'opcode'):
+            raise ValueError("Cannot summarize by '%s'" % by)
+
+        out = {}
+        for event in self.transfers():
+            counters = out.setdefault(event[by], {"transfers": 0, "bytes": 0,
+                                                  "time_us": 0.0})
+            counters["transfers"] += 1
+            counters["bytes"] += event["length"]
+            counters["time_us"] += event["duration"] * 1000000.0
+
+        return out
+
+    def histogram(self, method=None):
+        """
+        Transfer latency histogram, in power of two microsecond buckets.
+
+        args: [optional] method: only count transfers issued by it.
+        returns: {bucket upper bound in us: count}, sorted by bucket.
+        """
+
+        counts = {}
+        for _, duration, _, _, caller, _ in self.events:
+            if method is not None and caller != method:
+                continue
+
+            bucket = 1
+            while bucket < duration * 1000000.0:
+                bucket <<= 1
+            counts[bucket] = counts.get(bucket, 0) + 1
+
+        return dict(sorted(counts.items()))
+
+    def to_json(self, fh=None):
+        """
+        Export the decoded transfers as JSON.
+
+        args: [optional] writable file. Default returns a string.
+        """
+
+        return _dump(self.transfers(), fh)
+
+    def to_chrome_trace(self, fh=None):
+        """
+        Export in Chrome trace event format, for chrome://tracing or
+        Perfetto. Each transfer is one complete ("X") event.
+
+        args: [optional] writable file. Default returns a string.
+        """
+
+        events = []
+        for event in self.transfers():
+            events.append({
+                "name": "%s %s" % (event["opcode"], event["register"]),
+                "cat": event["method"] or "spi",
+                "ph": "X",
+                "ts": event["start"] * 1000000.0,
+                "dur": event["duration"] * 1000000.0,
+                "pid": 0,
+                "tid": event["thread"],
+                "args": {"method": event["method"], "length": event["length"],
+                         "header": event["header"]},
+            })
+
+        return _dump({"traceEvents": events, "displayTimeUnit": "ns"}, fh)
+
+    def _caller(self):
+        """Outermost radio method on the stack, preferring public ones."""
+
+        methods = self._methods
+        method = private = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            name = methods.get(frame.f_code)
+            if name is not None:
+                if name[0] != '_':
+                    method = name
+                else:
+                    private = name
+            frame = frame.f_back
+
+        return method or private
+
+
+def _dump(data, fh):
+    if fh is None:
+        return json.dumps(data)
+
+    json.dump(data, fh)
+
+
+def _register_names(cls):
+    """{address or status header: name} from a chip's address constants."""
+
+    names = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if (type(value) is not int or not name.isupper() or
+                    name.startswith(('READ_', 'WRITE_')) or
+                    name.endswith('_SIZE')):
+                continue
+            names.setdefault(value, name)
+
+    return names
+
+
+def _method_codes(cls):
+    """{code object: method name} for every function of a radio class."""
+
+    codes = {}
+    for klass in cls.__mro__:
+        for name, value in vars(klass).items():
+            if isinstance(value, property):
+                value = value.fget
+            if callable(value):
+                # skip decorator wrappers, like pyticc.base.locked
+                value = inspect.unwrap(value)
+            code = getattr(value, '__code__', None)
+            if code is not None:
+                codes.setdefault(code, name)
+
+    return codes
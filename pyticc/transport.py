@@ -0,0 +1,285 @@
+import os
+import struct
+import threading
+
+
+class Transport(object):
+    """
+    Moves SPI transactions to and from a chip.
+
+    Same calling convention as spidev.SpiDev.xfer(): a list of bytes goes
+    out with chip select held low, the bytes clocked in come back as a
+    list. Transports open their device on the first transfer, so creating
+    a radio object costs nothing until it is used, and hardware modules
+    are only imported by the transport that needs them.
+
+    args:
+        - [optional] bus (int): default=0
+        - [optional] device (int): chip select. default=0
+        - [optional] speed (int): clock in Hz. default=50000
+    """
+
+    def __init__(self, bus=0, device=0, speed=50000):
+        self.bus = bus
+        self.device = device
+        self.max_speed_hz = speed
+        self.opened = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self.opened = True
+
+    def close(self):
+        self.opened = False
+
+    def xfer(self, data):
+        if not self.opened:
+            self.open()
+
+        return self._xfer(data)
+
+    def _xfer(self, data):
+        raise NotImplementedError
+
+
+class SpidevTransport(Transport):
+    """The spidev python module. Imported on first use."""
+
+    def open(self):
+        try:
+            import spidev
+        except ImportError as e:
+            raise ImportError("The spidev transport needs the spidev module: "
+                              "pip install pyticc[spidev], or use "
+                              "transport='ioctl'") from e
+
+        self._spi = spidev.SpiDev()
+        self._spi.open(self.bus, self.device)
+        self._spi.max_speed_hz = self.max_speed_hz
+        self.opened = True
+
+    def close(self):
+        if self.opened:
+            self._spi.close()
+        self.opened = False
+
+    def _xfer(self, data):
+        return self._spi.xfer(data)
+
+
+# linux/spi/spidev.h
+SPI_IOC_WR_MODE = 0x40016B01
+SPI_IOC_WR_BITS_PER_WORD = 0x40016B03
+SPI_IOC_WR_MAX_SPEED_HZ = 0x40046B04
+SPI_IOC_MESSAGE_1 = 0x40206B00
+SPI_IOC_TRANSFER = '=QQIIHBBBBBB'    # struct spi_ioc_transfer, 32 bytes
+
+
+class IoctlTransport(Transport):
+    """
+    /dev/spidevX.Y driven directly with the SPI_IOC_MESSAGE ioctl.
+
+    No spidev module needed. Transfer buffers and the ioctl message are
+    built once per transfer length and reused.
+
+    args:
+        see Transport, plus
+        - [optional] mode (int): SPI mode 0-3. default=0
+        - [optional] path (str): device node. default=/dev/spidev<bus>.<device>
+    """
+
+    def __init__(self, bus=0, device=0, speed=50000, mode=0, path=None):
+        super(IoctlTransport, self).__init__(bus, device, speed)
+        self.mode = mode
+        self.path = path or '/dev/spidev%d.%d' % (bus, device)
+        self._fd = None
+        self._messages = {}
+
+    def open(self):
+        import fcntl
+
+        self._ioctl = fcntl.ioctl
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._ioctl(self._fd, SPI_IOC_WR_MODE, struct.pack('=B', self.mode))
+        self._ioctl(self._fd, SPI_IOC_WR_BITS_PER_WORD, struct.pack('=B', 8))
+        self._ioctl(self._fd, SPI_IOC_WR_MAX_SPEED_HZ,
+                    struct.pack('=I', self.max_speed_hz))
+        self.opened = True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.opened = False
+
+    def _xfer(self, data):
+        length = len(data)
+        message = self._messages.get(length)
+        if message is None or message[3] != self.max_speed_hz:
+            message = self._messages[length] = self._message(length)
+
+        tx, rx, ioc, _ = message
+        tx[:] = data
+        self._ioctl(self._fd, SPI_IOC_MESSAGE_1, ioc)
+        return rx[:]
+
+    def _message(self, length):
+        import ctypes
+
+        tx = (ctypes.c_ubyte * length)()
+        rx = (ctypes.c_ubyte * length)()
+        ioc = struct.pack(SPI_IOC_TRANSFER, ctypes.addressof(tx),
+                          ctypes.addressof(rx), length, self.max_speed_hz,
+                          0, 8, 0, 0, 0, 0, 0)
+        return tx, rx, ioc, self.max_speed_hz
+
+
+class LoopbackTransport(Transport):
+    """
+    In-memory transport.
+
+    Hands transfers to "target" (anything with an xfer() method, like
+    pyticc.sim.SimulatedCC1101). Without one it behaves like MOSI wired
+    to MISO and returns what was sent.
+
+    args:
+        see Transport, plus
+        - [optional] target
+    """
+
+    def __init__(self, bus=0, device=0, speed=50000, target=None):
+        super(LoopbackTransport, self).__init__(bus, device, speed)
+        self.target = target
+
+    def _xfer(self, data):
+        if self.target is None:
+            return list(data)
+
+        return self.target.xfer(data)
+
+
+class UnixSocketTransport(Transport):
+    """
+    Transfers to a remote chip over a Unix stream socket.
+
+    Each transaction is sent as a 2 byte big-endian length and the bytes,
+    and answered the same way. See serve_unix_socket() for the other end.
+
+    args:
+        - path (str): socket path.
+        see Transport for the rest.
+    """
+
+    def __init__(self, path, bus=0, device=0, speed=50000):
+        super(UnixSocketTransport, self).__init__(bus, device, speed)
+        self.path = path
+        self._sock = None
+
+    def open(self):
+        import socket
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.path)
+        self.opened = True
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self.opened = False
+
+    def _xfer(self, data):
+        _send_frame(self._sock, data)
+        return list(_recv_frame(self._sock))
+
+
+def serve_unix_socket(path, spi):
+    """
+    Serve a chip to UnixSocketTransport clients, on a background thread.
+
+    Transactions from all clients go to "spi" one at a time.
+
+    args:
+        - path (str): socket path to listen on.
+        - spi: anything with an xfer() method (a Transport, spidev.SpiDev,
+          pyticc.sim.SimulatedCC1101, ...)
+    returns: socketserver server; call shutdown() and server_close() to stop.
+    """
+
+    import socketserver
+
+    lock = threading.Lock()
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    data = _recv_frame(self.request)
+                except EOFError:
+                    return
+
+                with lock:
+                    out = spi.xfer(list(data))
+                _send_frame(self.request, out)
+
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='pyticc-serve',
+                              daemon=True)
+    thread.start()
+    return server
+
+
+TRANSPORTS = {
+    'spidev': SpidevTransport,
+    'ioctl': IoctlTransport,
+    'loopback': LoopbackTransport,
+}
+
+
+def open_transport(transport, bus=0, device=0, speed=50000):
+    """
+    Get a transport from a name.
+
+    args:
+        - transport: spidev|ioctl|loopback|unix:<socket path>, or a
+          Transport instance (returned as is).
+        - bus, device, speed: see Transport
+    returns: Transport (not opened yet)
+    """
+
+    if isinstance(transport, Transport):
+        return transport
+
+    if type(transport) is str and transport.startswith('unix:'):
+        return UnixSocketTransport(transport[5:], bus, device, speed)
+
+    if transport not in TRANSPORTS:
+        raise ValueError("Unknown transport '%s'" % transport)
+
+    return TRANSPORTS[transport](bus, device, speed)
+
+
+def _send_frame(sock, data):
+    sock.sendall(struct.pack('>H', len(data)) + bytes(data))
+
+
+def _recv_frame(sock):
+    length = struct.unpack('>H', _recv_exact(sock, 2))[0]
+    return _recv_exact(sock, length)
+
+
+def _recv_exact(sock, count):
+    buf = bytearray()
+    while len(buf) < count:
+        chunk = sock.recv(count - len(buf))
+        if not chunk:
+            raise EOFError("SPI socket closed")
+        buf += chunk
+
+    return bytes(buf)
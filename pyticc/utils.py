@@ -1,3 +1,5 @@
+import time
+
 
 def byte_bit_value(byte, schema):
     """
@@ -18,21 +20,12 @@ def byte_bit_value(byte, schema):
     """
 
     index, bits = schema
+    _check_schema(index, bits)
 
-    if index < 0 or index > 7:
-        raise ValueError("Schema index must be 0 thru 7")
-    if bits < 1 or bits > 8:
-        raise ValueError("Schema bits must be 1 thru 8")
-    if len( list(bin(byte)[2:]) ) > 8:
+    if byte < 0 or byte > 0xFF:
         raise ValueError("Number too big. Not a byte value.")
 
-    if index == 0 and bits == 8:
-        # nothing to do
-        return byte
-
-    shift = 8 - (index + bits)
-    mask = 0xFF >> (shift + index)
-    return byte >> shift & mask
+    return byte >> (8 - (index + bits)) & (0xFF >> (8 - bits))
 
 
 def bit_into_byte(byte, schema, value):
@@ -54,18 +47,140 @@ def bit_into_byte(byte, schema, value):
         value = int(value, 2)
 
     index, bits = schema
+    _check_schema(index, bits)
+
+    if byte < 0 or byte > 0xFF or value < 0 or value > 0xFF:
+        raise ValueError("Number too big. Not a byte value.")
+
+    mask = 0xFF >> (8 - bits)
+    if value > mask:
+        raise ValueError("Value does not fit in %d bits" % bits)
+
+    shift = 8 - (index + bits)
+    return (byte & ~(mask << shift) & 0xFF) | (value << shift)
+
+
+def byte_bit_values(data, schemas):
+    """
+    Extract many bit fields from many bytes at once. Requires numpy.
+
+    args:
+        - data: array-like of byte values.
+          1-D (N,) for a stream of bytes, like captured status bytes.
+          2-D (N, registers) for register snapshots, indexed by address.
+        - schemas (dict):
+          {name: [index, bits]} for 1-D data.
+          {name: [column, index, bits]} for 2-D data.
+
+    returns:
+        numpy structured array of shape (N,), one uint8 field per name.
+    """
+
+    np = _numpy()
+    data = _byte_array(np, data)
+
+    out = np.empty(data.shape[0], dtype=[(name, np.uint8) for name in schemas])
+    for name, schema in schemas.items():
+        column, index, bits = _batch_schema(schema, data.ndim)
+        values = data if column is None else data[:, column]
+        out[name] = values >> (8 - (index + bits)) & (0xFF >> (8 - bits))
+
+    return out
+
+
+def bits_into_bytes(data, schemas, values):
+    """
+    Update bit fields in many bytes at once. Requires numpy.
 
+    args:
+        - data: array-like of byte values, 1-D or 2-D (see byte_bit_values)
+        - schemas (dict): same layout as byte_bit_values.
+        - values: {name: int or array-like}, or a structured array as
+          returned by byte_bit_values. Names missing from values are left
+          unchanged.
+
+    returns:
+        new numpy uint8 array, same shape as data.
+    """
+
+    np = _numpy()
+    out = _byte_array(np, data).copy()
+
+    if hasattr(values, 'dtype') and values.dtype.names:
+        names = values.dtype.names
+    else:
+        names = list(values.keys())
+
+    for name in names:
+        if name not in schemas:
+            raise ValueError("No schema for '%s'" % name)
+
+        column, index, bits = _batch_schema(schemas[name], out.ndim)
+        mask = 0xFF >> (8 - bits)
+        shift = 8 - (index + bits)
+
+        new = np.asarray(values[name])
+        if new.size and (new.min() < 0 or new.max() > mask):
+            raise ValueError("Value for '%s' does not fit in %d bits" % (name, bits))
+        new = new.astype(np.uint8)
+
+        target = out if column is None else out[:, column]
+        target &= np.uint8(~(mask << shift) & 0xFF)
+        target |= new << np.uint8(shift)
+
+    return out
+
+
+def _check_schema(index, bits):
     if index < 0 or index > 7:
         raise ValueError("Schema index must be 0 thru 7")
     if bits < 1 or bits > 8:
         raise ValueError("Schema bits must be 1 thru 8")
-    if len(list(bin(byte)[2:])) > 8 or len(list(bin(value)[2:])) > 8:
-        raise ValueError("Number too big. Not a byte value.")
+    if index + bits > 8:
+        raise ValueError("Schema does not fit in a byte")
+
+
+def busy_wait(seconds):
+    """
+    Wait without sleeping.
+
+    time.sleep() overshoots by tens of microseconds or more, too coarse
+    for chip timings of a few hundred microseconds.
+    """
+
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _batch_schema(schema, ndim):
+    if ndim == 1:
+        index, bits = schema
+        column = None
+    elif ndim == 2:
+        column, index, bits = schema
+    else:
+        raise ValueError("Expected 1-D or 2-D byte data")
+
+    _check_schema(index, bits)
+    return column, index, bits
+
+
+def _byte_array(np, data):
+    data = np.asarray(data)
+    if data.dtype != np.uint8:
+        if data.size and (data.min() < 0 or data.max() > 0xFF):
+            raise ValueError("Number too big. Not a byte value.")
+        data = data.astype(np.uint8)
+
+    return data
 
-    orig_bits = list(bin(byte)[2:].zfill(8))
-    value_bits = list(bin(value)[2:].zfill(bits))
 
-    for i in range(0, bits):
-        orig_bits[index + i] = value_bits[i]
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy is required for batch operations "
+                          "(pip install pyticc[numpy])")
 
-    return int("".join(orig_bits), 2)
+    return numpy
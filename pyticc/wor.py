@@ -0,0 +1,156 @@
+from collections import namedtuple
+
+
+# Wake-on-Radio timing, CC1101 datasheet section 19.5:
+#
+#   t_Event0 = 750 / fxosc * EVENT0 * 2^(5 * WOR_RES)
+#   t_Event1 = 750 / fxosc * EVENT1_PERIODS[EVENT1]
+#   RX timeout (us) = EVENT0 * C(RX_TIME, WOR_RES) * 26 / fxosc(MHz)
+#
+# C(RX_TIME, WOR_RES) halves with every RX_TIME step. RX_TIME=7 (no
+# timeout) is not used for WOR.
+RX_TIME_C = tuple(tuple(c / 2 ** rx_time for rx_time in range(7))
+                  for c in (3.6058, 18.0288, 32.4519, 46.8750))
+
+EVENT1_PERIODS = (4, 6, 8, 12, 16, 24, 32, 48)
+
+# Reset value of WOREVT1:WOREVT0, about 1 s with WOR_RES=0 at 26 MHz
+EVENT0_DEFAULT = 0x876B
+
+# IDLE -> RX times at 26 MHz, seconds (datasheet state transition times)
+CALIBRATION_TIME = 721e-6
+SETTLE_TIME = 88.4e-6
+
+# Rough supply currents in amps, 433 MHz, 3 V. Pass measured ones for
+# real estimates.
+CURRENTS = {
+    'sleep': 0.5e-6,        # SLEEP, RC oscillator running
+    'startup': 1.7e-3,      # crystal starting, EVENT1
+    'calibrate': 8.0e-3,    # synthesizer calibration
+    'rx': 16.0e-3,
+}
+
+
+# One Wake-on-Radio setting and its expected behaviour.
+#   event0, wor_res, rx_time, event1: register values
+#   period: seconds between wake-ups
+#   rx_timeout: seconds in RX per wake-up, looking for a sync word
+#   duty_cycle: rx_timeout / period
+#   latency: worst-case seconds from a transmitter starting its preamble
+#            to the chip listening for it
+#   current: average supply current in amps
+WorPlan = namedtuple('WorPlan', ['event0', 'wor_res', 'rx_time', 'event1',
+                                 'period', 'rx_timeout', 'duty_cycle',
+                                 'latency', 'current'])
+
+
+def wor_timing(event0, wor_res, rx_time, event1=7, osc_freq=26000000,
+               autocal=True, currents=None):
+    """
+    Work out what a Wake-on-Radio register setting does.
+
+    args:
+        - event0 (int): WOREVT1:WOREVT0, 1 thru 65535
+        - wor_res (int): WORCTRL.WOR_RES, 0 thru 3
+        - rx_time (int): MCSM2.RX_TIME, 0 thru 6
+        - [optional] event1 (int): WORCTRL.EVENT1. default=7
+        - [optional] osc_freq (int): crystal Hz
+        - [optional] autocal (bool): the synthesizer calibrates on every
+          wake-up (MCSM0.FS_AUTOCAL=1). default=True
+        - [optional] currents (dict): see CURRENTS
+    returns: WorPlan
+    """
+
+    if not 1 <= event0 <= 0xFFFF:
+        raise ValueError("EVENT0 must be 1 thru 65535")
+    if not 0 <= rx_time <= 6:
+        raise ValueError("RX_TIME must be 0 thru 6 for Wake-on-Radio")
+
+    amps = dict(CURRENTS)
+    amps.update(currents or {})
+
+    period = 750.0 / osc_freq * event0 * 2 ** (5 * wor_res)
+    startup = 750.0 / osc_freq * EVENT1_PERIODS[event1]
+    calibrate = CALIBRATION_TIME if autocal else 0.0
+    rx_timeout = event0 * RX_TIME_C[wor_res][rx_time] * 26.0 / osc_freq
+
+    awake = startup + calibrate + SETTLE_TIME + rx_timeout
+    if awake >= period:
+        raise ValueError("RX window does not fit in the WOR period")
+
+    charge = (amps['sleep'] * (period - awake) + amps['startup'] * startup +
+              amps['calibrate'] * calibrate +
+              amps['rx'] * (SETTLE_TIME + rx_timeout))
+
+    return WorPlan(event0, wor_res, rx_time, event1, period, rx_timeout,
+                   rx_timeout / period,
+                   period + _wake_time(event1, osc_freq, autocal), charge / period)
+
+
+def plan_wor(latency=None, duty_cycle=None, rx_window=None, event1=7,
+             osc_freq=26000000, autocal=True, currents=None):
+    """
+    Pick Wake-on-Radio settings for a target latency and RX window.
+
+    The wake-up period is the longest one that keeps the worst-case
+    latency within "latency", using the finest WOR_RES that can express
+    it. Then RX_TIME is chosen:
+
+        - duty_cycle: the longest RX window whose share of the period is
+          at most duty_cycle.
+        - rx_window: the shortest RX window of at least rx_window seconds
+          (the time a receiver needs to find the preamble and sync word),
+          which also draws the least current.
+
+    Transmitters must send a preamble at least as long as the period for
+    every packet to be caught.
+
+    args:
+        - [optional] latency (float): seconds. default=the reset EVENT0
+          period, about 1 s
+        - [optional] duty_cycle (float): 0 thru 1
+        - [optional] rx_window (float): seconds
+        - see wor_timing() for the rest
+    returns: WorPlan
+    """
+
+    if (duty_cycle is None) == (rx_window is None):
+        raise ValueError("Give either duty_cycle or rx_window")
+
+    candidates = []
+    for wor_res in range(4):
+        if latency is None:
+            event0 = EVENT0_DEFAULT
+        else:
+            unit = 750.0 / osc_freq * 2 ** (5 * wor_res)
+            event0 = int((latency - _wake_time(event1, osc_freq, autocal)) / unit)
+        if not 1 <= event0 <= 0xFFFF:
+            continue
+
+        for rx_time in range(7):
+            try:
+                plan = wor_timing(event0, wor_res, rx_time, event1, osc_freq,
+                                  autocal, currents)
+            except ValueError:
+                continue
+
+            if duty_cycle is not None and plan.duty_cycle <= duty_cycle:
+                candidates.append((-plan.duty_cycle, plan))
+            elif rx_window is not None and plan.rx_timeout >= rx_window:
+                candidates.append((plan.current, plan))
+
+        if latency is None or candidates:
+            # the finest resolution that works
+            break
+
+    if not candidates:
+        raise ValueError("No Wake-on-Radio setting meets the target")
+
+    return min(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def _wake_time(event1, osc_freq, autocal):
+    """Seconds from the EVENT0 wake-up until the chip is listening."""
+
+    startup = 750.0 / osc_freq * EVENT1_PERIODS[event1]
+    return startup + (CALIBRATION_TIME if autocal else 0.0) + SETTLE_TIME
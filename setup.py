@@ -16,6 +16,10 @@ setuptools.setup(
     author_email='sillymonkeysoftware@gmail.com',
     url='https://github.com/jeffleary00/pyticc',
     install_requires=[
-        'spidev'
+        'spidev; platform_system == "Linux"'
     ],
+    extras_require={
+        'spidev': ['spidev'],
+        'numpy': ['numpy']
+    },
 )
@@ -0,0 +1,64 @@
+# MARCSTATE -> STATE[2:0] of the chip status byte
+STATUS_STATES = {0x01: 0, 0x0D: 1, 0x0E: 1, 0x0F: 1, 0x10: 5, 0x11: 6,
+                 0x12: 3, 0x13: 2, 0x14: 2, 0x15: 5, 0x16: 7}
+
+
+class FakeSPI(object):
+    """
+    Minimal stand-in for spidev.SpiDev, backed by a plain register file.
+
+    Keeps a log of every transfer so tests can count bus traffic.
+    """
+
+    def __init__(self):
+        self.registers = bytearray(0x40)
+        self.registers[0x35] = 0x01     # MARCSTATE: IDLE
+        self.rx_fifo = bytearray()
+        self.tx_fifo = bytearray()
+        self.transfers = []
+        self.max_speed_hz = 0
+
+    def open(self, bus, device):
+        pass
+
+    def xfer(self, data):
+        data = list(data)
+        self.transfers.append(data)
+        header = data[0]
+        addr = header & 0x3F
+        out = [self.status(header)]
+        if 0x30 <= addr <= 0x3D and not header & 0x40:
+            # command strobe
+            return out * len(data)
+
+        if header & 0x80 and addr == 0x3B:
+            # RXBYTES
+            return out + [len(self.rx_fifo)]
+        if header & 0x80 and addr == 0x3A:
+            # TXBYTES
+            return out + [len(self.tx_fifo)]
+        if not header & 0x80 and addr == 0x3F:
+            self.tx_fifo.extend(data[1:])
+            return out + [0x0F] * (len(data) - 1)
+
+        for offset, value in enumerate(data[1:]):
+            if header & 0x80 and addr == 0x3F:
+                out.append(self.rx_fifo.pop(0))
+            elif header & 0x80:
+                out.append(self.registers[addr + offset])
+            else:
+                self.registers[addr + offset] = value
+                out.append(0x0F)
+
+        return out
+
+    def status(self, header):
+        """Chip status byte, as clocked out with the given header."""
+
+        state = STATUS_STATES.get(self.registers[0x35] & 0x1F, 4)
+        if header & 0x80:
+            fifo = len(self.rx_fifo)
+        else:
+            fifo = 64 - len(self.tx_fifo)
+
+        return state << 4 | min(fifo, 15)
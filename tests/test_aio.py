@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import asyncio
+import threading
+import unittest
+
+from fakes import FakeSPI
+from pyticc.aio import AsyncCC1101
+from pyticc.cc1101 import CC1101
+from pyticc.gpio import PipeEdge
+from pyticc.sim import SimulatedCC1101
+
+
+class TestAsync(unittest.IsolatedAsyncioTestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.spi.registers[CC1101.PKTCTRL0] = 0x01    # variable length
+        self.spi.registers[CC1101.PKTLEN] = 0x3D
+        self.radio = AsyncCC1101(spi=self.spi)
+
+    def tearDown(self):
+        self.radio.close()
+
+    async def test_config(self):
+        """Test config getters/setters are awaitable"""
+
+        assert await self.radio.modulation('OOK') == 'ASK'
+        assert await self.radio.packet_length() == 'PKT_LEN_VARIABLE'
+
+    async def test_recv(self):
+        """Test recv polls without blocking the loop"""
+
+        assert await self.radio.recv(timeout=0.01) is None
+        self.spi.rx_fifo.extend([2, 7, 8])
+        assert (await self.radio.recv(timeout=0.1)).data == bytes([7, 8])
+
+    async def test_recv_edge(self):
+        """Test recv sleeps on GDO edges"""
+
+        self.radio.edge = PipeEdge()
+        loop = asyncio.get_running_loop()
+
+        def arrive():
+            self.spi.rx_fifo.extend([1, 9])
+            self.radio.edge.trigger()
+
+        loop.call_later(0.01, arrive)
+        assert (await self.radio.recv(timeout=1)).data == bytes([9])
+        self.radio.edge.close()
+
+    async def test_deadline(self):
+        """Test waits give up at their deadline"""
+
+        await self.radio.sidle()
+        self.spi.registers[0x35] = 0x13     # stuck in TX
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.radio.send([1, 2, 3], timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.radio.wait_state(0x0D, timeout=0.01)
+
+        # the lock taken for the send was released on the executor
+        await self.radio.run(lambda: None)
+        lock = self.radio.radio.lock
+
+        def free():
+            if not lock.acquire(False):
+                return False
+            lock.release()
+            return True
+
+        assert await asyncio.to_thread(free)
+
+    async def test_cancel(self):
+        """Test a cancelled send leaves the chip idle with an empty TX FIFO"""
+
+        sim = SimulatedCC1101(bytes_per_xfer=1)
+        radio = AsyncCC1101(spi=sim)
+        try:
+            send = asyncio.ensure_future(radio.send(bytes(60)))
+            while sim.state != sim.TX:
+                await asyncio.sleep(0.0005)
+            send.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await send
+
+            await radio.run(lambda: None)
+            assert sim.state == sim.IDLE
+            assert sim.tx_fifo == bytearray()
+            assert sim.transmitted == []
+        finally:
+            radio.close()
+
+    async def test_lock(self):
+        """Test a send waits for, then holds, the radio lock"""
+
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with self.radio.radio.lock:
+                held.set()
+                release.wait(1)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait(1)
+
+        del self.spi.transfers[:]
+        send = asyncio.ensure_future(self.radio.send([1, 2, 3]))
+        await asyncio.sleep(0.05)
+        assert self.spi.transfers == []
+
+        release.set()
+        await send
+        thread.join()
+        assert self.spi.transfers
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+
+
+class TestDataPath(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.cc = CC1101(spi=self.spi)
+
+    def test_burst_header(self):
+        """Test burst reads send one header byte"""
+
+        self.spi.registers[0x10:0x13] = bytes([1, 2, 3])
+        assert self.cc.read_burst(0x10, 3) == bytes([1, 2, 3])
+        assert self.spi.transfers[-1][0] == 0xD0
+        assert len(self.spi.transfers[-1]) == 4
+
+    def test_burst_into(self):
+        """Test burst reads into a caller buffer"""
+
+        self.cc.write_burst(0x04, [0xAA, 0xBB])
+        buffer = bytearray(4)
+        assert self.cc.read_burst_into(0x04, memoryview(buffer)[1:], 2) == 2
+        assert buffer == bytearray([0, 0xAA, 0xBB, 0])
+
+    def test_frames_reused(self):
+        """Test transfers of one length share a frame"""
+
+        self.cc.write_byte(0x04, 0x12)
+        self.cc.read_byte(0x05)
+        assert self.cc._frame(0x00, 2) is self.cc._frame(0x80, 2)
+        assert self.spi.transfers == [[0x04, 0x12], [0x85, 0x12]]
+
+
+class TestStatus(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.cc = CC1101(spi=self.spi)
+
+    def test_status_tracked(self):
+        """Test every transfer records the chip status byte"""
+
+        assert self.cc.status is None
+        self.spi.registers[0x35] = 0x0D     # RX
+        self.spi.rx_fifo.extend([1, 2, 3])
+        self.cc.read_byte(0x00)
+        assert self.cc.status == (True, 'RX', 3)
+        assert self.cc.read_status(rx=False) == (True, 'RX', 15)
+        assert self.spi.transfers[-1] == [0x3D]
+
+    def test_waits_use_status(self):
+        """Test waits poll SNOP instead of MARCSTATE/RXBYTES"""
+
+        self.spi.rx_fifo.extend([2, 7, 8])
+        self.spi.registers[CC1101.PKTCTRL0] = 0x01
+        self.spi.registers[CC1101.PKTLEN] = 0x3D
+        del self.spi.transfers[:]
+        self.cc.sidle()
+        assert self.cc.recv_data().data == bytes([7, 8])
+
+        headers = [t[0] for t in self.spi.transfers]
+        assert 0xF5 not in headers and 0xFB not in headers
+        assert headers[:2] == [CC1101.SIDLE, 0xBD]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+
+import numpy as np
+
+from pyticc.codec import (
+    crc16, crc16_batch, decode_frame, deinterleave, encode_frame, fec_decode,
+    fec_decode_batch, fec_encode, fec_encode_batch, interleave,
+    interleave_batch, manchester_decode, manchester_decode_batch,
+    manchester_encode, manchester_encode_batch, whiten, whiten_batch)
+
+
+class TestCodec(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        rand = random.Random(1101)
+        self.frames = np.array([[rand.randrange(256) for _ in range(30)]
+                                for _ in range(50)], dtype=np.uint8)
+
+    def test_whiten(self):
+        """Test the PN9 sequence of the datasheet and its period"""
+
+        assert whiten(bytes(8)) == bytes.fromhex('FFE11D9AED853324')
+        assert whiten(bytes(600))[511:519] == whiten(bytes(8))
+        assert whiten(whiten(b'hello')) == b'hello'
+
+        out = whiten_batch(self.frames)
+        for frame, row in zip(self.frames, out):
+            assert bytes(row) == whiten(bytes(frame))
+
+    def test_crc16(self):
+        """Test CRC16 check value, residue and the batch version"""
+
+        assert crc16(b'123456789') == 0xAEE7
+        assert crc16(b'') == 0xFFFF
+        data = b'\x05hello'
+        assert crc16(data + crc16(data).to_bytes(2, 'big')) == 0
+        assert crc16(b'lo', crc16(b'hel')) == crc16(b'hello')
+
+        out = crc16_batch(self.frames)
+        lengths = np.arange(len(self.frames)) % 31
+        short = crc16_batch(self.frames, lengths)
+        for frame, crc, length, crc_short in zip(self.frames, out, lengths, short):
+            assert crc == crc16(bytes(frame))
+            assert crc_short == crc16(bytes(frame[:length]))
+
+    def test_manchester(self):
+        """Test Manchester symbols and invalid chip pairs"""
+
+        assert manchester_encode(b'\x00\xff\x0f') == bytes.fromhex('5555AAAA55AA')
+        assert manchester_decode(bytes.fromhex('5555AAAA55AA')) == b'\x00\xff\x0f'
+        with self.assertRaises(ValueError):
+            manchester_decode(b'\x57\x55')
+        with self.assertRaises(ValueError):
+            manchester_decode(b'\x55')
+
+        encoded = manchester_encode_batch(self.frames)
+        assert bytes(encoded[3]) == manchester_encode(bytes(self.frames[3]))
+        encoded[2, 5] = 0xFF
+        data, invalid = manchester_decode_batch(encoded)
+        assert (data[3] == self.frames[3]).all()
+        assert list(invalid[:4]) == [0, 0, 1, 0]
+
+    def test_interleave(self):
+        """Test interleaving is a symbol permutation inside 4 byte blocks"""
+
+        data = bytes(range(8))
+        assert interleave(data) != data
+        assert deinterleave(interleave(data)) == data
+        assert interleave(b'\xff\x00\x00\x00') == bytes.fromhex('03030303')
+        with self.assertRaises(ValueError):
+            interleave(b'\x00')
+
+        frames = self.frames[:, :28]
+        out = interleave_batch(frames)
+        assert bytes(out[7]) == interleave(bytes(frames[7]))
+        assert (interleave_batch(out, inverse=True) == frames).all()
+
+    def test_fec(self):
+        """Test FEC round trips and corrects bit errors"""
+
+        for length in (0, 1, 2, 7, 60):
+            data = bytes(range(length))
+            encoded = fec_encode(data)
+            assert len(encoded) == (length + 2) // 2 * 4
+            assert fec_decode(encoded, length) == data
+
+        data = bytes(self.frames[1])
+        encoded = bytearray(fec_encode(data))
+        encoded[2] ^= 0x10
+        encoded[40] ^= 0x01
+        assert fec_decode(encoded, len(data)) == data
+        assert fec_decode(fec_encode(data, interleaved=False), len(data),
+                          interleaved=False) == data
+
+    def test_fec_batch(self):
+        """Test batch FEC matches the per-frame version"""
+
+        encoded = fec_encode_batch(self.frames)
+        for frame, row in zip(self.frames, encoded):
+            assert bytes(row) == fec_encode(bytes(frame))
+
+        encoded[:, 9] ^= 0x04
+        data, errors = fec_decode_batch(encoded, 30)
+        assert (data == self.frames).all()
+        assert (errors == 1).all()
+        assert bytes(fec_decode_batch(encoded)[0][4]) == fec_decode(bytes(encoded[4]))
+
+    def test_frame(self):
+        """Test whole frames through each encoding chain"""
+
+        frame = encode_frame(b'hi', whitening=False)
+        assert frame[:3] == b'\x02hi'
+        assert frame[3:] == crc16(b'\x02hi').to_bytes(2, 'big')
+
+        for options in ({}, {'fec': True}, {'manchester': True},
+                        {'whitening': False, 'crc': False}):
+            frame = encode_frame(b'payload', address=0x42, **options)
+            # trailing bytes after the frame are ignored
+            assert decode_frame(frame + bytes(8), address=True, **options) == \
+                (b'payload', 0x42, None if options.get('crc') is False else True)
+
+        frame = bytearray(encode_frame(b'payload', variable=False))
+        assert decode_frame(frame, length=7) == (b'payload', None, True)
+        frame[2] ^= 0x01
+        assert decode_frame(frame, length=7)[2] is False
+
+        with self.assertRaises(ValueError):
+            encode_frame(b'', fec=True, manchester=True)
+        with self.assertRaises(ValueError):
+            decode_frame(b'\x09abc')
+
+
+if __name__ == '__main__':
+    unittest.main()
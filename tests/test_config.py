@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+
+
+class TestApplyConfig(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.cc = CC1101(spi=self.spi)
+
+    def test_config_image(self):
+        """Test settings, bytes and fields all land in the image"""
+
+        image = self.cc.config_image({
+            'modulation': 'OOK',
+            'FREND1': 0xB6,
+            'AGCCTRL2': {'MAGN_TARGET[2:0]': 0x03, 'MAX_DVGA_GAIN[1:0]': '10'},
+        }, bytes(self.cc.CONFIG_SIZE))
+
+        assert image[self.cc.MDMCFG2] == 0x30
+        assert image[self.cc.FREND1] == 0xB6
+        assert image[self.cc.AGCCTRL2] == 0x83
+
+    def test_apply_config_diff(self):
+        """Test only changed runs are burst written"""
+
+        runs = self.cc.apply_config({
+            'base_frequency': 433,
+            'FREND1': 0xB6,
+            'FREND0': 0x11,
+        }, idle=False)
+
+        assert runs == [(0x0D, bytes([0x10, 0xA7, 0x62])), (0x21, bytes([0xB6, 0x11]))]
+        # one image read plus one write per run
+        assert len(self.spi.transfers) == 3
+        assert self.cc.base_frequency() == 432999816.89453125
+
+        self.spi.transfers = []
+        assert self.cc.apply_config({'FREND1': 0xB6}) == []
+        assert len(self.spi.transfers) == 1
+
+    def test_apply_config_gap(self):
+        """Test nearby changes are merged into one burst"""
+
+        runs = self.cc.apply_config({'SYNC1': 1, 'PKTCTRL1': 2}, idle=False)
+        assert runs == [(0x04, bytes([1, 0, 0, 2]))]
+
+    def test_unknown_field(self):
+        """Test unknown fields are rejected"""
+
+        with self.assertRaises(ValueError):
+            self.cc.apply_config({'MDMCFG2': {'NOPE': 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
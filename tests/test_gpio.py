@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+from pyticc.gpio import PipeEdge
+from pyticc.sim import SimulatedCC1101
+
+
+class TestEdgeReceive(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.spi.registers[CC1101.PKTCTRL0] = 0x01    # variable length
+        self.spi.registers[CC1101.PKTLEN] = 0x3D
+        self.cc = CC1101(spi=self.spi)
+        self.edge = PipeEdge()
+
+    def tearDown(self):
+        self.edge.close()
+
+    def test_pipe_edge(self):
+        """Test pipe edges are consumed by wait"""
+
+        assert not self.edge.wait(0)
+        self.edge.trigger()
+        self.edge.trigger()
+        assert self.edge.wait(0)
+        assert not self.edge.wait(0)
+
+    def test_configure_gdo(self):
+        """Test GDO signal routing"""
+
+        self.cc.configure_gdo(0, 'RX_FIFO_THR_OR_END', invert=1)
+        assert self.spi.registers[CC1101.IOCFG0] == 0x41
+        with self.assertRaises(ValueError):
+            self.cc.configure_gdo(0, 'NOPE')
+
+    def test_recv_wait(self):
+        """Test no FIFO traffic happens until the edge fires"""
+
+        assert self.cc.recv_wait(self.edge, timeout=0.01) is None
+        assert len(self.spi.transfers) == 1
+
+        def arrive():
+            self.spi.rx_fifo.extend([3, 1, 2, 3])
+            self.edge.trigger()
+
+        timer = threading.Timer(0.01, arrive)
+        timer.start()
+        assert self.cc.recv_wait(self.edge, timeout=1).data == bytes([1, 2, 3])
+        timer.join()
+
+    def test_bad_length(self):
+        """Test a bad length byte flushes the FIFO, empty packets still count"""
+
+        sim = SimulatedCC1101()
+        cc = CC1101(spi=sim)
+        sim.inject(bytes(20))
+        cc.enable_rx()
+        cc.write_byte('PKTLEN', 5)
+        assert cc.recv_data() is None
+        assert sim.rx_fifo == bytearray()
+        assert sim.state == sim.IDLE
+
+        sim.inject(b'')
+        self.edge.trigger()
+        packets = cc.rx_events(self.edge, timeout=0.01)
+        assert next(packets).data == b''
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import time
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.group import RadioGroup
+from pyticc.sim import SimulatedCC1101
+
+
+class TestRadioGroup(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sims = {'a': SimulatedCC1101(), 'b': SimulatedCC1101(),
+                     'c': SimulatedCC1101()}
+        self.group = RadioGroup({
+            'a': {'spi': self.sims['a'], 'spi_bus': 0, 'spi_device': 0},
+            'b': {'spi': self.sims['b'], 'spi_bus': 0, 'spi_device': 1,
+                  'config': {'PKTCTRL1': 0x04}},
+            'c': CC1101(spi=self.sims['c'], spi_bus=1),
+        }, config={'PKTCTRL1': 0x00, 'MCSM1': 0x3C})
+
+    def tearDown(self):
+        self.group.stop()
+
+    def test_setup(self):
+        """Test radios are configured and grouped by bus"""
+
+        assert sorted(self.group._buses[0]) == ['a', 'b']
+        assert self.group._buses[1] == ['c']
+        assert self.group['a'].read_byte('PKTCTRL1') == 0x00
+        assert self.group['b'].read_byte('PKTCTRL1') == 0x04
+        assert self.group['c'].read_byte('MCSM1') == 0x3C
+
+    def test_feed(self):
+        """Test packets from every radio merge into one tagged feed"""
+
+        for radio_id, sim in self.sims.items():
+            sim.inject(radio_id.encode())
+        self.group.start()
+
+        packets = [self.group.get(timeout=1) for _ in range(3)]
+        assert sorted((p.radio, p.data) for p in packets) == \
+            [('a', b'a'), ('b', b'b'), ('c', b'c')]
+        assert self.group.stats()['a']['received'] == 1
+
+    def test_send(self):
+        """Test per-radio TX queues"""
+
+        self.group.start()
+        futures = [self.group.send('c', [1, 2]), self.group.send('a', [3])]
+        assert [f.result(timeout=1) for f in futures] == [True, True]
+        assert self.sims['c'].transmitted == [bytes([1, 2])]
+        assert self.sims['a'].transmitted == [bytes([3])]
+        with self.assertRaises(ValueError):
+            self.group.send('x', [1])
+
+    def test_error(self):
+        """Test a failing radio is retried while the others carry on"""
+
+        def unplugged(data):
+            raise OSError("SPI bus gone")
+
+        self.sims['c'].xfer = unplugged
+        self.group.start()
+
+        deadline = time.monotonic() + 1
+        while 'c' not in self.group.errors and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert isinstance(self.group.errors['c'], OSError)
+
+        self.sims['a'].inject(b'a')
+        assert self.group.get(timeout=1).radio == 'a'
+
+        del self.sims['c'].xfer
+        self.sims['c'].inject(b'c')
+        assert self.group.get(timeout=2).data == b'c'
+        deadline = time.monotonic() + 1
+        while 'c' in self.group.errors and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert 'c' not in self.group.errors
+        assert self.group.stats()['c']['errors'] >= 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.hopping import Hopper
+from pyticc.sim import SimulatedCC1101
+
+
+class TestHopping(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sim = SimulatedCC1101()
+        self.cc = CC1101(spi=self.sim, shadow_registers=True)
+        self.cc.refresh_shadow()
+
+    def test_calibrate(self):
+        """Test each channel is calibrated once and autocal is turned off"""
+
+        hopper = Hopper(self.cc, [0, 10, 20, 30])
+        calibration = hopper.calibrate()
+        assert self.sim.calibrations == 4
+        assert len(set(calibration)) == 4
+        assert self.cc.register_value('MCSM0')['FS_AUTOCAL[1:0]'] == 0
+
+        with self.assertRaises(ValueError):
+            Hopper(self.cc, [1], mode='sleep')
+        with self.assertRaises(ValueError):
+            Hopper(self.cc, [1]).hop()
+
+    def test_hop(self):
+        """Test a hop is five transfers and lands calibrated"""
+
+        hopper = Hopper(self.cc, [0, 10, 20, 30])
+        hopper.calibrate()
+
+        for index in (2, 0, 3):
+            start = self.sim.transfers
+            assert hopper.hop(index) == hopper.channels[index]
+            assert self.sim.transfers - start == 5
+            assert self.sim.state == self.sim.RX
+            assert self.sim.registers[self.cc.CHANNR] == hopper.channels[index]
+            assert self.sim.pll_lock
+
+        assert hopper.hop() == 0
+        self.cc.write_byte('MDMCFG2', 0x30)     # kept across hops
+        assert hopper.hop() == 10
+        assert self.sim.registers[self.cc.MDMCFG2] == 0x30
+        assert self.sim.calibrations == 4
+        assert hopper.stats()['hops'] == 5
+
+        # without the cached calibration the synthesizer would be off
+        self.cc.sidle()
+        self.cc.channel(20)
+        self.cc.enable_rx()
+        assert not self.sim.pll_lock
+
+    def test_frequencies(self):
+        """Test hopping by carrier frequency, with one burst write"""
+
+        hopper = Hopper(self.cc, [433100000, 433500000, 434700000], mode='tx',
+                        burst=True)
+        hopper.calibrate()
+
+        start = self.sim.transfers
+        hopper.hop(1)
+        assert self.sim.transfers - start == 4
+        assert self.sim.state == self.sim.TX
+        assert self.sim.pll_lock
+        assert self.cc.base_frequency() // 1000 == 433500
+
+        # the burst runs over the registers in between
+        self.cc.write_byte('MDMCFG2', 0x30)
+        hopper.hop(2)
+        assert self.sim.registers[self.cc.MDMCFG2] != 0x30
+
+    def test_run(self):
+        """Test the dwell scheduler follows the sequence"""
+
+        hopper = Hopper(self.cc, [0, 10, 20])
+        hopper.calibrate()
+
+        visited = []
+        result = hopper.run(0.001, hops=5, sequence=[2, 0],
+                            on_hop=lambda h, channel: visited.append(channel))
+        assert visited == [20, 0, 20, 0, 20]
+        assert result['hops'] == 5
+
+
+if __name__ == '__main__':
+    unittest.main()
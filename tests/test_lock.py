@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import sys
+import threading
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.lock import TimedLock, bus_lock
+from pyticc.sim import SimulatedCC1101
+
+
+class TestLocks(unittest.TestCase):
+# ###############################################
+
+    def test_timed_lock(self):
+        """Test hold and wait times are measured once per outer section"""
+
+        lock = TimedLock('test')
+        with lock:
+            with lock:
+                pass
+        assert lock.acquisitions == 1
+
+        lock.acquire()
+        waiter = threading.Thread(target=lambda: lock.acquire() and lock.release())
+        waiter.start()
+        waiter.join(0.02)
+        assert waiter.is_alive()
+        lock.release()
+        waiter.join(1)
+
+        stats = lock.stats()
+        assert stats['acquisitions'] == 3
+        assert stats['contended'] == 1
+        assert stats['wait_max_us'] > 0
+        assert stats['hold_max_us'] >= stats['hold_mean_us']
+
+    def test_bus_locks(self):
+        """Test chip selects on one bus share a lock"""
+
+        a = CC1101(spi=SimulatedCC1101(), spi_bus=7, spi_device=0)
+        b = CC1101(spi=SimulatedCC1101(), spi_bus=7, spi_device=1)
+        c = CC1101(spi=SimulatedCC1101(), spi_bus=8)
+        assert a.bus_lock is b.bus_lock is bus_lock(7)
+        assert a.bus_lock is not c.bus_lock
+        assert a.lock is not b.lock
+
+        acquisitions = a.bus_lock.acquisitions
+        a.read_byte(0x00)
+        b.read_byte(0x00)
+        assert a.bus_lock.acquisitions == acquisitions + 2
+
+    def test_atomic(self):
+        """Test atomic sections keep other threads out"""
+
+        cc = CC1101(spi=SimulatedCC1101())
+        with cc.atomic():
+            writer = threading.Thread(
+                target=cc.register_write, args=('MDMCFG2', 'MOD_FORMAT', 7))
+            writer.start()
+            writer.join(0.02)
+            assert writer.is_alive()
+            assert cc.read_byte('MDMCFG2') == 0x02
+        writer.join(1)
+        assert cc.read_byte('MDMCFG2') == 0x72
+
+    def test_read_modify_write(self):
+        """Test concurrent field writes to one register do not clobber"""
+
+        cc = CC1101(spi=SimulatedCC1101())
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=lambda: [
+                    cc.register_write('MDMCFG2', 'MOD_FORMAT', i & 0x07)
+                    for i in range(1, 2001)]),
+                threading.Thread(target=lambda: [
+                    cc.register_write('MDMCFG2', 'SYNC_MODE', i & 0x03)
+                    for i in range(1, 2004)]),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        assert cc.register_value('MDMCFG2')['MOD_FORMAT[2:0]'] == 2000 & 0x07
+        assert cc.register_value('MDMCFG2')['SYNC_MODE[2:0]'] == 2003 & 0x03
+
+
+if __name__ == '__main__':
+    unittest.main()
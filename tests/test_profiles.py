@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import tempfile
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.profiles import (
+    PROFILES, Profile, ProfileCache, RegisterImage, load_smartrf, parse_smartrf)
+from pyticc.sim import SimulatedCC1101
+
+
+SMARTRF_EXPORT = """
+// Address Config = No address check
+#define SMARTRF_SETTING_IOCFG0       0x06
+#define SMARTRF_SETTING_FREQ2        0x10
+#define SMARTRF_SETTING_FREQ1        0xB0
+#define SMARTRF_SETTING_FREQ0        0x71
+{CC1101_MDMCFG2, 0x30},  // Modem Configuration 0x13
+FSCAL3       0x23    0xE9
+#define SMARTRF_SETTING_PA_TABLE0    0x00
+#define SMARTRF_SETTING_PA_TABLE1    0xC0
+#define SMARTRF_SETTING_SPEED        0x01
+"""
+
+
+class TestProfiles(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sim = SimulatedCC1101()
+        self.cc = CC1101(spi=self.sim, shadow_registers=True)
+
+    def test_compile(self):
+        """Test a profile compiles to the registers its setters would write"""
+
+        image = PROFILES['433 OOK 4.8k'].compile(self.cc)
+        assert len(image.image) == self.cc.CONFIG_SIZE
+        assert image.patable == bytes([0x00, 0xC0])
+
+        self.cc.load_profile(image)
+        assert self.cc.modulation() == 'ASK'
+        assert self.cc.packet_length() == 'PKT_LEN_FIXED'
+        assert self.cc.sync_word() == '0000'
+        assert self.cc.read_byte('TEST2') == 0x81
+        assert self.cc.register_value('MDMCFG2')['SYNC_MODE[2:0]'] == 0
+
+    def test_load_one_burst(self):
+        """Test a profile loads with a handful of transfers and fills the shadow"""
+
+        self.cc.reset()
+        start = self.sim.transfers
+        self.cc.load_profile('868 GFSK 38.4k')
+        assert self.sim.transfers - start <= 5
+        assert self.sim.registers[self.cc.DEVIATN] == 0x34
+        assert self.sim.patable[0] == 0xC0
+        assert self.cc.shadow.complete()
+
+        with self.assertRaises(ValueError):
+            self.cc.load_profile('2.4 GHz')
+        with self.assertRaises(ValueError):
+            self.cc.load_image(bytes(4))
+
+    def test_wake(self):
+        """Test wake() restores the registers and PATABLE lost in SLEEP"""
+
+        image = self.cc.load_profile('433 OOK 4.8k')
+        self.cc.power_down()
+        self.cc.wake()
+        assert bytes(self.sim.registers) == image.image
+        assert self.sim.patable[:2] == bytes([0x00, 0xC0])
+
+    def test_cache(self):
+        """Test compiled images are stored, reused and recompiled on change"""
+
+        path = os.path.join(tempfile.mkdtemp(), 'profiles.json')
+        cache = ProfileCache(path)
+        first = self.cc.load_profile('433 OOK 4.8k', cache=cache)
+        assert cache.misses == 1
+
+        cache = ProfileCache(path)
+        assert len(cache) == 1
+        assert self.cc.load_profile('433 OOK 4.8k', cache=cache) == first
+        assert cache.hits == 1
+
+        profile = Profile('433 OOK 4.8k', dict(PROFILES['433 OOK 4.8k'].config,
+                                               CHANNR=3))
+        assert cache.get(profile, self.cc).image[self.cc.CHANNR] == 3
+        assert cache.misses == 1
+        with open(path) as fh:
+            assert len(json.load(fh)) == 2
+
+    def test_smartrf(self):
+        """Test reading a SmartRF Studio export"""
+
+        config, patable = parse_smartrf(SMARTRF_EXPORT, ['IOCFG0', 'FREQ2', 'FREQ1',
+                                                         'FREQ0', 'MDMCFG2', 'FSCAL3'])
+        assert config == {'IOCFG0': 0x06, 'FREQ2': 0x10, 'FREQ1': 0xB0,
+                          'FREQ0': 0x71, 'MDMCFG2': 0x30, 'FSCAL3': 0xE9}
+        assert patable == [0x00, 0xC0]
+
+        path = os.path.join(tempfile.mkdtemp(), 'smartrf.h')
+        with open(path, 'w') as fh:
+            fh.write(SMARTRF_EXPORT)
+        profile = load_smartrf(path, self.cc, name='433 smartrf')
+        image = self.cc.load_profile(profile)
+        assert isinstance(image, RegisterImage)
+        assert self.cc.base_frequency() // 1000000 == 433
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import queue
+import threading
+import time
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+from pyticc.gpio import PipeEdge
+from pyticc.receiver import PacketRing
+from pyticc.sim import SimulatedCC1101
+
+
+class ErrataSim(SimulatedCC1101):
+    """
+    Simulator counting RX FIFO reads that empty it mid-packet.
+
+    Air bytes only arrive between FIFO reads, so the burst reads what
+    RXBYTES reported.
+    """
+
+    def __init__(self, **kwargs):
+        super(ErrataSim, self).__init__(**kwargs)
+        self.emptied = 0
+        self._fifo_read = False
+
+    def xfer(self, data):
+        self._fifo_read = data[0] & 0xBF == 0xBF
+        out = super(ErrataSim, self).xfer(data)
+        if self._fifo_read and not self.rx_fifo and self._rx_frame:
+            self.emptied += 1
+        return out
+
+    def _link(self):
+        if not self._fifo_read:
+            super(ErrataSim, self)._link()
+
+
+class TestPacketRing(unittest.TestCase):
+# ###############################################
+
+    def test_drop_oldest(self):
+        """Test the oldest entries are overwritten"""
+
+        ring = PacketRing(2)
+        for i in range(4):
+            assert ring.put(i)
+        assert ring.get() == 2
+        assert ring.get() == 3
+        assert ring.dropped_oldest == 2
+        with self.assertRaises(queue.Empty):
+            ring.get(timeout=0)
+
+    def test_drop_newest(self):
+        """Test new entries are discarded"""
+
+        ring = PacketRing(2, 'drop-newest')
+        assert ring.put(1) and ring.put(2)
+        assert not ring.put(3)
+        assert ring.get() == 1
+        assert ring.stats()['dropped_newest'] == 1
+
+    def test_block(self):
+        """Test put waits for room"""
+
+        ring = PacketRing(1, 'block')
+        ring.put(1)
+        assert not ring.put(2, timeout=0.01)
+        threading.Timer(0.01, ring.get).start()
+        assert ring.put(3, timeout=1)
+        assert ring.get() == 3
+
+    def test_close(self):
+        """Test closed rings drain, then stop"""
+
+        ring = PacketRing(2)
+        ring.put(1)
+        ring.close()
+        assert ring.get() == 1
+        with self.assertRaises(queue.Empty):
+            ring.get()
+
+
+class TestReceiver(unittest.TestCase):
+# ###############################################
+
+    def test_receiver(self):
+        """Test packets flow from the radio thread to the consumer"""
+
+        spi = FakeSPI()
+        spi.registers[CC1101.PKTCTRL0] = 0x01
+        spi.registers[CC1101.PKTLEN] = 0x3D
+        cc = CC1101(spi=spi)
+
+        spi.rx_fifo.extend([2, 5, 6])
+        rx = cc.start_receiver(capacity=4)
+        packet = rx.get(timeout=1)
+        cc.stop_receiver()
+
+        assert packet.data == bytes([5, 6])
+        assert packet.timestamp <= time.monotonic()
+        assert list(rx) == []
+        assert rx.stats()['received'] == 1
+
+    def test_error(self):
+        """Test a failure on the RX thread reaches the consumer"""
+
+        spi = FakeSPI()
+        spi.registers[CC1101.PKTCTRL0] = 0x01
+        spi.registers[CC1101.PKTLEN] = 0x3D
+        cc = CC1101(spi=spi)
+
+        spi.rx_fifo.extend([2, 5, 6])
+        rx = cc.start_receiver()
+        assert rx.get(timeout=1).data == bytes([5, 6])
+
+        def unplugged(data):
+            raise OSError("SPI bus gone")
+
+        spi.xfer = unplugged
+        with self.assertRaises(OSError):
+            rx.get(timeout=1)
+        with self.assertRaises(OSError):
+            list(rx)
+        assert isinstance(rx.error, OSError)
+        cc.stop_receiver()
+
+    def test_edge(self):
+        """Test the edge driven receiver puts the chip in RX"""
+
+        sim = SimulatedCC1101()
+        cc = CC1101(spi=sim)
+        edge = PipeEdge()
+        rx = cc.start_receiver(edge=edge)
+        try:
+            for payload in (b'one', b'two'):
+                deadline = time.monotonic() + 1
+                while sim.state != sim.RX and time.monotonic() < deadline:
+                    time.sleep(0.001)
+                assert sim.state == sim.RX
+
+                sim.inject(payload)
+                edge.trigger()
+                assert rx.get(timeout=1).data == payload
+        finally:
+            cc.stop_receiver()
+            edge.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestRecvPackets(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.spi.registers[CC1101.PKTCTRL0] = 0x01
+        self.spi.registers[CC1101.PKTCTRL1] = 0x04  # APPEND_STATUS
+        self.spi.registers[CC1101.PKTLEN] = 0x3D
+        self.cc = CC1101(spi=self.spi)
+
+    def test_multiple_packets(self):
+        """Test one FIFO burst is split into every queued packet"""
+
+        self.spi.rx_fifo.extend([2, 5, 6, 0x10, 0x85, 1, 7, 0xF0, 0x2A])
+        del self.spi.transfers[:]
+        packets = self.cc.recv_packets()
+
+        assert [p.data for p in packets] == [bytes([5, 6]), bytes([7])]
+        assert packets[0].rssi == 8 - 74
+        assert packets[0].lqi == 5
+        assert packets[1].rssi == -8 - 74
+        assert packets[1].lqi == 0x2A
+        fifo_reads = [t for t in self.spi.transfers if t[0] & 0x3F == 0x3F]
+        assert len(fifo_reads) == 1
+        assert self.spi.rx_fifo == bytearray()
+
+    def test_partial_packet(self):
+        """Test a packet still arriving is completed on the next call"""
+
+        self.spi.rx_fifo.extend([3, 1, 2])
+        assert self.cc.recv_packets() == []
+        self.spi.rx_fifo.extend([3, 0, 0x80])
+        packets = self.cc.recv_packets()
+        assert [p.data for p in packets] == [bytes([1, 2, 3])]
+
+    def test_slow_link(self):
+        """Test the FIFO is never read empty while a packet arrives"""
+
+        for mcsm1 in (0x30, 0x3C):      # RXOFF_MODE IDLE, RX
+            sim = ErrataSim(bytes_per_xfer=3)
+            cc = CC1101(spi=sim)
+            cc.write_byte('MCSM1', mcsm1)
+            cc.write_byte('PKTCTRL1', 0x04)
+            payloads = [bytes(range(20)), b'abcde', b'']
+            for payload in payloads:
+                sim.inject(payload)
+
+            packets = []
+            for _ in range(200):
+                packets += cc.recv_packets()
+                if len(packets) == len(payloads):
+                    break
+
+            assert [p.data for p in packets] == payloads
+            assert all(p.crc_ok for p in packets)
+            assert sim.emptied == 0
+
+    def test_fixed_length(self):
+        """Test fixed length packets use PKTLEN"""
+
+        self.spi.registers[CC1101.PKTCTRL0] = 0x00
+        self.spi.registers[CC1101.PKTLEN] = 2
+        self.spi.rx_fifo.extend([1, 2, 0, 0, 3, 4, 0, 0])
+        packets = self.cc.recv_packets()
+        assert [p.data for p in packets] == [bytes([1, 2]), bytes([3, 4])]
+
+        # PKTLEN=0 without status bytes has no frame boundary at all
+        self.spi.registers[CC1101.PKTLEN] = 0
+        self.spi.registers[CC1101.PKTCTRL1] &= ~0x04
+        self.spi.rx_fifo.extend([1, 2])
+        assert self.cc.recv_packets() == []
+        assert self.cc._rx_carry == bytearray()
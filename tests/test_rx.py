@@ -39,7 +39,7 @@ cc.register_write('AGCCTRL1', 'CARRIER_SENSE_ABS_THR[3:0]', 0x0)
 
 
 while True:
-    data = cc.recv_data()
-    if data is not None:
-        print("\nRSSI: %d" % cc.rssi())
-        print(data)
+    packet = cc.recv_data()
+    if packet is not None:
+        print("\nRSSI: %d LQI: %d CRC: %s" % (packet.rssi, packet.lqi, packet.crc_ok))
+        print(packet.data)
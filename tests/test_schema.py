@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.schema import compile_schema
+from pyticc.utils import byte_bit_value
+
+
+class Addr(object):
+    A = 0x00
+    B = 0x01
+
+
+class TestSchema(unittest.TestCase):
+# ###############################################
+
+    def test_fields_match_utils(self):
+        """Test compiled fields decode like byte_bit_value"""
+
+        for register in CC1101.fields:
+            for field in register:
+                for byte in (0x00, 0x5A, 0xA5, 0xFF):
+                    assert field.decode(byte) == byte_bit_value(byte, (field.index, field.bits))
+
+    def test_field_lookup(self):
+        """Test field access by attribute, spec name and address"""
+
+        fields = CC1101.fields
+        assert fields.MDMCFG2.MOD_FORMAT is fields['MDMCFG2']['MOD_FORMAT[2:0]']
+        assert fields[0x12] is fields.MDMCFG2
+        assert fields.VERSION.address == CC1101.VERSION
+        assert fields.MDMCFG1.CHANSPC_E.bits == 2
+        assert fields.FREQ2.FREQ_21_16.mask == 0x3F
+
+    def test_encode(self):
+        """Test field encoding and range checks"""
+
+        field = CC1101.fields.MDMCFG2.MOD_FORMAT
+        assert field.encode(0x00, '011') == 0x30
+        assert field.encode(0xFF, 0) == 0x8F
+        with self.assertRaises(ValueError):
+            field.encode(0x00, 8)
+
+    def test_schema_errors(self):
+        """Test schema mistakes are caught when compiling"""
+
+        with self.assertRaises(ValueError):
+            compile_schema((("A", ()), ("A", ())), Addr)
+        with self.assertRaises(ValueError):
+            compile_schema((("A", (("X", 0, 4), ("Y", 2, 2))),), Addr)
+        with self.assertRaises(ValueError):
+            compile_schema((("B", (("X", 6, 4),)),), Addr)
+
+
+if __name__ == '__main__':
+    unittest.main()
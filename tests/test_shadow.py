@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+from pyticc.shadow import RegisterShadow
+from pyticc.sim import SimulatedCC1101
+
+
+class TestShadow(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.cc = CC1101(spi=self.spi, shadow_registers=True)
+
+    def test_register_shadow(self):
+        """Test validity tracking and counters"""
+
+        shadow = RegisterShadow(4, volatile=[3])
+        assert shadow.get(0) is None
+        shadow.update(0, [1, 2, 3, 4, 5])
+        assert shadow.image() == bytes([1, 2, 3, 4])
+        shadow.sleep()
+        assert shadow.get(3) is None
+        assert shadow.get(2) == 3
+        assert shadow.stats()['hits'] == 1
+        assert shadow.stats()['misses'] == 2
+
+    def test_reads_are_cached(self):
+        """Test config reads only touch the bus once"""
+
+        self.spi.registers[self.cc.MDMCFG2] = 0x70
+        assert self.cc.modulation() == 'MSK'
+        count = len(self.spi.transfers)
+        assert self.cc.modulation() == 'MSK'
+        assert len(self.spi.transfers) == count
+
+    def test_write_through(self):
+        """Test register_write leaves the shadow current"""
+
+        self.cc.refresh_shadow()
+        assert len(self.spi.transfers) == 1
+        self.cc.manchester(1)
+        assert len(self.spi.transfers) == 2
+        assert self.cc.shadow.get(self.cc.MDMCFG2) == 0x08
+
+    def test_reset_and_sleep(self):
+        """Test strobes invalidate the right registers"""
+
+        self.cc.refresh_shadow()
+        self.cc.strobe(self.cc.SPWD)
+        assert self.cc.shadow.get(self.cc.TEST0) is None
+        assert self.cc.shadow.get(self.cc.FREND1) is not None
+        self.cc.reset()
+        assert self.cc.shadow.get(self.cc.FREND1) is None
+
+    def test_calibration(self):
+        """Test FSCAL3..1 are read again after the chip calibrates"""
+
+        sim = SimulatedCC1101()
+        cc = CC1101(spi=sim, shadow_registers=True)
+        cc.refresh_shadow()
+        cc.calibrate()
+        cc.sidle()
+        assert cc.read_byte('FSCAL1') == sim.registers[CC1101.FSCAL1]
+        assert cc.read_byte('FSCAL1') != CC1101.RESET_DEFAULTS[CC1101.FSCAL1]
+        assert cc.register_image() == bytes(sim.registers[:CC1101.CONFIG_SIZE])
+
+        cc.enable_rx()
+        assert cc.shadow.get(cc.FSCAL3) is None
+        assert cc.shadow.get(cc.FREND1) is not None
+
+
+if __name__ == '__main__':
+    unittest.main()
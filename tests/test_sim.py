@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.errors import RXOverflow
+from pyticc.sim import SimulatedCC1101
+
+
+class TestSimulator(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sim = SimulatedCC1101()
+        self.cc = CC1101(spi=self.sim)
+
+    def test_registers(self):
+        """Test reset defaults, burst access and SRES"""
+
+        self.cc.sanity_check()
+        assert self.cc.read_burst(0x04, 2) == bytes([0xD3, 0x91])
+        assert self.cc.packet_length() == 'PKT_LEN_VARIABLE'
+
+        self.cc.write_burst('SYNC1', [0xFA, 0xFA])
+        self.cc.write_burst('PATABLE', [0x60, 0x84])
+        assert self.cc.sync_word() == 'FAFA'
+        assert self.cc.read_burst('PATABLE', 3) == bytes([0x60, 0x84, 0])
+
+        self.cc.reset()
+        assert self.cc.read_byte('SYNC1') == 0xD3
+
+    def test_sleep(self):
+        """Test SLEEP loses the TEST registers and wakes on CSn"""
+
+        self.cc.write_byte('TEST2', 0x81)
+        self.cc.write_byte('FREQ2', 0x10)
+        self.cc.power_down()
+        assert self.sim.state == self.sim.SLEEP
+        assert self.cc.read_byte('TEST2') == 0x88
+        assert self.cc.read_byte('FREQ2') == 0x10
+        assert self.cc.marcstate() == 0x01
+
+    def test_receive(self):
+        """Test injected packets come out with status bytes"""
+
+        self.sim.inject(b'hello', rssi=-60, lqi=30)
+        self.cc.enable_rx()
+        packet = self.cc.recv_data()
+        assert packet.data == b'hello'
+        assert (packet.rssi, packet.lqi, packet.crc_ok) == (-60, 30, True)
+        assert packet.address is None
+        assert self.cc.marcstate() == 0x01   # RXOFF_MODE: IDLE
+
+        self.sim.inject(b'one', rssi=-50)
+        self.sim.inject(b'two', rssi=-80)
+        self.sim.registers[CC1101.MCSM1] = 0x3C    # stay in RX
+        self.cc.enable_rx()
+        packets = self.cc.recv_packets()
+        assert [p.data for p in packets] == [b'one', b'two']
+        assert [p.rssi for p in packets] == [-50, -80]
+        assert packets[0].lqi == 20
+
+    def test_filters(self):
+        """Test CRC autoflush and address filtering drop packets"""
+
+        self.cc.write_byte('PKTCTRL1', 0x0D)     # CRC_AUTOFLUSH, ADR_CHK=1
+        self.cc.write_byte('ADDR', 0x42)
+        self.sim.inject(b'\x42bad', crc_ok=False)
+        self.sim.inject(b'\x41other')
+        self.sim.inject(b'\x42ok')
+        self.sim.registers[CC1101.MCSM1] = 0x3C
+        self.cc.enable_rx()
+        packets = self.cc.recv_packets()
+        assert [p.data for p in packets] == [b'\x42ok']
+        assert packets[0].address == 0x42
+        assert self.sim.dropped == 2
+
+        # without autoflush, bad packets come through flagged
+        self.cc.write_byte('PKTCTRL1', 0x04)
+        self.sim.inject(b'bad', crc_ok=False)
+        self.cc.enable_rx()
+        packet = self.cc.recv_data()
+        assert packet.payload == b'bad'
+        assert packet.crc_ok is False
+
+    def test_overflow(self):
+        """Test a packet larger than the FIFO overflows it"""
+
+        self.cc.write_byte('PKTCTRL0', 0x00)
+        self.cc.write_byte('PKTLEN', 100)
+        self.sim.inject(bytes(100))
+        self.cc.enable_rx()
+        assert self.cc.read_status().state == 'RXFIFO_OVERFLOW'
+        assert self.cc.read_byte('RXBYTES') == 0x80 | 64
+
+    def test_transmit(self):
+        """Test send_data puts the packet on the air"""
+
+        received = []
+        self.cc.write_byte('PKTCTRL1', 0x00)
+        self.sim.tx_hook = received.append
+        assert self.cc.send_data([1, 2, 3])
+        assert self.sim.transmitted == [bytes([1, 2, 3])]
+        assert received == [bytes([1, 2, 3])]
+        assert self.cc.marcstate() == 0x01
+
+    def test_cca(self):
+        """Test a busy channel keeps the chip in RX"""
+
+        self.cc.write_byte('MCSM1', 0x3C)      # CCA, stay in RX
+        self.sim.channel_clear = False
+        self.cc.enable_rx()
+        assert not self.cc.send_data([1])
+        assert self.sim.transmitted == []
+
+    def test_streams(self):
+        """Test long packets through a slow link"""
+
+        sim = SimulatedCC1101(bytes_per_xfer=8)
+        cc = CC1101(spi=sim)
+        payload = bytes(i & 0xFF for i in range(600))
+
+        assert cc.send_stream(payload) == 600
+        assert sim.transmitted == [payload]
+
+        sim.inject(payload, rssi=-60)
+        data = b''.join(cc.recv_stream(600, timeout=1))
+        assert data[:600] == payload
+        assert data[600:] == bytes([28, 0x80 | 20])     # APPEND_STATUS
+
+        sim.inject(payload)
+        sim.bytes_per_xfer = 100
+        with self.assertRaises(RXOverflow):
+            list(cc.recv_stream(600, timeout=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.sim import SimulatedCC1101
+from pyticc.solvers import (
+    solve_channel_spacing, solve_data_rate, solve_deviation, solve_frequency,
+    solve_rx_bandwidth, tables)
+
+
+class TestSolvers(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sim = SimulatedCC1101()
+        self.cc = CC1101(spi=self.sim)
+
+    def test_tables(self):
+        """Test every register setting is in the tables, sorted"""
+
+        t = tables(26000000)
+        assert [len(t[name]) for name in ('DRATE', 'CHANBW', 'CHANSPC', 'DEVIATN')] == [4096, 16, 1024, 64]
+        assert t['DRATE'].values == sorted(t['DRATE'].values)
+        assert t['CHANBW'].range() == (26000000 / 8.0 / 7 / 8, 26000000 / 8.0 / 4)
+        assert tables(26000000) is t
+
+    def test_nearest(self):
+        """Test solvers pick the closest setting, not the truncated one"""
+
+        # truncating the mantissa gives (5, 66), 1001.12 baud is closer
+        solution = solve_data_rate(1000)
+        assert solution.code == (5, 67)
+        assert abs(solution.error) < 1.2
+
+        # settings above the chip's 600 kBaud are never picked
+        assert tables(26000000)['DRATE'].nearest(700000, maximum=600000).value <= 600000
+        with self.assertRaises(ValueError):
+            solve_data_rate(700000)
+        with self.assertRaises(ValueError):
+            solve_data_rate(100)
+
+        assert solve_rx_bandwidth(232000).code == (1, 3)
+        assert solve_rx_bandwidth(1).code == (3, 3)
+        assert solve_channel_spacing(199951).code == (2, 248)
+        assert solve_deviation(47607).code == (4, 7)
+
+    def test_frequency(self):
+        """Test arbitrary carrier frequencies inside the bands"""
+
+        solution = solve_frequency(433920000)
+        assert solution.code == 0x10B071
+        assert abs(solution.error) < 26000000 / 2.0 ** 17
+
+        with self.assertRaises(ValueError):
+            solve_frequency(500000000)
+
+        self.cc.base_frequency(433.92)
+        assert self.sim.registers[self.cc.FREQ2:self.cc.FREQ0 + 1] == bytes([0x10, 0xB0, 0x71])
+        self.cc.base_frequency(868300000)
+        assert self.sim.registers[self.cc.FREQ2] == 0x21
+
+    def test_settings(self):
+        """Test set/get of rate, bandwidth, spacing and deviation"""
+
+        assert self.cc.baud_rate(1000) == 1001
+        assert self.cc.rx_bandwidth(200000) == 203125
+        assert self.cc.channel_spacing() == 199951.171875
+        assert self.cc.channel_spacing(50000) == solve_channel_spacing(50000).value
+        assert self.cc.deviation(20000) == solve_deviation(20000).value
+        assert self.sim.registers[self.cc.DEVIATN] == 0x35
+
+        runs = self.cc.apply_config({'channel_spacing': 199951, 'deviation': 47607})
+        assert self.cc.channel_spacing() == 199951.171875
+        assert self.sim.registers[self.cc.DEVIATN] == 0x47
+        assert runs == [(self.cc.MDMCFG1, bytes([0x22, 0xF8, 0x47]))]
+
+
+if __name__ == '__main__':
+    unittest.main()
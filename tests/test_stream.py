@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+from pyticc.errors import RXOverflow
+
+
+class AirSPI(FakeSPI):
+    """FakeSPI whose RX FIFO fills a few bytes per RXBYTES poll."""
+
+    def __init__(self, payload, rate=20):
+        super(AirSPI, self).__init__()
+        self.air = bytearray(payload)
+        self.rate = rate
+        self.modes = []
+        self.lengths = []
+
+    def xfer(self, data):
+        if data[0] == 0xFB:
+            self.rx_fifo.extend(self.air[:self.rate])
+            del self.air[:self.rate]
+            if len(self.rx_fifo) > 64:
+                return [0x0F, 0x80 | 64]
+        if data[0] == CC1101.PKTCTRL0:
+            self.modes.append(data[1] & 0x03)
+        if data[0] == CC1101.PKTLEN:
+            self.lengths.append(data[1])
+        return super(AirSPI, self).xfer(data)
+
+
+class TestStream(unittest.TestCase):
+# ###############################################
+
+    def radio(self, spi):
+        spi.registers[CC1101.FIFOTHR] = 0x07      # 32 byte chunks
+        return CC1101(spi=spi)
+
+    def test_long_packet(self):
+        """Test a 300 byte packet switches to fixed length for the tail"""
+
+        payload = bytes(i & 0xFF for i in range(300))
+        spi = AirSPI(payload)
+        spi.registers[CC1101.PKTLEN] = 20
+        cc = self.radio(spi)
+
+        chunks = list(cc.recv_stream(300, timeout=1))
+        assert b''.join(chunks) == payload
+        assert max(len(c) for c in chunks) < 64
+        assert spi.lengths == [300 % 256, 20]
+        assert spi.registers[CC1101.PKTLEN] == 20
+        assert spi.modes == [2, 0, 0]
+
+    def test_unlocked_yield(self):
+        """Test recv_stream releases the radio lock before yielding"""
+
+        spi = AirSPI(b'x' * 100)
+        cc = self.radio(spi)
+        chunks = cc.recv_stream(100, timeout=1)
+        next(chunks)
+
+        free = []
+        def probe():
+            free.append(cc.lock.acquire(False))
+            if free[0]:
+                cc.lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        assert free == [True]
+        assert len(b''.join(chunks)) > 0
+
+    def test_recv_into(self):
+        """Test streaming into a caller buffer"""
+
+        spi = AirSPI(b'x' * 100)
+        cc = self.radio(spi)
+        buffer = bytearray(100)
+        assert cc.recv_into(buffer, timeout=1) == 100
+        assert buffer == b'x' * 100
+        assert spi.modes == [0, 0]
+
+    def test_overflow(self):
+        """Test a slow drain reports RX overflow"""
+
+        spi = AirSPI(b'x' * 200, rate=80)
+        spi.registers[CC1101.PKTLEN] = 20
+        cc = self.radio(spi)
+        with self.assertRaises(RXOverflow):
+            list(cc.recv_stream(200))
+        assert spi.registers[CC1101.PKTLEN] == 20
+
+
+if __name__ == '__main__':
+    unittest.main()
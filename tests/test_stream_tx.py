@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import io
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+from pyticc.errors import TXUnderflow
+
+
+class DrainSPI(FakeSPI):
+    """FakeSPI that sends a few TX FIFO bytes per TXBYTES poll."""
+
+    def __init__(self, rate=20, underflow=False):
+        super(DrainSPI, self).__init__()
+        self.rate = rate
+        self.underflow = underflow
+        self.sent = bytearray()
+        self.modes = []
+        self.lengths = []
+
+    def xfer(self, data):
+        if data[0] == CC1101.STX:
+            self.registers[0x35] = 0x13
+        if data[0] == CC1101.SIDLE:
+            self.registers[0x35] = 0x01
+        if data[0] == 0xFA:
+            self.sent.extend(self.tx_fifo[:self.rate])
+            del self.tx_fifo[:self.rate]
+            if not self.tx_fifo:
+                if self.underflow and self.registers[0x35] == 0x13:
+                    return [0x0F, 0x80]
+                self.registers[0x35] = 0x01
+        if data[0] == CC1101.PKTCTRL0:
+            self.modes.append(data[1] & 0x03)
+        if data[0] == CC1101.PKTLEN:
+            self.lengths.append(data[1])
+        return super(DrainSPI, self).xfer(data)
+
+
+class TestStreamTX(unittest.TestCase):
+# ###############################################
+
+    def radio(self, spi):
+        spi.registers[CC1101.FIFOTHR] = 0x07      # TX threshold 33 bytes
+        return CC1101(spi=spi)
+
+    def test_long_payload(self):
+        """Test a 1000 byte payload goes out with refills"""
+
+        payload = bytes(i & 0xFF for i in range(1000))
+        spi = DrainSPI()
+        spi.registers[CC1101.PKTLEN] = 20
+        cc = self.radio(spi)
+        assert cc.send_stream(payload) == 1000
+        assert spi.sent == payload
+        assert spi.lengths == [1000 % 256, 20]
+        assert spi.modes == [2, 0, 0]
+
+    def test_restores_format(self):
+        """Test PKTLEN and PKTCTRL0 are put back, also after a failure"""
+
+        spi = DrainSPI()
+        spi.registers[CC1101.PKTLEN] = 20
+        spi.registers[CC1101.PKTCTRL0] = 0x01
+        cc = self.radio(spi)
+        cc.send_stream(b'x' * 100)
+        assert spi.registers[CC1101.PKTLEN] == 20
+        assert spi.registers[CC1101.PKTCTRL0] == 0x01
+
+        spi = DrainSPI(rate=64, underflow=True)
+        spi.registers[CC1101.PKTLEN] = 20
+        cc = self.radio(spi)
+        with self.assertRaises(TXUnderflow):
+            cc.send_stream(b'x' * 500)
+        assert spi.registers[CC1101.PKTLEN] == 20
+
+    def test_infinite_mode(self):
+        """Test send_data points infinite length mode to send_stream"""
+
+        spi = DrainSPI()
+        cc = self.radio(spi)
+        cc.packet_length('PKT_LEN_INFINITE')
+        with self.assertRaises(ValueError):
+            cc.send_data(b'x' * 10)
+        assert spi.tx_fifo == bytearray()
+
+    def test_sources(self):
+        """Test file-like and chunked iterable sources"""
+
+        spi = DrainSPI()
+        cc = self.radio(spi)
+        cc.send_stream(io.BytesIO(b'a' * 300))
+        cc.send_stream([b'bb', b'cc', 0x64], length=5)
+        assert spi.sent == b'a' * 300 + b'bbccd'
+
+    def test_underflow(self):
+        """Test underflow is reported"""
+
+        spi = DrainSPI(rate=64, underflow=True)
+        cc = self.radio(spi)
+        with self.assertRaises(TXUnderflow):
+            cc.send_stream(b'x' * 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import time
+import unittest
+
+import numpy as np
+
+from pyticc.cc1101 import CC1101
+from pyticc.sim import SimulatedCC1101
+from pyticc.sweep import RSSISweep, Waterfall, rssi_settle_time
+
+
+class TestSweep(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sim = SimulatedCC1101()
+        self.cc = CC1101(spi=self.sim, shadow_registers=True)
+        self.cc.refresh_shadow()
+        self.cc.channel_spacing(200000)
+        # a carrier on channel 5
+        self.sim.rssi = lambda freq: -40.0 if abs(freq - 801000000) < 100000 else -95.5
+
+    def test_settle_time(self):
+        """Test the settle estimate follows the AGC and filter settings"""
+
+        self.cc.rx_bandwidth(232000)
+        wait = rssi_settle_time(self.cc)
+        self.cc.write_byte('AGCCTRL0', 0xB3)     # longer WAIT_TIME and FILTER_LENGTH
+        assert rssi_settle_time(self.cc) > wait
+
+    def test_sweep(self):
+        """Test a sweep reads every channel into a channels x samples array"""
+
+        sweep = RSSISweep(self.cc, range(10), samples=3, settle=0)
+        dbm = sweep.sweep()
+        assert dbm.shape == (10, 3)
+        assert dbm.dtype == np.float32
+        assert int(np.argmax(dbm.max(axis=1))) == 5
+        assert dbm[5, 0] == -40.0
+        assert dbm[0, 2] == -95.5
+        assert self.sim.calibrations == 10
+
+        # hop + samples transfers per channel, calibration only once
+        start = self.sim.transfers
+        sweep.sweep(dbm)
+        assert self.sim.transfers - start == 10 * (5 + 3)
+        assert self.sim.calibrations == 10
+
+        # vectorized conversion matches the scalar one
+        raw = np.arange(256, dtype=np.uint8).reshape(16, 16)
+        assert sweep.to_dbm(raw).ravel().tolist() == [self.cc._rssi_dbm(v) for v in range(256)]
+
+    def test_back_into_rx(self):
+        """Test a chip that dropped out of RX is put back"""
+
+        sweep = RSSISweep(self.cc, [4, 5], settle=0)
+        sweep.calibrate()
+        strobe = self.cc.strobe
+        dropped = []
+
+        def idle_after_hop(addr):
+            out = strobe(addr)
+            if addr == self.cc.SRX | self.cc.READ_SINGLE_BYTE and not dropped:
+                dropped.append(addr)
+                self.sim._idle()
+            return out
+
+        self.cc.strobe = idle_after_hop
+        dbm = sweep.sweep()
+        assert sweep.retries == 1
+        assert dbm[1, 0] == -40.0
+
+    def test_waterfall(self):
+        """Test the waterfall ring keeps the newest rows in order"""
+
+        waterfall = Waterfall(RSSISweep(self.cc, range(8), samples=2, settle=0),
+                              depth=4)
+        for _ in range(6):
+            waterfall.step()
+
+        rows, timestamps = waterfall.rows()
+        assert rows.shape == (4, 8)
+        assert list(timestamps) == sorted(timestamps)
+        assert (rows[:, 5] == -40.0).all()
+        assert waterfall.rows(2)[0].shape == (2, 8)
+
+        waterfall.start()
+        deadline = time.time() + 2
+        while waterfall.count < 10 and time.time() < deadline:
+            time.sleep(0.01)
+        waterfall.stop()
+        assert not waterfall.running()
+        assert waterfall.error is None
+        assert waterfall.latest()[5] == -40.0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import io
+import json
+import unittest
+
+from fakes import FakeSPI
+from pyticc.cc1101 import CC1101
+
+
+class TestTrace(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.spi = FakeSPI()
+        self.cc = CC1101(spi=self.spi)
+
+    def test_disabled(self):
+        """Test nothing is recorded without a tracer"""
+
+        self.cc.read_byte(0x10)
+        assert self.cc.tracer is None
+        assert self.cc.stop_trace() is None
+
+    def test_transfers(self):
+        """Test transfers are decoded and attributed to API methods"""
+
+        tracer = self.cc.start_trace()
+        self.cc.base_frequency()
+        self.cc.sidle()
+        self.cc.read_burst('RXFIFO', 0)
+        assert self.cc.stop_trace() is tracer
+
+        events = tracer.transfers()
+        assert events[0]['method'] == 'base_frequency'
+        assert events[0]['opcode'] == 'read'
+        assert events[0]['register'] in ('FREQ2', 'FREQ1', 'FREQ0')
+        sidle = [e for e in events if e['method'] == 'sidle']
+        assert (sidle[0]['opcode'], sidle[0]['register']) == ('strobe', 'SIDLE')
+        assert (sidle[1]['opcode'], sidle[1]['register']) == ('strobe', 'SNOP')
+        assert (events[-1]['opcode'], events[-1]['register']) == ('read_burst', 'RXFIFO')
+        assert tracer.decode_header(0xF5) == ('status', 'MARCSTATE')
+
+        summary = tracer.summary()
+        assert summary['sidle']['transfers'] == len(sidle)
+        assert summary['base_frequency']['bytes'] == 2 * summary['base_frequency']['transfers']
+        assert sum(tracer.histogram().values()) == len(events)
+        assert sum(tracer.histogram('sidle').values()) == len(sidle)
+
+    def test_export(self):
+        """Test JSON and Chrome trace export"""
+
+        tracer = self.cc.start_trace(capacity=2)
+        for addr in range(4):
+            self.cc.read_byte(addr)
+        assert len(tracer) == 2
+
+        assert json.loads(tracer.to_json())[-1]['register'] == 'FIFOTHR'
+        fh = io.StringIO()
+        tracer.to_chrome_trace(fh)
+        trace = json.loads(fh.getvalue())
+        assert trace['traceEvents'][0]['ph'] == 'X'
+        assert trace['traceEvents'][0]['cat'] == 'read_byte'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.sim import SimulatedCC1101
+from pyticc.transport import (
+    IoctlTransport, LoopbackTransport, SpidevTransport, UnixSocketTransport,
+    open_transport, serve_unix_socket)
+
+
+class TestTransport(unittest.TestCase):
+# ###############################################
+
+    def test_lazy_open(self):
+        """Test radios do not open or import anything until the first transfer"""
+
+        sys.modules.pop('spidev', None)
+        cc = CC1101(spi_bus=3, spi_device=1)
+        assert isinstance(cc.spi, SpidevTransport)
+        assert not cc.spi.opened
+        assert 'spidev' not in sys.modules
+
+        cc = CC1101(transport='ioctl', spi_bus=3, spi_device=1)
+        assert cc.spi.path == '/dev/spidev3.1'
+        assert not cc.spi.opened
+
+    def test_missing_spidev(self):
+        """Test the default transport names the spidev extra when missing"""
+
+        spidev = sys.modules.get('spidev')
+        sys.modules['spidev'] = None
+        try:
+            with self.assertRaisesRegex(ImportError, r'pyticc\[spidev\]'):
+                CC1101().read_byte('PARTNUM')
+        finally:
+            if spidev is None:
+                del sys.modules['spidev']
+            else:
+                sys.modules['spidev'] = spidev
+
+    def test_open_transport(self):
+        """Test transport names and instances"""
+
+        assert isinstance(open_transport('spidev'), SpidevTransport)
+        assert isinstance(open_transport('ioctl'), IoctlTransport)
+
+        transport = open_transport('unix:/tmp/cc.sock', 1, 2, 1000)
+        assert isinstance(transport, UnixSocketTransport)
+        assert transport.path == '/tmp/cc.sock'
+        assert (transport.bus, transport.device, transport.max_speed_hz) == (1, 2, 1000)
+
+        transport = LoopbackTransport()
+        assert open_transport(transport) is transport
+
+        with self.assertRaises(ValueError):
+            open_transport('usb')
+
+    def test_loopback(self):
+        """Test loopback echoes, or forwards to a target"""
+
+        transport = LoopbackTransport()
+        assert transport.xfer([1, 2, 3]) == [1, 2, 3]
+        assert transport.opened
+
+        sim = SimulatedCC1101()
+        cc = CC1101(transport=LoopbackTransport(target=sim))
+        cc.sanity_check()
+        cc.write_byte('CHANNR', 7)
+        assert sim.registers[cc.CHANNR] == 7
+
+    def test_unix_socket(self):
+        """Test a remote chip served over a Unix socket"""
+
+        sim = SimulatedCC1101()
+        path = os.path.join(tempfile.mkdtemp(), 'cc1101.sock')
+        server = serve_unix_socket(path, sim)
+        try:
+            cc = CC1101(transport='unix:' + path)
+            cc.sanity_check()
+            cc.write_burst('SYNC1', [0xFA, 0xFA])
+            assert cc.sync_word() == 'FAFA'
+
+            cc.enable_rx()
+            sim.inject(b'remote')
+            assert cc.recv_data().data == b'remote'
+            cc.spi.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.unlink(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import unittest
+
+from pyticc.cc1101 import CC1101
+from pyticc.sim import SimulatedCC1101
+from pyticc.wor import EVENT0_DEFAULT, plan_wor, wor_timing
+
+
+class TestWor(unittest.TestCase):
+# ###############################################
+
+    def setUp(self):
+        self.sim = SimulatedCC1101()
+        self.cc = CC1101(spi=self.sim)
+
+    def test_timing(self):
+        """Test the datasheet WOR timing at reset values"""
+
+        plan = wor_timing(EVENT0_DEFAULT, 0, 0)
+        self.assertAlmostEqual(plan.period, 1.0, places=3)
+        # RX_TIME=0, WOR_RES=0 is a 12.5% duty cycle
+        self.assertAlmostEqual(plan.duty_cycle, 0.125, places=4)
+        assert plan.latency > plan.period
+
+        half = wor_timing(EVENT0_DEFAULT, 0, 1)
+        self.assertAlmostEqual(half.rx_timeout * 2, plan.rx_timeout)
+        assert half.current < plan.current
+
+        with self.assertRaises(ValueError):
+            wor_timing(0, 0, 0)
+        with self.assertRaises(ValueError):
+            wor_timing(EVENT0_DEFAULT, 0, 7)
+        with self.assertRaises(ValueError):
+            # 0.3 ms period, shorter than the wake-up
+            wor_timing(10, 0, 6)
+
+    def test_plan(self):
+        """Test the planner meets latency, duty cycle and RX window"""
+
+        plan = plan_wor(latency=0.1, duty_cycle=0.02)
+        assert plan.wor_res == 0
+        assert 0.099 < plan.latency <= 0.1
+        assert plan.duty_cycle <= 0.02
+        assert plan.duty_cycle > 0.01
+
+        plan = plan_wor(latency=0.1, rx_window=0.002)
+        assert plan.rx_timeout >= 0.002
+        assert plan.rx_timeout < 0.004
+
+        # too long for WOR_RES=0
+        plan = plan_wor(latency=5, rx_window=0.002)
+        assert plan.wor_res == 1
+        assert plan.latency <= 5
+        assert plan.current < plan_wor(latency=0.1, rx_window=0.002).current
+
+        assert plan_wor(duty_cycle=0.01).event0 == EVENT0_DEFAULT
+
+        with self.assertRaises(ValueError):
+            plan_wor(latency=1)
+        with self.assertRaises(ValueError):
+            plan_wor(latency=1, duty_cycle=0.1, rx_window=0.01)
+        with self.assertRaises(ValueError):
+            plan_wor(latency=0.0001, duty_cycle=0.1)
+
+    def test_start_wor(self):
+        """Test start_wor writes the plan and strobes SWOR"""
+
+        plan = self.cc.start_wor(latency=0.5, rx_window=0.004)
+        registers = self.sim.registers
+        assert registers[CC1101.WOREVT1] << 8 | registers[CC1101.WOREVT0] == plan.event0
+        worctrl = self.cc.register_value('WORCTRL')
+        assert worctrl['EVENT1[2:0]'] == 7
+        assert worctrl['WOR_RES'] == plan.wor_res
+        assert worctrl['RC_PD'] == 0
+        assert self.cc.register_value('MCSM2')['RX_TIME[2:0]'] == plan.rx_time
+        assert self.cc.wor is plan
+        assert self.cc.read_status().state == 'RX'
+
+        # default RX window: 64 bits at the reset baud rate
+        self.cc.stop_wor()
+        assert self.cc.wor is None
+        plan = self.cc.start_wor(latency=0.5)
+        assert plan.rx_timeout >= 64.0 / self.cc.baud_rate()
+
+    def test_receive(self):
+        """Test packets come through, with SWOR after each one"""
+
+        self.cc.start_wor(latency=0.5, duty_cycle=0.05)
+        self.sim.inject(b'one')
+        assert self.cc.recv_data().data == b'one'
+
+        # RXOFF_MODE=IDLE after a packet, enable_rx() resumes polling
+        assert self.cc.read_status().state == 'IDLE'
+        self.sim.inject(b'two')
+        self.cc.enable_rx()
+        assert self.cc.recv_data().data == b'two'
+
+        self.cc.stop_wor()
+        assert self.cc.read_status().state == 'IDLE'
+
+
+if __name__ == '__main__':
+    unittest.main()
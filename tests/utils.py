@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 import unittest
-from pyticc.utils import byte_bit_value, bit_into_byte
+import numpy as np
+from pyticc.cc1101 import CC1101
+from pyticc.utils import byte_bit_value, bit_into_byte, byte_bit_values, bits_into_bytes
 
 class TestUtil(unittest.TestCase):
 # ###############################################
@@ -19,5 +21,34 @@ class TestUtil(unittest.TestCase):
         """Test proper insertion of bit values into a byte"""
         assert bit_into_byte(0x09, (5,2), "11") == 0x0F
 
+    def test_bit_into_byte_range(self):
+        """Test values that do not fit are rejected"""
+        with self.assertRaises(ValueError):
+            bit_into_byte(0x00, (6,2), 4)
+        with self.assertRaises(ValueError):
+            byte_bit_value(0x100, (0,8))
+
+    def test_byte_bit_values(self):
+        """Test batch extraction matches the scalar version"""
+        data = np.arange(256, dtype=np.uint8)
+        out = byte_bit_values(data, {'state': (1,3), 'fifo': (4,4)})
+        for byte in range(256):
+            assert out['state'][byte] == byte_bit_value(byte, (1,3))
+            assert out['fifo'][byte] == byte_bit_value(byte, (4,4))
+
+    def test_bits_into_bytes(self):
+        """Test batch insertion into register snapshots"""
+        images = np.zeros((3, 4), dtype=np.uint8)
+        out = bits_into_bytes(images, {'a': (2,5,2)}, {'a': [0, 1, 3]})
+        assert out[:, 2].tolist() == [0x00, 0x02, 0x06]
+        assert not images.any()
+
+    def test_decode_array(self):
+        """Test decoding whole register snapshots"""
+        images = np.zeros((2, CC1101.CONFIG_SIZE), dtype=np.uint8)
+        images[1, CC1101.MDMCFG2] = 0x30
+        out = CC1101.fields.decode_array(images)
+        assert out['MDMCFG2.MOD_FORMAT'].tolist() == [0, 3]
+
 if __name__ == '__main__':
     unittest.main()